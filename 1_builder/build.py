@@ -6,7 +6,7 @@
 
 import sys
 import os
-import shutil
+import argparse
 from pathlib import Path
 
 # Предотвращаем создание __pycache__
@@ -17,65 +17,118 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from loaders.config_loader import ConfigLoader
 from core.config_manager import ConfigManager
+from core.output_sink import DirectorySink, OutputSink, create_sink, get_previous_dir, rollback_directory
 from generators.section_generator import SectionGenerator
 from generators.page_generator import PageGenerator
 from generators.css_generator import CSSGenerator
 from generators.form_json_generator import FormJsonGenerator
+from generators.js_bundler import JSBundler, get_js_bundle_settings
+from generators.page_fragments import PageFragmentGenerator, is_page_fragments_enabled
+from generators.precompressor import Precompressor, get_precompress_settings
+from generators.report_checker import is_report_enabled
+from generators.resource_hints import find_prefetched_pages
+from generators.server_config_generator import ServerConfigGenerator, get_server_config_settings
+from generators.service_worker_generator import ServiceWorkerGenerator, is_service_worker_enabled
+from processors.class_mangler import ClassMangler, get_mangle_settings
+from processors.modal_fragments import FRAGMENTS_DIR_NAME, expand_fragments, is_lazy_modals_enabled, save_fragments
+from processors.production_processor import ProductionHTMLProcessor
+from processors.value_processor import get_cache_stats
+from utils.asset_utils import files_hash, get_asset_versions, version_asset_urls
+from utils.image_utils import (IMAGE_MANIFEST_FILE_NAME, image_map_script, init_image_pipeline,
+                               is_image_pipeline_enabled, process_images)
+from utils.style_validator import StyleValidator
+from utils.svg_utils import SPRITE_FILE_NAME, get_sprite_size, is_icon_sprite_enabled, save_sprite
 
 
 SOURCE_DIR_NAME = '2_source'
 OUTPUT_DIR_NAME = '3_result'
+CACHE_DIR_NAME = '.build_cache'
+CHANGES_FILE_NAME = 'changes.json'
+OUTPUT_INDEX_FILE_NAME = 'output_index.json'
 
 
-def main():
-    """Главная функция сборки"""
+def parse_args(argv=None):
+    """Аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Сборка DISKOKRAS')
+    parser.add_argument(
+        '--production', action='store_true',
+        help='production-режим HTML: без комментариев, неиспользуемых data-* атрибутов и классов, '
+             'со схлопнутыми пробелами и сжатым inline JSON'
+    )
+    parser.add_argument(
+        '--output', metavar='PATH',
+        help=f'куда сохранить результат: директория (по умолчанию {OUTPUT_DIR_NAME}; собирается рядом и '
+             'подменяется целиком, прошлая сборка остаётся в <директория>.prev) '
+             'или архив для выкладки .zip, .tar, .tar.gz, .tgz'
+    )
+    parser.add_argument(
+        '--changes', metavar='FILE',
+        help='куда сохранить список добавленных, изменённых и удалённых файлов результата-директории '
+             f'(по умолчанию {CACHE_DIR_NAME}/{CHANGES_FILE_NAME})'
+    )
+    parser.add_argument(
+        '--rollback', action='store_true',
+        help=f'без сборки вернуть прошлый результат ({OUTPUT_DIR_NAME}.prev), повторный запуск возвращает новый'
+    )
+    return parser.parse_args(argv)
+
+
+def rollback(output_dir: Path, cache_dir: Path):
+    """Меняет местами результат и прошлую сборку"""
+    print(f"↩️  Откат: {output_dir} <-> {get_previous_dir(output_dir).name}")
+    if not rollback_directory(output_dir):
+        print(f"   ❌ Прошлой сборки нет: {get_previous_dir(output_dir)}")
+        sys.exit(1)
+    # Хэши в индексе относятся к другой сборке
+    (cache_dir / OUTPUT_INDEX_FILE_NAME).unlink(missing_ok=True)
+    print("   ✅ Прошлая сборка восстановлена")
+
+
+def main(argv=None, sink: OutputSink = None):
+    """
+    Главная функция сборки
+
+    Args:
+        argv: Аргументы командной строки (None - sys.argv)
+        sink: Куда сохранить результат (например, MemorySink); None - по --output
+    """
+    args = parse_args(argv)
     
     # Определяем пути
     script_dir = Path(__file__).parent.resolve()
     project_root = script_dir.parent  # корень проекта (build_diskokras)
     source_dir = project_root / SOURCE_DIR_NAME
-    output_dir = project_root / OUTPUT_DIR_NAME
+    cache_dir = project_root / CACHE_DIR_NAME
+    output_path = Path(args.output).resolve() if args.output else project_root / OUTPUT_DIR_NAME
+    if args.rollback:
+        rollback(output_path, cache_dir)
+        return
+    if sink is None:
+        sink = create_sink(output_path, index_file=cache_dir / OUTPUT_INDEX_FILE_NAME)
     
     print("=" * 60)
     print("🚀 СБОРКА DISKOKRAS (NEW_build)")
     print("=" * 60)
     print(f"📁 Исходники: {source_dir}")
-    print(f"📁 Результат: {output_dir}")
+    print(f"📁 Результат: {sink.describe()}")
+    if args.production:
+        print("🏭 Режим: production")
     print()
     
     try:
-        # Удаляем старую директорию результата для чистой сборки (если не удалось — перезаписываем файлы)
-        if output_dir.exists():
-            print("🗑️  Удаление старого результата...")
-            try:
-                shutil.rmtree(output_dir)
-                print("   ✅ Старый результат удален")
-            except OSError as e:
-                print(f"   ⚠️  Не удалось удалить (перезаписываем): {e}")
-            print()
-        
-        # Создаем директории для результата
-        output_dir.mkdir(parents=True, exist_ok=True)
-        (output_dir / 'pages').mkdir(exist_ok=True)
-        (output_dir / 'sections').mkdir(exist_ok=True)
-        (output_dir / 'css').mkdir(exist_ok=True)
-        (output_dir / 'js').mkdir(exist_ok=True)
-        (output_dir / 'img').mkdir(exist_ok=True)
-        (output_dir / 'php').mkdir(exist_ok=True)
-        (output_dir / 'bd_local').mkdir(exist_ok=True)
-        (output_dir / 'button_json').mkdir(exist_ok=True)
-        (output_dir / 'data').mkdir(exist_ok=True)
-        (output_dir / 'data' / 'tmp').mkdir(exist_ok=True)
+        # Результат собирается в sink и сохраняется целиком в конце (директория результата
+        # подменяется готовой сборкой, прошлая остаётся в .prev). Директории, которые нужны и пустыми:
+        for dir_name in ('pages', 'sections', 'css', 'js', 'img', 'php', 'bd_local', 'button_json', 'data/tmp'):
+            sink.make_dir(dir_name)
 
         # Копируем конфиги button_json (shino.json, result.json и т.д.)
         source_button_json_dir = source_dir / '1_main' / 'button_json'
-        output_button_json_dir = output_dir / 'button_json'
         if source_button_json_dir.exists():
             print("📦 Копирование конфигов button_json...")
             for json_file in source_button_json_dir.glob('*.json'):
                 if json_file.is_file():
-                    shutil.copy2(json_file, output_button_json_dir / json_file.name)
-            count = len(list(output_button_json_dir.glob('*.json')))
+                    sink.copy_file(json_file, f'button_json/{json_file.name}')
+            count = len(sink.glob('button_json/*.json'))
             if count:
                 print(f"   ✅ Скопировано файлов: {count}")
             print()
@@ -83,38 +136,27 @@ def main():
         # Копируем save_bd только из корня папки (include.json, shino2.json, run_*.php и т.д.)
         # Подпапки с * в имени (например sql*) не копируются
         source_save_bd_dir = source_dir / '1_main' / 'save_bd'
-        output_save_bd_dir = output_dir / 'save_bd'
         if source_save_bd_dir.exists():
-            output_save_bd_dir.mkdir(exist_ok=True)
+            sink.make_dir('save_bd')
             print("📦 Копирование конфигов save_bd...")
             for json_file in source_save_bd_dir.glob('*.json'):
                 if json_file.is_file():
-                    shutil.copy2(json_file, output_save_bd_dir / json_file.name)
+                    sink.copy_file(json_file, f'save_bd/{json_file.name}')
             for php_file in source_save_bd_dir.glob('*.php'):
                 if php_file.is_file():
-                    shutil.copy2(php_file, output_save_bd_dir / php_file.name)
+                    sink.copy_file(php_file, f'save_bd/{php_file.name}')
             for sql_file in source_save_bd_dir.glob('*.sql'):
                 if sql_file.is_file():
-                    shutil.copy2(sql_file, output_save_bd_dir / sql_file.name)
-            count = len(list(output_save_bd_dir.iterdir()))
+                    sink.copy_file(sql_file, f'save_bd/{sql_file.name}')
+            count = len(sink.list_files('save_bd'))
             if count:
                 print(f"   ✅ Скопировано файлов: {count}")
             print()
 
-        # Копируем изображения
-        source_img_dir = source_dir / 'img'
-        output_img_dir = output_dir / 'img'
-        if source_img_dir.exists():
-            print("🖼️  Копирование изображений...")
-            for img_file in source_img_dir.iterdir():
-                if img_file.is_file():
-                    shutil.copy2(img_file, output_img_dir / img_file.name)
-            print(f"   ✅ Изображения скопированы")
-            print()
-        
         # Копируем и объединяем JS файлы
         source_js_dir = source_dir / 'js'
-        output_js_file = output_dir / 'js' / 'script.js'
+        output_js_file = 'js/script.js'
+        js_prelude = []  # таблицы сборки в начало JS (CLASS_MAP, IMAGE_MAP)
         if source_js_dir.exists():
             print("📜 Обработка JavaScript...")
             js_content = []
@@ -125,51 +167,45 @@ def main():
                     js_content.append("\n\n")
             
             if js_content:
-                output_js_file.write_text(''.join(js_content), encoding='utf-8')
+                sink.write_text(output_js_file, ''.join(js_content))
                 print(f"   ✅ JS создан")
             print()
         
         # Копируем JSON файлы из bd_local
         source_bd_dir = source_dir / 'bd_local'
-        output_bd_dir = output_dir / 'bd_local'
         if source_bd_dir.exists():
             print("💾 Копирование JSON из базы данных...")
             for json_file in source_bd_dir.glob('*.json'):
                 if json_file.is_file():
-                    shutil.copy2(json_file, output_bd_dir / json_file.name)
+                    sink.copy_file(json_file, f'bd_local/{json_file.name}')
             print(f"   ✅ JSON файлы скопированы")
             print()
         
         # Копируем PHP скрипты
         source_php_dir = source_dir / 'php'
-        output_php_dir = output_dir / 'php'
         if source_php_dir.exists():
             print("🐘 Копирование PHP скриптов...")
             view_table_name = 'view_table.php'
             for php_file in source_php_dir.glob('*.php'):
                 if php_file.is_file() and php_file.name != view_table_name:
-                    shutil.copy2(php_file, output_php_dir / php_file.name)
+                    sink.copy_file(php_file, f'php/{php_file.name}')
             # view_table.php — только в owner/bd/ (не дублируем в php/)
             view_table = source_php_dir / view_table_name
             if view_table.is_file():
-                (output_dir / 'owner' / 'bd').mkdir(parents=True, exist_ok=True)
-                dest = output_dir / 'owner' / 'bd' / 'view_table.php'
-                shutil.copy2(view_table, dest)
                 # путь к include для owner/bd (на 2 уровня выше)
-                content = dest.read_text(encoding='utf-8')
+                content = view_table.read_text(encoding='utf-8')
                 content = content.replace("__DIR__ . '/../save_bd/", "__DIR__ . '/../../save_bd/")
-                dest.write_text(content, encoding='utf-8')
+                sink.write_text('owner/bd/view_table.php', content)
             print(f"   ✅ PHP скрипты скопированы")
             print()
         
         # Копируем JSON файлы из базы данных
         source_bd_dir = source_dir / 'bd_local'
-        output_bd_dir = output_dir / 'bd_local'
         if source_bd_dir.exists():
             print("💾 Копирование данных БД...")
             for json_file in source_bd_dir.glob('*.json'):
                 if json_file.is_file():
-                    shutil.copy2(json_file, output_bd_dir / json_file.name)
+                    sink.copy_file(json_file, f'bd_local/{json_file.name}')
             print(f"   ✅ Данные БД скопированы")
             print()
         
@@ -192,73 +228,260 @@ def main():
             print(f"   ❌ Ошибка валидации: {e}")
             raise
         
+        # Изображения (после конфигов: config.json "image_pipeline" - хэши, размеры, сжатие SVG)
+        source_img_dir = source_dir / 'img'
+        init_image_pipeline(config_manager.config)
+        if source_img_dir.exists():
+            if is_image_pipeline_enabled():
+                print("🖼️  Обработка изображений...")
+                image_stats = process_images(source_img_dir, sink)
+                print(f"   ✅ Файлов: {image_stats['files']}, уникальных: {image_stats['unique']} "
+                      f"(img/{IMAGE_MANIFEST_FILE_NAME})")
+                if image_stats['svg_before']:
+                    print(f"   ✅ SVG: {image_stats['svg_before']} -> {image_stats['svg_after']} байт")
+                js_prelude.insert(0, image_map_script())
+                if sink.exists(output_js_file):
+                    sink.write_text(output_js_file, js_prelude[0] + sink.read_text(output_js_file))
+            else:
+                print("🖼️  Копирование изображений...")
+                for img_file in source_img_dir.iterdir():
+                    if img_file.is_file():
+                        sink.copy_file(img_file, f'img/{img_file.name}')
+                print(f"   ✅ Изображения скопированы")
+            print()
+        
         # ЭТАП 3: Генерация секций
         print("📄 Генерация секций...")
         section_gen = SectionGenerator(config_manager, source_dir)
         sections_html = section_gen.generate_all()
-        section_gen.save_all(sections_html, output_dir / 'sections')
+        section_gen.save_all(sections_html, sink, 'sections')
         print(f"   ✅ Создано секций: {len(sections_html)} (включая дубликаты)")
         print()
         
-        # ЭТАП 4: Генерация страниц
+        # ЭТАП 4: Генерация CSS (до страниц: нужен для critical CSS)
+        print("🎨 Генерация CSS...")
+        css_gen = CSSGenerator(configs, cache_dir=cache_dir / 'css')
+        css_content = css_gen.generate(source_dir)
+        css_file = 'css/style.css'
+        
+        # Статистика CSS
+        css_size = len(css_content)
+        print(f"   📏 Размер CSS: {css_size} символов")
+        if css_gen.css_cache.enabled:
+            print(f"   ♻️  Кэш блоков CSS: из кэша {css_gen.css_cache.hits}, сгенерировано {css_gen.css_cache.misses}")
+        
+        # Сохраняем CSS
+        css_gen.save(css_content, sink, css_file)
+        print("   ✅ CSS создан")
+        
+        # Проверка селекторов column/row по layout_html.json (CSS разбирается в индекс один раз)
+        if configs.get('html'):
+            style_results = StyleValidator(configs['html']).validate_all_sections(css_content)
+            missing_selectors = [
+                (section_name, selector)
+                for section_name, data in style_results.items()
+                for selector in data['validation']['missing_selectors']
+            ]
+            print(f"   🔎 Селекторы структуры: секций {len(style_results)}, отсутствует {len(missing_selectors)}")
+            for section_name, selector in missing_selectors:
+                print(f"      — {section_name}: {selector}")
+        
+        # Отладочные стили - отдельный css/report.css (подключается при REPORT_ENABLED = 1 или по ?report)
+        report_css = css_gen.generate_report()
+        if report_css:
+            css_gen.save(report_css, sink, 'css/report.css')
+            report_mode = '✅ подключены' if is_report_enabled() else 'по ?report'
+            print(f"   🔍 Отладочные стили: css/report.css ({len(report_css)} символов, {report_mode})")
+        else:
+            print("   🔍 Отладочные стили: ❌ нет")
+        print()
+
+        # ЭТАП 5: Генерация страниц
         print("📑 Генерация страниц...")
-        from datetime import datetime
-        build_version = datetime.now().strftime('%Y%m%d%H%M')
-        page_gen = PageGenerator(config_manager, sections_html, source_dir, build_version=build_version)
+        # Версия конфигов button_json - по содержимому (одинаковые исходники - одинаковые страницы)
+        build_version = files_hash(source_button_json_dir.glob('*.json'))
+        page_gen = PageGenerator(config_manager, sections_html, source_dir, build_version=build_version,
+                                 css_content=css_content, has_report_css=bool(report_css))
         pages_html = page_gen.generate_all()
-        page_gen.save_all(pages_html, output_dir / 'pages')
+        page_gen.save_all(pages_html, sink, 'pages')
         print(f"   ✅ Создано страниц: {len(pages_html)}")
 
         # Корневой index.html — перенаправление на главную (чтобы / загружал страницу с верными путями к CSS/JS)
-        root_index = output_dir / 'index.html'
-        root_index.write_text(
+        root_index = sink.write_text(
+            'index.html',
             '<!DOCTYPE html><html lang="ru"><head><meta charset="UTF-8">'
             '<meta http-equiv="refresh" content="0;url=pages/index.html">'
             '<title>DISKOKRAS CRM</title>'
             '<script>location.replace("pages/index.html");</script>'
-            '</head><body><p><a href="pages/index.html">Перейти на главную</a></p></body></html>',
-            encoding='utf-8'
+            '</head><body><p><a href="pages/index.html">Перейти на главную</a></p></body></html>'
         )
         print("   ✅ Корневой index.html (редирект на pages/index.html)")
+
+        # Фрагменты модалок (config.json: "lazy_modals") - загружаются при первом открытии
+        if is_lazy_modals_enabled():
+            fragment_files = save_fragments(sink, FRAGMENTS_DIR_NAME)
+            print(f"   ✅ Фрагменты модалок: {len(fragment_files)} ({FRAGMENTS_DIR_NAME}/)")
+
+        # Спрайт иконок (config.json: "icon_sprite")
+        if is_icon_sprite_enabled():
+            sprite_path = save_sprite(sink)
+            where = SPRITE_FILE_NAME if sprite_path else 'встроен в страницы'
+            print(f"   ✅ Спрайт иконок: {get_sprite_size()} ({where})")
         print()
+
+        # ЭТАП 5.1: Production HTML (после CSS: по нему видно, какие классы и атрибуты нужны)
+        if args.production:
+            print("🏭 Production HTML...")
+            production = ProductionHTMLProcessor(css_content)
+            html_files = [root_index] + sink.glob('pages/*.html') + sink.glob('sections/*.html') + \
+                sink.glob(f'{FRAGMENTS_DIR_NAME}/*.html')
+            for html_file in html_files:
+                production.process_file(sink, html_file)
+            saved = production.bytes_before - production.bytes_after
+            print(f"   ✅ Файлов: {len(html_files)}, {production.bytes_before} -> {production.bytes_after} байт "
+                  f"(-{saved * 100 // max(production.bytes_before, 1)}%)")
+            print()
+
+        # ЭТАП 5.2: Сжатие имён классов (config.json: "mangle_classes") - HTML, CSS и таблица для JS
+        mangle_settings = get_mangle_settings(configs.get('config'))
+        if mangle_settings:
+            print("🔤 Сжатие имён классов...")
+            html_files = sink.glob('pages/*.html') + sink.glob('sections/*.html') + \
+                sink.glob(f'{FRAGMENTS_DIR_NAME}/*.html')
+            mangler = ClassMangler(css_content, mangle_settings['reserved'])
+            class_map = mangler.build_map(sink.read_text(f) for f in html_files)
+            for html_file in html_files:
+                sink.write_text(html_file, mangler.rewrite_html(sink.read_text(html_file)))
+            for css_path in (css_file, 'css/report.css'):
+                if sink.exists(css_path):
+                    sink.write_text(css_path, mangler.rewrite_css(sink.read_text(css_path)))
+            js_prelude.insert(0, mangler.js_map_script())
+            if sink.exists(output_js_file):
+                sink.write_text(output_js_file, js_prelude[0] + sink.read_text(output_js_file))
+            print(f"   ✅ Переименовано классов: {len(class_map)}, "
+                  f"style.css: {css_size} -> {len(sink.read_text(css_file))} символов")
+            print()
         
-        # ЭТАП 5: Генерация CSS
-        print("🎨 Генерация CSS...")
-        css_gen = CSSGenerator(configs)
-        css_content = css_gen.generate(source_dir)
-        css_file = output_dir / 'css' / 'style.css'
-        
-        # Статистика CSS
-        css_size = len(css_content)
-        has_report = 'ОТЛАДОЧНЫЕ' in css_content
-        
-        print(f"   📏 Размер CSS: {css_size} символов")
-        print(f"   🔍 Отладочные стили: {'✅ включены' if has_report else '❌ выключены'}")
-        
-        # Сохраняем CSS
-        css_gen.save(css_content, css_file)
-        print("   ✅ CSS создан")
+        # ЭТАП 5.3: JS по страницам (config.json: "js_bundle") - после 5.2: CLASS_MAP входит в core
+        js_bundle_settings = get_js_bundle_settings(configs.get('config'))
+        if js_bundle_settings and source_js_dir.exists():
+            print("📦 Сборка JS по страницам...")
+            bundler = JSBundler(source_js_dir, minify=js_bundle_settings['minify'])
+            page_files = sink.glob('pages/*.html')
+            pages_text = {Path(f).stem: sink.read_text(f) for f in page_files}
+            page_chunks = bundler.build({page: expand_fragments(html) for page, html in pages_text.items()},
+                                        sink, 'js', prelude=''.join(js_prelude))
+            for page_file in page_files:
+                page = Path(page_file).stem
+                html = pages_text[page]
+                # Части страниц из <link rel="prefetch"> (resource_hints) - тоже заранее
+                prefetch_chunks = dict.fromkeys(name for linked in find_prefetched_pages(html)
+                                                for name in page_chunks.get(linked, []))
+                sink.write_text(page_file, bundler.rewrite_page(html, page_chunks[page], prefetch_chunks))
+            full_size = sink.size(output_js_file) if sink.exists(output_js_file) else 0
+            # Страницы подключают только части - целый script.js в результат не попадает
+            sink.remove(output_js_file)
+            page_sizes = [sum(sink.size(f'js/{name}') for name in chunks) for chunks in page_chunks.values()]
+            chunk_count = len({name for chunks in page_chunks.values() for name in chunks})
+            print(f"   ✅ Частей: {chunk_count}, JS на страницу: {min(page_sizes, default=0)}-"
+                  f"{max(page_sizes, default=0)} байт (вместо script.js: {full_size})")
+            print()
+
+        # ЭТАП 5.4: Версии ресурсов (?v=<хэш>) - после всех этапов, меняющих CSS и JS
+        asset_versions = get_asset_versions(sink)
+        for page_file in sink.glob('pages/*.html'):
+            sink.write_text(page_file, version_asset_urls(sink.read_text(page_file), asset_versions))
+        print("🔖 Версии ресурсов: " + ", ".join(f"{path}?v={v}" for path, v in asset_versions.items()))
         print()
 
+        # ЭТАП 5.5: Фрагменты страниц (config.json: "page_fragments") - по готовым страницам
+        if is_page_fragments_enabled(configs.get('config')):
+            print("🧩 Фрагменты страниц...")
+            page_files = sink.glob('pages/*.html')
+            annotated, page_fragments = PageFragmentGenerator().build(
+                {Path(f).stem: sink.read_text(f) for f in page_files})
+            for page_file in page_files:
+                sink.write_text(page_file, annotated[Path(page_file).stem])
+            fragment_files = PageFragmentGenerator.save(page_fragments, sink, 'pages')
+            shared_sections = sorted({s['id'] for f in page_fragments.values() for s in f['sections'] if s.get('shared')})
+            print(f"   ✅ Фрагментов: {len(fragment_files)} (pages/*.json), "
+                  f"общие секции: {', '.join(shared_sections) or 'нет'}")
+            print()
+
         # ЭТАП 6: JSON-шаблоны форм (для сохранения данных после отправки)
         print("📋 Генерация JSON-шаблонов форм...")
         form_gen = FormJsonGenerator(configs)
-        form_files = form_gen.generate(output_dir)
+        form_files = form_gen.generate(sink)
         if form_files:
             print(f"   ✅ Создано файлов форм: {len(form_files)}")
             for form_class, fp in form_files.items():
-                print(f"      — {fp.name}")
+                print(f"      — {Path(fp).name}")
         else:
             print("   (форм с button_json не найдено)")
         print()
 
+        # ЭТАП 7: Service worker (config.json: "service_worker") - после этапов, меняющих страницы и ресурсы
+        if is_service_worker_enabled(configs.get('config')):
+            print("📴 Service worker...")
+            for page_file in sink.glob('pages/*.html'):
+                sink.write_text(page_file, ServiceWorkerGenerator.register_in_page(sink.read_text(page_file)))
+            sw_gen = ServiceWorkerGenerator(sink)
+            precache = sw_gen.build_manifest()
+            manifest_path, _ = sw_gen.save(precache)
+            precache_size = sum(sink.size(entry['url']) for entry in precache)
+            print(f"   ✅ sw.js, {manifest_path}: файлов {len(precache)} ({precache_size} байт)")
+            print()
+
+        # ЭТАП 8: Сжатые копии (config.json: "precompress") - после всех этапов, которые пишут файлы
+        precompress_settings = get_precompress_settings(configs.get('config'))
+        if precompress_settings:
+            print("🗜️  Сжатые копии...")
+            precompressor = Precompressor(cache_dir / 'compress', min_size=precompress_settings['min_size'],
+                                          use_brotli=precompress_settings['brotli'],
+                                          workers=precompress_settings['workers'])
+            compressed_files = precompressor.compress_dir(sink)
+            sizes = ", ".join(f".{encoding}: {size}" for encoding, size in precompressor.bytes_after.items())
+            print(f"   ✅ Файлов: {len(compressed_files)}, {precompressor.bytes_before} байт -> {sizes}")
+            print(f"   ♻️  Из кэша {precompressor.hits}, сжато {precompressor.misses}")
+            print()
+
+        # ЭТАП 9: Кэширование на веб-сервере (config.json: "server_config") - по всем записанным файлам
+        server_config_settings = get_server_config_settings(configs.get('config'))
+        if server_config_settings:
+            print("🌐 Конфиги веб-сервера...")
+            server_config = ServerConfigGenerator(sink)
+            written = server_config.save(**server_config_settings)
+            patterns = server_config.get_patterns()
+            print(f"   ✅ {', '.join(written) or 'не созданы'}: файлов {len(server_config.files)}, "
+                  f"групп с долгим кэшем {len(patterns.get('immutable', [])) + len(patterns.get('versioned', []))}")
+            print()
+
+        # Сохранение результата (директория - подмена целиком, архив - одним потоком)
+        print("💾 Сохранение результата...")
+        sink.close()
+        if isinstance(sink, DirectorySink):
+            changes_file = sink.save_changes(Path(args.changes).resolve() if args.changes
+                                             else cache_dir / CHANGES_FILE_NAME)
+            print(f"   ✅ Файлов: {len(sink.list_files())}, новых {len(sink.added)}, изменено {len(sink.changed)}, "
+                  f"без изменений {len(sink.unchanged)}, удалено {len(sink.removed)}")
+            print(f"   📝 Список изменений: {changes_file}")
+            if sink.previous_dir.exists():
+                print(f"   ↩️  Прошлая сборка: {sink.previous_dir.name} (откат: build.py --rollback)")
+        else:
+            print(f"   ✅ Файлов: {len(sink.list_files())} ({sink.describe()})")
+        print()
+
         # Итоги
         print("=" * 60)
         print("✅ СБОРКА ЗАВЕРШЕНА УСПЕШНО!")
         print("=" * 60)
         print(f"📊 Создано страниц: {len(pages_html)}")
         print(f"📊 Создано секций: {len([k for k in sections_html.keys() if not k.startswith('sec_')])}")
-        print(f"📁 Результаты в: {output_dir}")
+        cache_stats = get_cache_stats()
+        print("📊 Кэш значений (попадания/промахи): " + ", ".join(
+            f"{name} {stats['hits']}/{stats['misses']}" for name, stats in cache_stats.items()
+        ))
+        print(f"📁 Результаты в: {sink.describe()}")
         print()
         
     except Exception as e:
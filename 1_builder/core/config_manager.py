@@ -27,6 +27,7 @@ class ConfigManager:
         self.icons = configs.get('icons', {})  # SVG иконки из icon.json
         self.if_values = configs.get('if_values', {})  # Условные значения из if.json
         self.objects_fun = configs.get('objects_fun', {})  # Функции для объектов (sum, avg, etc)
+        self.div_column = configs.get('div_column', {})  # Колонки из default/div_column.json
         
         # Создаем список имен секций из html (layout_html.json)
         self._create_section_list()
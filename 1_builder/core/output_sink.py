@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Куда сборка записывает результат
+
+Все этапы сборки пишут и читают файлы результата через OutputSink - по путям
+относительно корня результата ('pages/index.html', 'css/style.css'). Этапы
+переписывают файлы несколько раз (production, сжатие классов, версии ресурсов),
+поэтому содержимое собирается в памяти, а в место назначения попадает один раз -
+при close():
+
+- DirectorySink - директория (3_result): собирается рядом и подменяет её одним
+  rename, прошлая сборка остаётся для отката; изменённые файлы отмечаются в списке
+  добавленных, изменённых и удалённых - для выкладки только разницы;
+- ArchiveSink - архив для выкладки (.zip, .tar, .tar.gz, .tgz): записи идут
+  потоком в файл или открытый поток (например, stdout) без промежуточного дерева
+  и без отдельного прохода tar;
+- MemorySink - только память: {путь: байты} для проверок и серверов, которые
+  отдают сборку сами.
+"""
+
+import ctypes
+import errno
+import fnmatch
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+from core.exceptions import BuilderException
+
+
+# Время записей архива: одинаковые сборки дают побайтно одинаковый архив
+# (SOURCE_DATE_EPOCH - общепринятая переменная воспроизводимых сборок)
+ARCHIVE_MTIME = int(os.environ.get('SOURCE_DATE_EPOCH', 315532800))  # 1980-01-01 - минимум zip
+
+ARCHIVE_FORMATS = {'.zip': 'zip', '.tar': 'tar', '.tar.gz': 'tar.gz', '.tgz': 'tar.gz'}
+
+# Рядом с директорией результата: сборка (.3_result.staging) и прошлая сборка (3_result.prev)
+STAGING_SUFFIX = '.staging'
+PREVIOUS_SUFFIX = '.prev'
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+class OutputSinkError(BuilderException):
+    """Ошибка записи результата сборки"""
+    pass
+
+
+def _normalize(path: Union[str, PurePosixPath]) -> str:
+    """Путь относительно корня результата ('pages/index.html')"""
+    parts = [part for part in PurePosixPath(str(path).replace('\\', '/')).parts if part not in ('', '.')]
+    if not parts or '..' in parts or parts[0] == '/':
+        raise OutputSinkError(f"Недопустимый путь результата: {path}")
+    return '/'.join(parts)
+
+
+class OutputSink:
+    """Файлы результата сборки (в памяти до close())"""
+
+    def __init__(self):
+        self._files: Dict[str, bytes] = {}
+        self._dirs = set()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    # --- Запись ---
+
+    def write_bytes(self, path: str, data: bytes) -> str:
+        """Записывает файл -> нормализованный путь"""
+        path = _normalize(path)
+        with self._lock:
+            if self.closed:
+                raise OutputSinkError(f"Результат уже сохранён, запись {path} невозможна")
+            self._files[path] = bytes(data)
+        return path
+
+    def write_text(self, path: str, text: str) -> str:
+        """Записывает текстовый файл (UTF-8)"""
+        return self.write_bytes(path, text.encode('utf-8'))
+
+    def copy_file(self, source: Path, path: str) -> str:
+        """Копирует файл исходников в результат"""
+        return self.write_bytes(path, Path(source).read_bytes())
+
+    def make_dir(self, path: str) -> str:
+        """Директория, которая нужна даже пустой (например, data/tmp для PHP)"""
+        path = _normalize(path)
+        with self._lock:
+            self._dirs.add(path)
+        return path
+
+    def remove(self, path: str) -> bool:
+        """Удаляет файл из результата -> был ли он"""
+        with self._lock:
+            return self._files.pop(_normalize(path), None) is not None
+
+    # --- Чтение ---
+
+    def read_bytes(self, path: str) -> bytes:
+        path = _normalize(path)
+        try:
+            return self._files[path]
+        except KeyError:
+            raise FileNotFoundError(f"Нет файла в результате: {path}") from None
+
+    def read_text(self, path: str) -> str:
+        return self.read_bytes(path).decode('utf-8')
+
+    def exists(self, path: str) -> bool:
+        return _normalize(path) in self._files
+
+    def size(self, path: str) -> int:
+        return len(self.read_bytes(path))
+
+    def list_files(self, prefix: str = '') -> List[str]:
+        """Файлы результата (в порядке путей), prefix - директория ('pages')"""
+        with self._lock:
+            paths = sorted(self._files)
+        if not prefix:
+            return paths
+        prefix = _normalize(prefix) + '/'
+        return [path for path in paths if path.startswith(prefix)]
+
+    def glob(self, pattern: str) -> List[str]:
+        """Файлы по шаблону пути ('pages/*.html'; * не переходит через /)"""
+        pattern_parts = _normalize(pattern).split('/')
+        return [
+            path for path in self.list_files()
+            if len(path.split('/')) == len(pattern_parts)
+            and all(fnmatch.fnmatchcase(part, mask) for part, mask in zip(path.split('/'), pattern_parts))
+        ]
+
+    def list_dirs(self) -> List[str]:
+        """Все директории результата (с файлами и пустые)"""
+        dirs = set(self._dirs)
+        for path in list(self._files) + list(self._dirs):
+            parents = path.split('/')[:-1]
+            dirs.update('/'.join(parents[:i]) for i in range(1, len(parents) + 1))
+        return sorted(dirs)
+
+    @property
+    def files(self) -> Dict[str, bytes]:
+        """{путь: содержимое} (копия)"""
+        with self._lock:
+            return dict(self._files)
+
+    # --- Сохранение ---
+
+    def close(self):
+        """Сохраняет результат в место назначения (повторный вызов ничего не делает)"""
+        if self.closed:
+            return
+        self._flush()
+        self.closed = True
+
+    def _flush(self):
+        """Запись в место назначения (в наследниках)"""
+        pass
+
+    def describe(self) -> str:
+        """Место назначения для вывода в консоль"""
+        return 'память'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # При ошибке сборки место назначения не трогаем
+        if exc_type is None:
+            self.close()
+
+
+class MemorySink(OutputSink):
+    """Результат только в памяти (sink.files после сборки)"""
+    pass
+
+
+class DirectorySink(OutputSink):
+    """
+    Результат в директории: записываются только изменённые файлы
+
+    Файлы сравниваются по sha256. Хэши прошлой сборки хранятся в index_file вместе
+    с размером и временем изменения: файл, который с тех пор не трогали, не читается.
+    Неизменённые файлы сохраняют время изменения, поэтому rsync и выгрузка на CDN
+    их пропускают; список изменений - changes / save_changes().
+
+    staged=True: результат собирается в .3_result.staging рядом с директорией
+    (неизменённые файлы - копиями текущих) и целиком подменяет её
+    одним rename (RENAME_EXCHANGE в Linux). Веб-сервер видит либо старую сборку,
+    либо новую; при ошибке директория не меняется. Прошлая сборка остаётся в
+    3_result.prev - rollback_directory() возвращает её. Жёсткие ссылки не используются:
+    PHP сайта переписывает файлы на месте (send_form_json, data, button_json), и
+    .prev с общими inode менялась бы вместе с рабочей сборкой.
+    staged=False: файлы пишутся прямо в директорию, каждый атомарно (временный
+    файл рядом и rename).
+    """
+
+    def __init__(self, root: Path, index_file: Optional[Path] = None, staged: bool = True):
+        """
+        Args:
+            root: Директория результата (3_result)
+            index_file: Хэши файлов прошлой сборки (None - старые файлы читаются для сравнения)
+            staged: Собирать рядом и подменять директорию целиком
+        """
+        super().__init__()
+        self.root = Path(root)
+        self.index_file = Path(index_file) if index_file else None
+        self.staged = staged
+        self.staging_dir = self.root.with_name(f".{self.root.name}{STAGING_SUFFIX}")
+        self.previous_dir = get_previous_dir(self.root)
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+        self.hashes: Dict[str, str] = {}
+
+    def describe(self) -> str:
+        return str(self.root)
+
+    @property
+    def changes(self) -> Dict[str, Any]:
+        """Изменения относительно прошлого содержимого директории"""
+        return {
+            'root': str(self.root),
+            'added': self.added,
+            'changed': self.changed,
+            'removed': self.removed,
+            'unchanged': len(self.unchanged),
+            'sha256': {path: self.hashes[path] for path in self.added + self.changed},
+        }
+
+    def save_changes(self, path: Path) -> Path:
+        """Сохраняет список изменений (JSON) для выкладки только изменённых файлов"""
+        path = Path(path)
+        _atomic_write(path, json.dumps(self.changes, ensure_ascii=False, indent=1).encode('utf-8'))
+        return path
+
+    def _flush(self):
+        if not self.staged:
+            self._save_index(self._write_tree(self.root))
+            self._remove_stale()
+            return
+
+        # Остаток прерванной сборки
+        if self.staging_dir.exists():
+            shutil.rmtree(self.staging_dir)
+        try:
+            index = self._write_tree(self.staging_dir)
+            self.removed = self._find_stale()
+            self._swap_in()
+        except BaseException:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            raise
+        self._save_index(index)
+
+    def _write_tree(self, target: Path) -> Dict[str, list]:
+        """
+        Записывает результат в target (изменённые файлы сравниваются с self.root)
+
+        Returns:
+            Новый индекс {путь: [размер, время изменения, sha256]}
+        """
+        target.mkdir(parents=True, exist_ok=True)
+        for rel_dir in self.list_dirs():
+            (target / rel_dir).mkdir(parents=True, exist_ok=True)
+        old_index = self._load_index()
+        new_index = {}
+        for rel_path, data in sorted(self._files.items()):
+            path = target / rel_path
+            current = self.root / rel_path
+            digest = hashlib.sha256(data).hexdigest()
+            self.hashes[rel_path] = digest
+            if path.is_dir():
+                raise OutputSinkError(f"На месте файла результата директория: {path}")
+            old_digest = self._existing_hash(current, old_index.get(rel_path))
+            if old_digest == digest:
+                self.unchanged.append(rel_path)
+                if path != current:
+                    shutil.copy2(current, path)
+            else:
+                _atomic_write(path, data)
+                (self.changed if old_digest else self.added).append(rel_path)
+            stat = path.stat()
+            new_index[rel_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return new_index
+
+    def _find_stale(self) -> List[str]:
+        """Файлы текущей директории, которых нет в сборке"""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            rel_path for rel_path in (p.relative_to(self.root).as_posix() for p in self.root.rglob('*')
+                                      if not p.is_dir() or p.is_symlink())
+            if rel_path not in self._files
+        )
+
+    def _swap_in(self):
+        """Ставит собранную директорию на место результата, прошлую - в .prev"""
+        if not self.root.exists():
+            os.rename(self.staging_dir, self.root)
+            return
+        if self.previous_dir.exists():
+            shutil.rmtree(self.previous_dir)
+        if _exchange_paths(self.staging_dir, self.root):
+            os.rename(self.staging_dir, self.previous_dir)
+        else:
+            # Без RENAME_EXCHANGE: между двумя rename директории результата нет
+            os.rename(self.root, self.previous_dir)
+            os.rename(self.staging_dir, self.root)
+
+    @staticmethod
+    def _existing_hash(path: Path, entry: Optional[list]) -> Optional[str]:
+        """sha256 файла на диске (из индекса, если размер и время не изменились); None - файла нет"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        if not path.is_file():
+            return None
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def _load_index(self) -> Dict[str, list]:
+        if self.index_file is None:
+            return {}
+        try:
+            index = json.loads(self.index_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        # Индекс другой директории (--output) не подходит
+        return index.get('files', {}) if index.get('root') == str(self.root) else {}
+
+    def _save_index(self, files: Dict[str, list]):
+        if self.index_file is None:
+            return
+        try:
+            _atomic_write(self.index_file, json.dumps({'root': str(self.root), 'files': files}).encode('utf-8'))
+        except OSError as e:
+            print(f"   ⚠️  Не удалось записать индекс результата {self.index_file}: {e}")
+
+    def _remove_stale(self):
+        """Удаляет файлы и пустые директории прошлой сборки, которых нет в этой"""
+        keep_dirs = set(self.list_dirs())
+        for path in sorted(self.root.rglob('*'), key=lambda p: len(p.parts), reverse=True):
+            rel_path = path.relative_to(self.root).as_posix()
+            if path.is_dir() and not path.is_symlink():
+                if rel_path not in keep_dirs and not any(path.iterdir()):
+                    path.rmdir()
+            elif rel_path not in self._files:
+                path.unlink()
+                self.removed.append(rel_path)
+        self.removed.sort()
+
+
+def get_previous_dir(root: Path) -> Path:
+    """Директория прошлой сборки (3_result.prev)"""
+    root = Path(root)
+    return root.with_name(f"{root.name}{PREVIOUS_SUFFIX}")
+
+
+def rollback_directory(root: Path) -> bool:
+    """
+    Возвращает прошлую сборку: 3_result и 3_result.prev меняются местами
+    (повторный вызов возвращает новую)
+
+    Returns:
+        False, если прошлой сборки нет
+    """
+    root = Path(root)
+    previous = get_previous_dir(root)
+    if not previous.is_dir():
+        return False
+    if not root.exists():
+        os.rename(previous, root)
+    elif not _exchange_paths(previous, root):
+        swap = root.with_name(f".{root.name}.rollback")
+        if swap.exists():
+            shutil.rmtree(swap)
+        os.rename(root, swap)
+        os.rename(previous, root)
+        os.rename(swap, previous)
+    return True
+
+
+def _exchange_paths(a: Path, b: Path) -> bool:
+    """
+    Атомарно меняет местами два пути (renameat2 с RENAME_EXCHANGE, Linux 3.15+)
+
+    Returns:
+        False, если система этого не умеет (нужен обычный rename)
+    """
+    if sys.platform != 'linux':
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    if renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP):
+        return False
+    raise OSError(err, os.strerror(err), str(b))
+
+
+def _atomic_write(path: Path, data: bytes):
+    """Запись через временный файл в той же директории и rename"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class ArchiveSink(OutputSink):
+    """Результат в архиве для выкладки (zip или tar)"""
+
+    def __init__(self, target: Union[Path, BinaryIO], archive_format: Optional[str] = None,
+                 root_name: str = ''):
+        """
+        Args:
+            target: Путь архива или открытый бинарный поток
+            archive_format: 'zip', 'tar' или 'tar.gz' (None - по расширению пути)
+            root_name: Директория внутри архива ('' - файлы в корне архива)
+        """
+        super().__init__()
+        self.target = target
+        self.archive_format = archive_format or get_archive_format(target)
+        if self.archive_format not in ARCHIVE_FORMATS.values():
+            raise OutputSinkError(f"Неизвестный формат архива: {target}")
+        self.root_name = _normalize(root_name) + '/' if root_name else ''
+
+    def describe(self) -> str:
+        return str(self.target) if isinstance(self.target, (str, Path)) else f"поток ({self.archive_format})"
+
+    def _flush(self):
+        if isinstance(self.target, (str, Path)):
+            Path(self.target).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.target, 'wb') as stream:
+                self._write_archive(stream)
+        else:
+            self._write_archive(self.target)
+
+    def _write_archive(self, stream: BinaryIO):
+        dirs = [d for d in self.list_dirs() if not any(path.startswith(d + '/') for path in self._files)]
+        if self.archive_format == 'zip':
+            # ZIP_DEFLATED пишет и в поток без seek (размеры - в дескрипторе после данных)
+            with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for rel_dir in dirs:
+                    info = zipfile.ZipInfo(f"{self.root_name}{rel_dir}/", self._zip_time())
+                    info.external_attr = (0o40755 << 16) | 0x10
+                    archive.writestr(info, b'')
+                for rel_path, data in sorted(self._files.items()):
+                    info = zipfile.ZipInfo(self.root_name + rel_path, self._zip_time())
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.external_attr = 0o100644 << 16
+                    archive.writestr(info, data)
+            return
+
+        # gzip без имени файла и времени - архив детерминирован
+        gzip_stream = None
+        if self.archive_format == 'tar.gz':
+            gzip_stream = gzip.GzipFile(fileobj=stream, mode='wb', filename='', mtime=0)
+        try:
+            # Потоковый режим tarfile ('w|') не требует seek
+            with tarfile.open(fileobj=gzip_stream or stream, mode='w|', format=tarfile.PAX_FORMAT) as archive:
+                for rel_dir in dirs:
+                    archive.addfile(self._tar_info(f"{self.root_name}{rel_dir}", tarfile.DIRTYPE, 0o755))
+                for rel_path, data in sorted(self._files.items()):
+                    info = self._tar_info(self.root_name + rel_path, tarfile.REGTYPE, 0o644)
+                    info.size = len(data)
+                    archive.addfile(info, io.BytesIO(data))
+        finally:
+            if gzip_stream is not None:
+                gzip_stream.close()
+
+    @staticmethod
+    def _zip_time():
+        return time.gmtime(ARCHIVE_MTIME)[:6]
+
+    @staticmethod
+    def _tar_info(name: str, file_type: bytes, mode: int) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.type = file_type
+        info.mode = mode
+        info.mtime = ARCHIVE_MTIME
+        info.uname = info.gname = ''
+        return info
+
+
+def get_archive_format(target: Union[Path, str, BinaryIO]) -> Optional[str]:
+    """Формат архива по расширению пути (None - не архив)"""
+    if not isinstance(target, (str, Path)):
+        return None
+    name = Path(target).name.lower()
+    for suffix in sorted(ARCHIVE_FORMATS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return ARCHIVE_FORMATS[suffix]
+    return None
+
+
+def create_sink(target: Union[Path, str], index_file: Optional[Path] = None) -> OutputSink:
+    """
+    Sink по месту назначения из командной строки
+
+    Args:
+        target: Директория или путь архива (.zip, .tar, .tar.gz, .tgz)
+        index_file: Хэши файлов прошлой сборки (только для директории)
+    """
+    if get_archive_format(target):
+        return ArchiveSink(Path(target))
+    return DirectorySink(Path(target), index_file=index_file)
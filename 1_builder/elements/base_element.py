@@ -6,6 +6,8 @@
 
 from typing import Any, Dict, Optional
 
+from utils.svg_utils import render_icon
+
 
 class BaseElement:
     """Базовый класс для всех элементов"""
@@ -54,7 +56,7 @@ class BaseElement:
             if self.context and 'icons' in self.context:
                 icons = self.context['icons']
                 if content_value in icons:
-                    return icons[content_value]
+                    return render_icon(content_value, icons[content_value])
                 else:
                     return f'[Icon: {content_value} not found]'
             else:
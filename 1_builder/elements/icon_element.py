@@ -4,6 +4,7 @@
 Элемент иконки
 """
 
+from utils.svg_utils import render_icon
 from .base_element import BaseElement
 
 
@@ -42,5 +43,5 @@ class IconElement(BaseElement):
         css_class = self.get_css_class()
         data_source = self.get_data_source_attr()
         
-        return f'<icon class="{css_class}"{data_source}>{icon_content}</icon>'
+        return f'<icon class="{css_class}"{data_source}>{render_icon(icon_key, icon_content)}</icon>'
 
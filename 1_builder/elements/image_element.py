@@ -6,6 +6,7 @@
 
 from .base_element import BaseElement
 from utils.path_utils import PathUtils
+from utils.image_utils import render_img_attrs
 
 
 class ImageElement(BaseElement):
@@ -20,12 +21,14 @@ class ImageElement(BaseElement):
         
         Формат 2: ["img", "logo.png", "/url"]
         Генерирует: <a href="/url"><img src="../img/logo.png" alt=""></a>
+
+        С image_pipeline: src с хэшем и width/height (utils.image_utils)
         """
         if not isinstance(self.value, list) or len(self.value) < 2:
             return ''
         
         img_filename = self.value[1]
-        img_tag = f'<img src="../img/{img_filename}" alt="">'
+        img_tag = f'<img{render_img_attrs(img_filename)}>'
         
         # Если есть ссылка
         if len(self.value) > 2:
@@ -7,6 +7,7 @@ Base Generator - ПОЛНАЯ версия из css_generator_FULL_OLD.py
 from typing import Dict, Any
 from pathlib import Path
 from processors.value_processor import process_css_value
+from utils.selector_utils import column_selector
 
 
 class BaseGenerator:
@@ -407,12 +408,12 @@ class BaseGenerator:
         if '&' in self.general_config:
             col_config = self.general_config['&']
             if isinstance(col_config, dict):
-                css_parts.append("[class^='col_'] {")
+                css_parts.append(f"{column_selector()} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_config, current_section='&'))
                 css_parts.append("}\n\n")
             elif isinstance(col_config, list):
                 if col_config:
-                    css_parts.append("[class^='col_'] {")
+                    css_parts.append(f"{column_selector()} {{")
                     css_parts.append(self._process_properties_with_important(col_config))
                     css_parts.append("}\n\n")
         
@@ -420,12 +421,12 @@ class BaseGenerator:
         if 'col_in_row' in self.general_config:
             col_config = self.general_config['col_in_row']
             if isinstance(col_config, dict):
-                css_parts.append("[class^='col_'] {")
+                css_parts.append(f"{column_selector()} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_config, current_section='col_in_row'))
                 css_parts.append("}\n\n")
             elif isinstance(col_config, list):
                 if col_config:
-                    css_parts.append("[class^='col_'] {")
+                    css_parts.append(f"{column_selector()} {{")
                     css_parts.append(self._process_properties_with_important(col_config))
                     css_parts.append("}\n\n")
         
@@ -433,12 +434,12 @@ class BaseGenerator:
         if 'col' in self.general_config:
             col_config = self.general_config['col']
             if isinstance(col_config, dict):
-                css_parts.append("[class^='col_'] {")
+                css_parts.append(f"{column_selector()} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_config, current_section='col'))
                 css_parts.append("}\n\n")
             elif isinstance(col_config, list):
                 if col_config:
-                    css_parts.append("[class^='col_'] {")
+                    css_parts.append(f"{column_selector()} {{")
                     css_parts.append(self._process_properties_with_important(col_config))
                     css_parts.append("}\n\n")
         
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Critical CSS - выборка правил для первых секций страницы (inline в <head>)
+"""
+
+from typing import Any, Dict, List, Optional
+
+from utils.css_parser import CSSRule, HTMLTokenIndex, parse_css
+
+
+DEFAULT_CRITICAL_SECTIONS = 2
+DEFAULT_CRITICAL_MAX_BYTES = 14 * 1024
+
+
+def get_critical_css_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    """
+    Читает настройки critical CSS из config.json
+
+    Формат: "critical_css": true
+        или "critical_css": {"sections": 2, "max_bytes": 14336}
+
+    Returns:
+        {'sections': N, 'max_bytes': M} или None если режим выключен
+    """
+    value = (app_config or {}).get('critical_css')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {
+        'sections': int(settings.get('sections', DEFAULT_CRITICAL_SECTIONS)),
+        'max_bytes': int(settings.get('max_bytes', DEFAULT_CRITICAL_MAX_BYTES)),
+    }
+
+
+class CriticalCSSExtractor:
+    """Выбирает из полного stylesheet правила, которые могут сработать на фрагменте HTML"""
+
+    def __init__(self, css_content: str, max_bytes: int = DEFAULT_CRITICAL_MAX_BYTES):
+        """
+        Args:
+            css_content: Полный CSS (style.css)
+            max_bytes: Бюджет размера inline-стилей в байтах
+        """
+        self.rules = parse_css(css_content or '')
+        self.max_bytes = max_bytes
+
+    def extract(self, html: str, page_name: str = '') -> str:
+        """
+        Собирает critical CSS для фрагмента
+
+        Порядок правил сохраняется, поэтому каскад совпадает с полным stylesheet,
+        который подгружается следом. На первом правиле сверх бюджета выборка
+        останавливается: inline-стили - начало каскада, без пропусков (иначе более
+        позднее переопределение попало бы без базового правила перед ним).
+
+        Args:
+            html: HTML первых секций страницы
+            page_name: Имя страницы (для селекторов body[data-page='...'])
+
+        Returns:
+            CSS строка
+        """
+        extra_attrs = {'data-page': {page_name}} if page_name else None
+        index = HTMLTokenIndex(html, extra_attrs)
+
+        css_parts = []
+        size = 0
+        for rule in self.rules:
+            selected = self._select_rule(rule, index)
+            if selected is None:
+                continue
+            rule_css = selected.to_css()
+            rule_size = len(rule_css.encode('utf-8')) + 1
+            if size + rule_size > self.max_bytes:
+                break
+            css_parts.append(rule_css)
+            size += rule_size
+        return '\n'.join(css_parts)
+
+    def _select_rule(self, rule: CSSRule, index: HTMLTokenIndex) -> Optional[CSSRule]:
+        """Возвращает применимую часть правила (или отфильтрованный @media) либо None"""
+        if rule.children:
+            children = [c for c in (self._select_rule(child, index) for child in rule.children) if c]
+            if not children:
+                return None
+            return CSSRule(prelude=rule.prelude, children=children)
+        if rule.is_at_rule or not rule.body.strip():
+            # @font-face, @keyframes и т.п. остаются только в полном stylesheet, пустые правила не нужны
+            return None
+        selectors: List[str] = [s for s in rule.selectors if index.matches_selector(s)]
+        if not selectors:
+            return None
+        # Тело сжимаем в одну строку - inline-стили идут в каждую страницу
+        return CSSRule(prelude=','.join(selectors), body=' '.join(rule.body.split()))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Дисковый кэш блоков CSS (.build_cache/css/)
+
+Каждый блок хранится в своём файле вместе с ключом - хэшем ровно тех частей
+конфигов, которые блок читает. При пересборке блок с тем же ключом берётся
+с диска, остальные генерируются заново, и stylesheet собирается в исходном порядке.
+
+В ключ всегда входят библиотека цветов, режимы config.json, влияющие на вывод
+(css_vars, class_selectors, layout_engine), и отпечаток исходников сборщика - правка кода
+генераторов сбрасывает кэш целиком.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from processors.value_processor import collect_css_vars
+
+
+# Версия формата файлов кэша
+CACHE_FORMAT_VERSION = 1
+
+# Опции config.json, от которых зависит текст CSS
+OUTPUT_OPTIONS = ('css_vars', 'class_selectors', 'layout_engine')
+
+_BUILDER_DIR = Path(__file__).resolve().parent.parent.parent
+_builder_fingerprint: Optional[str] = None
+
+
+def get_builder_fingerprint() -> str:
+    """Хэш исходников сборщика (*.py в 1_builder), вычисляется один раз за процесс"""
+    global _builder_fingerprint
+    if _builder_fingerprint is None:
+        digest = hashlib.sha256()
+        for path in sorted(_BUILDER_DIR.rglob('*.py')):
+            if '__pycache__' in path.parts:
+                continue
+            digest.update(path.relative_to(_BUILDER_DIR).as_posix().encode('utf-8'))
+            digest.update(path.read_bytes())
+        _builder_fingerprint = digest.hexdigest()
+    return _builder_fingerprint
+
+
+def hash_inputs(*inputs: Any) -> str:
+    """Стабильный хэш JSON-совместимых данных (порядок ключей словарей не важен)"""
+    data = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class CSSBlockCache:
+    """Кэш частей CSS и собранных в них CSS-переменных"""
+
+    def __init__(self, cache_dir: Optional[Path], colors_config: Dict[str, Any],
+                 app_config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            cache_dir: Директория кэша (None - кэш выключен, блоки всегда генерируются)
+            colors_config: Библиотека цветов (входит в ключ каждого блока)
+            app_config: Настройки сборки из config.json
+        """
+        self.cache_dir = cache_dir
+        options = {name: (app_config or {}).get(name) for name in OUTPUT_OPTIONS}
+        self._salt = hash_inputs(CACHE_FORMAT_VERSION, get_builder_fingerprint(), colors_config, options)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None
+
+    def get_or_generate(self, name: str, inputs: Any,
+                        generate_fn: Callable[[], List[str]]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Возвращает части блока из кэша или генерирует их
+
+        Args:
+            name: Имя блока (имя файла кэша)
+            inputs: Части конфигов, от которых зависит блок
+            generate_fn: Функция генерации -> список частей CSS
+
+        Returns:
+            (части CSS, CSS-переменные блока) - как после collect_css_vars
+        """
+        if not self.enabled:
+            with collect_css_vars() as collected:
+                return generate_fn(), collected
+
+        key = hash_inputs(self._salt, name, inputs)
+        path = self._path(name)
+        entry = self._load(path, key)
+        if entry is not None:
+            self._count(hit=True)
+            return entry['parts'], entry['css_vars']
+
+        self._count(hit=False)
+        with collect_css_vars() as collected:
+            parts = generate_fn()
+        self._store(path, {'key': key, 'parts': parts, 'css_vars': collected})
+        return parts, collected
+
+    def _path(self, name: str) -> Path:
+        return self.cache_dir / (re.sub(r'[^\w.-]+', '_', name) + '.json')
+
+    @staticmethod
+    def _load(path: Path, key: str) -> Optional[Dict[str, Any]]:
+        """Читает запись кэша (None, если файла нет, он повреждён или ключ другой)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('key') != key:
+            return None
+        return entry
+
+    @staticmethod
+    def _store(path: Path, entry: Dict[str, Any]):
+        """Записывает запись кэша атомарно (ошибки записи не прерывают сборку)"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"   ⚠️  Не удалось записать кэш CSS {path.name}: {e}")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
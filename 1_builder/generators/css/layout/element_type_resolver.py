@@ -6,6 +6,8 @@
 
 from typing import Dict, Any, Optional, Tuple
 
+from utils.selector_utils import path_selector
+
 
 class ElementTypeResolver:
     """Определяет тип элемента из objects.json"""
@@ -197,40 +199,42 @@ class ElementTypeResolver:
         Returns:
             CSS селектор
         """
+        path = path_selector(element_key)
+        
         # Если это сложная структура, селектор уже установлен
         if is_complex_structure:
-            return f"[data-path='{element_key}']"
+            return path
         
         # Если тип найден в objects.json, используем его
         if element_type:
             if element_type == 'img':
-                return f"[data-path='{element_key}'] img"
+                return f"{path} img"
             elif element_type == 'nav':
-                return f"[data-path='{element_key}'] nav"
+                return f"{path} nav"
             elif element_type == 'icon':
-                return f"[data-path='{element_key}'] icon"
+                return f"{path} icon"
             elif element_type == 'field' or element_type == 'input':
-                return f"[data-path='{element_key}'] input"
+                return f"{path} input"
             elif element_type == 'text':
                 # Для text элементов с API используется span, без API - text
                 tag = 'span' if has_api else 'text'
-                return f"[data-path='{element_key}'] {tag}"
+                return f"{path} {tag}"
             elif element_type == 'a':
-                return f"[data-path='{element_key}'] a"
+                return f"{path} a"
             else:
                 # Неизвестный тип - используем fallback
-                return f"[data-path='{element_key}'] {element_type}"
+                return f"{path} {element_type}"
         
         # Fallback: определяем по имени элемента
         if '_img' in element_key:
-            return f"[data-path='{element_key}'] img"
+            return f"{path} img"
         elif element_key.endswith('_nav'):
-            return f"[data-path='{element_key}'] nav"
+            return f"{path} nav"
         elif element_key.endswith('_icon') or element_key.startswith('icon_'):
-            return f"[data-path='{element_key}'] icon"
+            return f"{path} icon"
         elif element_key.endswith('_order') or element_key.endswith('_field'):
-            return f"[data-path='{element_key}'] input"
+            return f"{path} input"
         else:
             # По умолчанию для текстовых элементов
-            return f"[data-path='{element_key}'] text"
+            return f"{path} text"
 
@@ -7,6 +7,7 @@
 from typing import Dict, Any, List, Callable, Optional, Tuple
 from generators.css.layout.element_type_resolver import ElementTypeResolver
 from generators.css.layout.responsive_generator import ResponsiveGenerator
+from utils.selector_utils import path_selector
 
 
 class ObjectsCSSProcessor:
@@ -285,7 +286,7 @@ class ObjectsCSSProcessor:
                 if base:
                     selector = f"{base} {nested_selectors}" if nested_selectors.strip() else base
                 else:
-                    selector = f"[data-path='{data_path_key}'] {nested_selectors}"
+                    selector = f"{path_selector(data_path_key)} {nested_selectors}"
                 selector = wrap_selector(selector)
                 
                 # Обрабатываем стили
@@ -6,6 +6,8 @@
 
 from typing import Dict, Any, Optional, Tuple
 
+from utils.selector_utils import path_selector
+
 
 class SelectorParser:
     """Парсит и преобразует селекторы из css.json в CSS селекторы"""
@@ -81,17 +83,17 @@ class SelectorParser:
                     if '.' in element_first:
                         element_name, *classes = element_first.split('.')
                         class_suffix = '.' + '.'.join(classes)
-                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_name}']{class_suffix}{tag_suffix}"
+                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_name)}{class_suffix}{tag_suffix}"
                     else:
-                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_first}']{tag_suffix}"
+                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_first)}{tag_suffix}"
                 elif '.' in element_clean:
                     # Формат "header_nav.opened"
                     element_name, *classes = element_clean.split('.')
                     class_suffix = '.' + '.'.join(classes)
-                    selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_name}']{class_suffix}"
+                    selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_name)}{class_suffix}"
                 else:
                     # Формат "header_nav"
-                    selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_clean}']"
+                    selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_clean)}"
                 
                 return selector, element_part
         
@@ -4,13 +4,16 @@
 Layout Generator - Координатор для генерации CSS layout стилей
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
-from processors.value_processor import process_css_value, resolve_reference
+from processors.value_processor import process_css_value, resolve_reference, replay_css_vars
 from generators.css.layout.selector_parser import SelectorParser
 from generators.css.layout.element_type_resolver import ElementTypeResolver
 from generators.css.layout.responsive_generator import ResponsiveGenerator
 from generators.css.layout.objects_css_processor import ObjectsCSSProcessor
+from utils.selector_utils import path_selector
+from utils.grid_layout_utils import (GRID_CLASS, compute_grid_placement, get_column_widths, get_grid_cells,
+                                     get_section_grid, is_grid_layout, is_stacked_column, stack_class)
 
 
 class LayoutGenerator:
@@ -18,7 +21,7 @@ class LayoutGenerator:
     
     def __init__(self, css_config, general_config, report_config, default_config,
                  objects_css, report_objects_css, structure_analyzer, process_dict_fn, process_props_fn, 
-                 process_props_important_fn, is_report_enabled_fn, sections_config=None,
+                 process_props_important_fn, sections_config=None,
                  objects_css_by_page=None):
         self.css_config = css_config
         self.general_config = general_config
@@ -31,8 +34,8 @@ class LayoutGenerator:
         self._process_dict_properties_with_important = process_dict_fn
         self._process_properties = process_props_fn
         self._process_properties_with_important = process_props_important_fn
-        self._is_report_enabled = is_report_enabled_fn
         self.sections_config = sections_config or {}  # objects.json для определения типов элементов
+        self.css_cache = None  # CSSBlockCache - кэш проходов objects_css (устанавливает CSSGenerator)
         
         # Инициализируем специализированные модули
         self.selector_parser = SelectorParser()
@@ -119,54 +122,8 @@ class LayoutGenerator:
     def _generate_layout_css(self) -> str:
         """Генерирует CSS из css.json"""
         css_parts = []
-        # Получаем devices: если report включен - из report_config, иначе из general_config
-        devices = {}
-        device_settings = {}  # Дополнительные настройки для каждого устройства
-        
-        # Определяем, откуда брать device настройки
-        config_to_use = None
-        if self._is_report_enabled() and self.report_config and 'layout' in self.report_config:
-            # Если report включен и есть device в report - используем его
-            config_to_use = self.report_config.get('layout', {})
-        elif self.general_config and 'layout' in self.general_config:
-            # Иначе используем general_config
-            config_to_use = self.general_config.get('layout', {})
-        
-        if config_to_use and 'device' in config_to_use:
-            device_config = config_to_use['device']
-            for device_name in ['desktop', 'tablet', 'mobile']:
-                if device_name in device_config:
-                    device_value = device_config[device_name]
-                    # Новый формат: {"width": "1200px", "flex-wrap": "wrap", ...}
-                    if isinstance(device_value, dict):
-                        if 'width' in device_value:
-                            devices[device_name] = device_value['width']
-                        # Сохраняем дополнительные настройки (flex-wrap, full-width-columns)
-                        device_settings[device_name] = {k: v for k, v in device_value.items() if k != 'width'}
-                    # Старый формат: ["1200","px"] или "1200px"
-                    elif isinstance(device_value, list) and len(device_value) >= 2:
-                        devices[device_name] = device_value[0] + device_value[1]
-                    elif isinstance(device_value, str):
-                        devices[device_name] = device_value
-        
-        # Если не нашли в general_config, пробуем default_config
-        if not devices:
-            wrapper = self.default_config.get('wrapper', {})
-            devices_config = self.default_config.get('devices', {})
-            if not devices_config and wrapper:
-                devices_config = {
-                'desktop': wrapper.get('desktop', ['1200px']),
-                'tablet': wrapper.get('tablet', ['768px']),
-                'mobile': wrapper.get('mobile', ['320px'])
-            }
-            if devices_config:
-                for device_name in ['desktop', 'tablet', 'mobile']:
-                    if device_name in devices_config:
-                        device_value = devices_config[device_name]
-                        if isinstance(device_value, list) and len(device_value) >= 2:
-                            devices[device_name] = device_value[0] + device_value[1]
-                        elif isinstance(device_value, str):
-                            devices[device_name] = device_value
+        # Получаем devices из general_config (брейкпоинты report - только для css/report.css)
+        devices, device_settings = self._get_devices()
         
         # Значения по умолчанию
         tablet_breakpoint = devices.get('tablet', '768px')
@@ -262,18 +219,18 @@ class LayoutGenerator:
                         if '.' in element_first:
                             element_name, *classes = element_first.split('.')
                             class_suffix = '.' + '.'.join(classes)
-                            selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_name}']{class_suffix}{tag_suffix}"
+                            selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_name)}{class_suffix}{tag_suffix}"
                         else:
-                            selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_first}']{tag_suffix}"
+                            selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_first)}{tag_suffix}"
                     elif '.' in element_clean:
                         # Формат "header_nav.opened"
                         element_name, *classes = element_clean.split('.')
                         class_suffix = '.' + '.'.join(classes)
-                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_name}']{class_suffix}"
+                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_name)}{class_suffix}"
                     else:
                         # Формат "header_nav" - стили для div.marking-item
                         # Если нужно стилизовать внутренний тег, используй явно "header_nav nav"
-                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} [data-path='{element_clean}']"
+                        selector = f".group.{section_name}-{col_num}-{row_num}-{gr_num} {path_selector(element_clean)}"
                     
                     # Обрабатываем значение
                     if isinstance(value, dict):
@@ -500,6 +457,17 @@ class LayoutGenerator:
             tablet_columns = section_config.get('tablet', [])
             mobile_columns = section_config.get('mobile', [])
             
+            section_column_config = {
+                'desktop': desktop_columns,
+                'tablet': tablet_columns,
+                'mobile': mobile_columns
+            }
+            if is_grid_layout():
+                # grid-движок: ширины и переносы колонок -> grid-template-columns и размещение ячеек
+                css_parts.append(self._generate_grid_css(section_name, section_column_config, devices, device_settings))
+                css_parts.append(self._generate_section_nested_css(section_name, section_config))
+                continue
+            
             # Применяем desktop ширины колонок (inline в HTML, но для полноты добавляем и в CSS)
             if desktop_columns:
                 for idx, width in enumerate(desktop_columns):
@@ -509,11 +477,6 @@ class LayoutGenerator:
                     css_parts.append("}\n")
             
             # Используем responsive_generator для генерации адаптивных стилей колонок
-            section_column_config = {
-                'desktop': desktop_columns,
-                'tablet': tablet_columns,
-                'mobile': mobile_columns
-            }
             self.responsive_gen.generate_column_responsive_css(
                 section_name, section_column_config, devices, device_settings, css_parts
             )
@@ -535,42 +498,36 @@ class LayoutGenerator:
         
         # Генерируем стили для objects_css (индивидуальные стили элементов)
         if self.objects_css:
-            # Используем ObjectsCSSProcessor для обработки objects_css
-            objects_processor = ObjectsCSSProcessor(
-                self.objects_css,
-                self.sections_config,
-                self.general_config,
-                self._process_property,
-                self._add_css_property,
-                self._normalize_array_value,
-                self._process_dict_properties_with_important,
-                tablet_breakpoint,
-                mobile_breakpoint
-            )
-            css_parts.append(objects_processor.generate_css())
+            css_parts.append(self._generate_objects_css(
+                'layout.objects_css', self.objects_css, tablet_breakpoint, mobile_breakpoint
+            ))
         
         # Стили инклудов по страницам — независимо, с body[data-page] для перекрытия design
         for page, page_objects_css in self.objects_css_by_page.items():
             if page_objects_css:
-                page_processor = ObjectsCSSProcessor(
-                    page_objects_css,
-                    self.sections_config,
-                    self.general_config,
-                    self._process_property,
-                    self._add_css_property,
-                    self._normalize_array_value,
-                    self._process_dict_properties_with_important,
-                    tablet_breakpoint,
-                    mobile_breakpoint
-                )
                 css_parts.append(f"\n/* ===== СТИЛИ ИНКЛУДОВ: страница {page} ===== */\n\n")
-                css_parts.append(page_processor.generate_css(page_prefix=page))
+                css_parts.append(self._generate_objects_css(
+                    f'layout.objects_css.{page}', page_objects_css, tablet_breakpoint, mobile_breakpoint,
+                    page_prefix=page
+                ))
         
-        # Генерируем стили для report_objects_css (отладочные стили элементов)
-        if self._is_report_enabled() and self.report_objects_css:
-            # Используем ObjectsCSSProcessor для обработки report_objects_css
-            report_objects_processor = ObjectsCSSProcessor(
-                self.report_objects_css,
+        return '\n'.join(css_parts)
+    
+    def _generate_objects_css(self, cache_name: str, objects_css: Dict[str, Any], tablet_breakpoint: str,
+                              mobile_breakpoint: str, page_prefix: str = None) -> str:
+        """
+        Один проход ObjectsCSSProcessor (берётся из кэша, если его входные данные не менялись)
+        
+        Args:
+            cache_name: Имя записи в кэше
+            objects_css: Стили элементов (objects_css.json или инклуды страницы)
+            tablet_breakpoint: Брейкпоинт для планшета
+            mobile_breakpoint: Брейкпоинт для мобильного
+            page_prefix: Страница для селекторов body[data-page='...']
+        """
+        def generate():
+            processor = ObjectsCSSProcessor(
+                objects_css,
                 self.sections_config,
                 self.general_config,
                 self._process_property,
@@ -580,11 +537,192 @@ class LayoutGenerator:
                 tablet_breakpoint,
                 mobile_breakpoint
             )
-            css_parts.append(report_objects_processor.generate_css())
+            return [processor.generate_css(page_prefix=page_prefix)]
         
-        return '\n'.join(css_parts)
+        if self.css_cache is None:
+            return generate()[0]
+        inputs = (objects_css, page_prefix, self.sections_config, self.general_config,
+                  tablet_breakpoint, mobile_breakpoint)
+        parts, collected = self.css_cache.get_or_generate(cache_name, inputs, generate)
+        # Переменные прохода регистрируются в реестре блока layout
+        return replay_css_vars(parts, collected)[0]
+    
+    def generate_report_objects_css(self) -> str:
+        """Отладочные стили элементов из default_report/objects_css.json (брейкпоинты report, если заданы)"""
+        if not self.report_objects_css:
+            return ''
+        devices, _ = self._get_devices(use_report=True)
+        # Используем ObjectsCSSProcessor для обработки report_objects_css
+        report_objects_processor = ObjectsCSSProcessor(
+            self.report_objects_css,
+            self.sections_config,
+            self.general_config,
+            self._process_property,
+            self._add_css_property,
+            self._normalize_array_value,
+            self._process_dict_properties_with_important,
+            devices.get('tablet', '768px'),
+            devices.get('mobile', '320px')
+        )
+        return report_objects_processor.generate_css()
+    
+    def _get_devices(self, use_report: bool = False) -> Tuple[Dict[str, str], Dict[str, Dict]]:
+        """
+        Брейкпоинты устройств и их дополнительные настройки
+        
+        Args:
+            use_report: Брать device из report_config (если там есть layout)
+            
+        Returns:
+            (devices {"tablet": "768px", ...}, device_settings {"tablet": {...}, ...})
+        """
+        devices = {}
+        device_settings = {}  # Дополнительные настройки для каждого устройства
+        
+        # Определяем, откуда брать device настройки
+        config_to_use = None
+        if use_report and self.report_config and 'layout' in self.report_config:
+            # Если report включен и есть device в report - используем его
+            config_to_use = self.report_config.get('layout', {})
+        elif self.general_config and 'layout' in self.general_config:
+            # Иначе используем general_config
+            config_to_use = self.general_config.get('layout', {})
+        
+        if config_to_use and 'device' in config_to_use:
+            device_config = config_to_use['device']
+            for device_name in ['desktop', 'tablet', 'mobile']:
+                if device_name in device_config:
+                    device_value = device_config[device_name]
+                    # Новый формат: {"width": "1200px", "flex-wrap": "wrap", ...}
+                    if isinstance(device_value, dict):
+                        if 'width' in device_value:
+                            devices[device_name] = device_value['width']
+                        # Сохраняем дополнительные настройки (flex-wrap, full-width-columns)
+                        device_settings[device_name] = {k: v for k, v in device_value.items() if k != 'width'}
+                    # Старый формат: ["1200","px"] или "1200px"
+                    elif isinstance(device_value, list) and len(device_value) >= 2:
+                        devices[device_name] = device_value[0] + device_value[1]
+                    elif isinstance(device_value, str):
+                        devices[device_name] = device_value
+        
+        # Если не нашли в general_config, пробуем default_config
+        if not devices:
+            wrapper = self.default_config.get('wrapper', {})
+            devices_config = self.default_config.get('devices', {})
+            if not devices_config and wrapper:
+                devices_config = {
+                'desktop': wrapper.get('desktop', ['1200px']),
+                'tablet': wrapper.get('tablet', ['768px']),
+                'mobile': wrapper.get('mobile', ['320px'])
+            }
+            if devices_config:
+                for device_name in ['desktop', 'tablet', 'mobile']:
+                    if device_name in devices_config:
+                        device_value = devices_config[device_name]
+                        if isinstance(device_value, list) and len(device_value) >= 2:
+                            devices[device_name] = device_value[0] + device_value[1]
+                        elif isinstance(device_value, str):
+                            devices[device_name] = device_value
+        
+        return devices, device_settings
     
 
+    def _get_section_html(self, section_name: str) -> Dict[str, Any]:
+        """Разметка секции из layout_html.json"""
+        if not self.structure_analyzer:
+            return {}
+        return self.structure_analyzer.html_config.get(section_name, {})
+    
+    def _generate_grid_css(self, section_name: str, section_column_config: Dict[str, List],
+                           devices: Dict[str, str], device_settings: Dict[str, Dict]) -> str:
+        """
+        CSS grid-разметки секции (config.json: "layout_engine": "grid")
+        
+        .column секции становится grid-контейнером, ячейки _cell-C-R размещаются явно
+        для каждого устройства. Переносы колонок повторяют flex-стили: [100] - перенос,
+        несколько колонок на 100% - без переноса, иначе flex-wrap из device.
+        Ячейки выравниваются по верху (align-items: start), как строки внутри col_N,
+        а строки одной колонки идут без зазора (row-gap: 0). Ячейка-стопка колонки из
+        нескольких строк (_cell-C) - flex-колонка, как col_N.
+        
+        Args:
+            section_name: Имя секции
+            section_column_config: Ширины колонок {'desktop': [...], 'tablet': [...], 'mobile': [...]}
+            devices: Брейкпоинты устройств
+            device_settings: Настройки устройств (gap, flex-wrap)
+            
+        Returns:
+            CSS строка
+        """
+        grid = get_section_grid(self._get_section_html(section_name))
+        if not grid:
+            return ''
+        
+        container = f".layout.section-{section_name} .column.{GRID_CLASS}"
+        css_parts = []
+        wrap = False  # .column по умолчанию без переноса (flex-wrap: nowrap)
+        # Медиа-запросы устройств вложены (tablet действует и на mobile) - выводим только отличия
+        prev_template, prev_areas = None, {}
+        for device in ('desktop', 'tablet', 'mobile'):
+            widths = section_column_config.get(device) or []
+            if device != 'desktop' and not widths:
+                continue
+            wrap = self._is_grid_wrapped(widths, device_settings.get(device, {}), wrap)
+            template, areas = compute_grid_placement(grid, get_column_widths(widths, len(grid)), wrap)
+            
+            if device == 'desktop':
+                indent = ''
+                css_parts.append(f"{container} {{")
+                css_parts.append("    display: grid !important;")
+                css_parts.append("    align-items: start !important;")
+                css_parts.append("    row-gap: 0px !important;")
+            else:
+                indent = '    '
+                css_parts.append(f"@media (max-width: {devices.get(device, '768px' if device == 'tablet' else '320px')}) {{")
+                # Как у flex-колонок: зазор устройства и без внутренних отступов
+                column_styles = []
+                if device_settings.get(device, {}).get('gap'):
+                    column_styles.append(f"gap: {device_settings[device]['gap']} !important;")
+                column_styles.append("padding: 0px !important;")
+                css_parts.append(f"    .layout.section-{section_name} .column {{")
+                for style in column_styles:
+                    css_parts.append(f"        {style}")
+                css_parts.append("    }")
+                if template != prev_template:
+                    css_parts.append(f"    {container} {{")
+            if template != prev_template:
+                css_parts.append(f"{indent}    grid-template-columns: {template} !important;")
+                css_parts.append(f"{indent}}}")
+            for cell, area in areas.items():
+                if prev_areas.get(cell) == area:
+                    continue
+                css_parts.append(f"{indent}.layout.section-{section_name} .{cell} {{")
+                css_parts.append(f"{indent}    grid-area: {area} !important;")
+                css_parts.append(f"{indent}}}")
+            css_parts.append("}\n\n" if indent else "\n")
+            prev_template, prev_areas = template, areas
+        
+        stacks = [stack_class(col_num) for col_num, _ in grid if is_stacked_column(grid, col_num)]
+        if stacks:
+            css_parts.append(', '.join(f".layout.section-{section_name} .{stack}" for stack in stacks) + " {")
+            css_parts.append("    display: flex !important;")
+            css_parts.append("    flex-direction: column !important;")
+            css_parts.append("    min-width: 0 !important;")
+            css_parts.append("}\n")
+        
+        return '\n'.join(css_parts)
+    
+    @staticmethod
+    def _is_grid_wrapped(widths: List, settings: Dict[str, Any], previous: bool) -> bool:
+        """Переносятся ли колонки на устройстве (та же логика, что flex-wrap в ResponsiveGenerator)"""
+        if len(widths) == 1 and widths[0] == 100:
+            return True
+        if len(widths) > 1 and sum(widths) == 100:
+            return False
+        if settings.get('flex-wrap'):
+            return settings['flex-wrap'] != 'nowrap'
+        return previous
+    
     def _generate_section_nested_css(self, section_name: str, section_config: Dict) -> str:
         """Генерирует CSS для вложенных элементов (column_X, row_X)"""
         css_parts = []
@@ -595,7 +733,13 @@ class LayoutGenerator:
             
             if isinstance(value, dict):
                 # Преобразуем column_1 -> .col_1, row_1 -> .row.row_1
-                if key.startswith('column_'):
+                if key.startswith('column_') and is_grid_layout():
+                    # В grid-разметке обёртки колонки нет - стили получают её ячейки (или стопка)
+                    cells = get_grid_cells(get_section_grid(self._get_section_html(section_name)), key.split('_')[1])
+                    if not cells:
+                        continue
+                    selector = ', '.join(f".layout.section-{section_name} .{cell}" for cell in cells)
+                elif key.startswith('column_'):
                     col_class = key.replace('column_', 'col_')
                     selector = f".layout.section-{section_name} .{col_class}"
                 else:
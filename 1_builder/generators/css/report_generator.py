@@ -7,19 +7,20 @@ Report Generator - ПОЛНАЯ версия из css_generator_FULL_OLD.py
 from typing import Dict, Any
 from pathlib import Path
 
+from utils.selector_utils import column_selector
+
 
 class ReportGenerator:
     """Генерирует отладочные CSS стили (ПОЛНАЯ ЛОГИКА из старой версии)"""
     
     def __init__(self, report_config, general_config, css_config, structure_analyzer,
-                 process_dict_fn, process_props_important_fn, is_report_enabled_fn):
+                 process_dict_fn, process_props_important_fn):
         self.report_config = report_config
         self.general_config = general_config
         self.css_config = css_config
         self.structure_analyzer = structure_analyzer
         self._process_dict_properties_with_important = process_dict_fn
         self._process_properties_with_important = process_props_important_fn
-        self._is_report_enabled = is_report_enabled_fn
     
     def generate(self) -> str:
         """Главный метод генерации"""
@@ -34,7 +35,7 @@ class ReportGenerator:
         # Получаем device_settings для использования gap и flex-wrap из device настроек
         device_settings = {}
         config_to_use = None
-        if self._is_report_enabled() and self.report_config and 'layout' in self.report_config:
+        if self.report_config and 'layout' in self.report_config:
             config_to_use = self.report_config.get('layout', {})
         elif self.general_config and 'layout' in self.general_config:
             config_to_use = self.general_config.get('layout', {})
@@ -360,12 +361,12 @@ class ReportGenerator:
         if 'col_in_row' in self.report_config:
             col_in_row_config = self.report_config['col_in_row']
             if isinstance(col_in_row_config, dict):
-                css_parts.append("[class^='col_'] {")
+                css_parts.append(f"{column_selector()} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_in_row_config, config_for_refs=merged_config))
                 css_parts.append("}\n\n")
             elif isinstance(col_in_row_config, list):
                 if col_in_row_config:
-                    css_parts.append("[class^='col_'] {")
+                    css_parts.append(f"{column_selector()} {{")
                     css_parts.append(self._process_properties_with_important(col_in_row_config))
                     css_parts.append("}\n\n")
         
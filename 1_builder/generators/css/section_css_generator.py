@@ -12,19 +12,13 @@ class SectionCSSGenerator:
     """Генерирует стили секций из general.json"""
     
     def __init__(self, general_config: Dict[str, Any],
-                 report_config: Dict[str, Any],
-                 is_report_enabled: Callable[[], bool],
                  process_css_value_func: Callable):
         """
         Args:
             general_config: Конфигурация из general.json
-            report_config: Конфигурация из report.json
-            is_report_enabled: Функция проверки включен ли report
             process_css_value_func: Функция для обработки CSS значений
         """
         self.general_config = general_config or {}
-        self.report_config = report_config or {}
-        self.is_report_enabled = is_report_enabled
         self.process_css_value = process_css_value_func
     
     def generate(self) -> str:
@@ -34,18 +28,8 @@ class SectionCSSGenerator:
         Returns:
             CSS строка со стилями секций
         """
-        # Применяем стили section из general.json, если:
-        # 1. Report выключен, ИЛИ
-        # 2. Report включен, но в report_config нет стилей для section
-        should_apply_section_styles = False
-        if 'section' in self.general_config:
-            if not self.is_report_enabled():
-                should_apply_section_styles = True
-            elif self.is_report_enabled() and (not self.report_config or 'section' not in self.report_config or 'bg-color' not in self.report_config.get('section', {})):
-                # Report включен, но стилей section в report нет - применяем из general
-                should_apply_section_styles = True
-        
-        if not should_apply_section_styles:
+        # Стили section из report.json выводятся отдельно - в css/report.css
+        if 'section' not in self.general_config:
             return ''
         
         section_config = self.general_config['section']
@@ -4,10 +4,13 @@
 CSSGenerator - Генерация CSS стилей
 """
 
-from typing import Dict, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from pathlib import Path
+from core.output_sink import OutputSink
+from file_ignore import find_file_without_asterisk
 from css.layout.default import get_default_css, get_component_css, get_alignment_css, get_modal_css, get_section_styles_css
-from generators.report_checker import is_report_enabled
 from processors.value_processor import process_css_value
 from utils.layout_structure_analyzer import LayoutStructureAnalyzer
 from generators.css.layout_generator import LayoutGenerator
@@ -16,16 +19,24 @@ from generators.css.base_generator import BaseGenerator
 from generators.css.conditional_css_generator import ConditionalCSSGenerator
 from generators.css.filter_css_generator import FilterCSSGenerator
 from generators.css.section_css_generator import SectionCSSGenerator
-from processors.value_processor import init_colors
+from generators.css.css_cache import CSSBlockCache
+from processors.value_processor import init_colors, init_css_vars, generate_root_css, merge_css_vars
+from utils.selector_utils import init_selector_mode, col_selector, any_path_selector, path_contains_selector
+from utils.grid_layout_utils import init_layout_engine
+
+
+# Потоков для параллельной генерации блоков CSS по умолчанию
+DEFAULT_CSS_WORKERS = min(8, os.cpu_count() or 1)
 
 
 class CSSGenerator:
     """Генерирует CSS из css.json, default.json, general.json, if.json, filter.json"""
     
-    def __init__(self, configs: Dict[str, Any]):
+    def __init__(self, configs: Dict[str, Any], cache_dir: Optional[Path] = None):
         """
         Args:
             configs: Словарь с конфигами (css, default, general, if, filter, report, config, html)
+            cache_dir: Директория дискового кэша блоков (None - без кэша; config.json: "css_cache": false отключает)
         """
         self.css_config = configs['css']
         self.default_config = configs['default']
@@ -48,6 +59,18 @@ class CSSGenerator:
         # Инициализируем библиотеку цветов
         init_colors(self.colors_config)
         
+        # Режим селекторов (атрибутные/классовые), config.json: "class_selectors"
+        init_selector_mode(self.app_config, self.div_column_config)
+        # Движок разметки секций (flex/grid), config.json: "layout_engine"
+        init_layout_engine(self.app_config)
+        
+        # Дисковый кэш блоков CSS
+        self.css_cache = CSSBlockCache(
+            cache_dir if self.app_config.get('css_cache', True) else None,
+            self.colors_config,
+            self.app_config
+        )
+        
         # Инициализируем анализатор структуры разметки
         self.structure_analyzer = LayoutStructureAnalyzer(self.html_config) if self.html_config else None
         
@@ -70,19 +93,19 @@ class CSSGenerator:
             self._process_dict_properties_with_important,
             self._process_properties,
             self._process_properties_with_important,
-            self._is_report_enabled,
             self.sections_config,  # objects.json для определения типов элементов
             self.objects_css_by_page
         )
+        self.layout_generator.css_cache = self.css_cache  # Кэш проходов objects_css
         
+        # Генератор отладочных стилей работает только для report.css - device берёт из report
         self.report_generator = ReportGenerator(
             self.report_config,
             self.general_config,
             self.css_config,
             self.structure_analyzer,
             self._process_dict_properties_with_important,
-            self._process_properties_with_important,
-            self._is_report_enabled
+            self._process_properties_with_important
         )
         
         # Инициализируем новые генераторы
@@ -100,8 +123,6 @@ class CSSGenerator:
         
         self.section_generator = SectionCSSGenerator(
             self.general_config,
-            self.report_config,
-            self._is_report_enabled,
             process_css_value
         )
     
@@ -117,44 +138,145 @@ class CSSGenerator:
         """
         self.source_dir = source_dir
         
+        # Режим CSS-переменных: цвета собираются во время генерации и выводятся в :root
+        init_css_vars(self.app_config.get('css_vars', False))
+        
         css_parts = ["/* CSS стили для diskokras - сгенерировано автоматически */\n"]
         
-        # Базовые стили из default.json 
-        # Если report включен - используем report_config для device, иначе general_config
-        config_for_default = self.general_config
-        if self._is_report_enabled() and self.report_config and 'layout' in self.report_config:
-            config_for_default = self.report_config
-        css_parts.append(get_default_css(source_dir, config_for_default))
-        css_parts.append("\n")
+        # Блоки только читают конфиги - берём из кэша или генерируем параллельно, собираем в исходном порядке
+        for block_parts in self._run_blocks(self._get_css_blocks(source_dir)):
+            css_parts.extend(block_parts)
         
-        # Стили компонентов из default.json
-        css_parts.append(get_component_css(source_dir))
-        css_parts.append("\n")
+        # Блок :root с переменными цветов (после генерации: известны все использованные цвета)
+        root_css = generate_root_css()
+        if root_css:
+            css_parts.insert(1, "/* ===== ПЕРЕМЕННЫЕ ЦВЕТОВ (css_vars) ===== */\n\n" + root_css)
         
-        # Стили выравнивания из default.json
-        css_parts.append(get_alignment_css(source_dir))
-        css_parts.append("\n")
+        return '\n'.join(css_parts)
+    
+    def _get_css_blocks(self, source_dir: Path = None) -> List[Tuple[str, Any, Callable[[], List[str]]]]:
+        """
+        Список блоков CSS в порядке вывода (порядок важен для каскада)
         
-        # Стили модальных окон из default.json
-        css_parts.append(get_modal_css(source_dir))
-        css_parts.append("\n")
+        Returns:
+            [(имя блока, входные данные для ключа кэша, функция -> список частей CSS), ...]
+        """
+        default_json = self._read_default_json(source_dir)
+        devices_inputs = (self.general_config, self.default_config)
+        return [
+            # Базовые стили из default.json
+            ('default', (default_json, self.general_config),
+             lambda: [get_default_css(source_dir, self.general_config), "\n"]),
+            # Стили компонентов из default.json
+            ('component', default_json, lambda: [get_component_css(source_dir), "\n"]),
+            # Стили выравнивания из default.json
+            ('alignment', default_json, lambda: [get_alignment_css(source_dir), "\n"]),
+            # Стили модальных окон из default.json
+            ('modal', default_json, lambda: [get_modal_css(source_dir), "\n"]),
+            # Глобальные стили из general.json
+            ('general', (self.general_config, self.tag_config), lambda: self._block_parts(
+                "/* ===== ГЛОБАЛЬНЫЕ СТИЛИ (general) ===== */\n\n",
+                self.base_generator.generate(), always=True) if self.general_config else []),
+            # Стили из report.json выводятся отдельно в css/report.css (generate_report)
+            # Составные селекторы из css.json
+            ('compound', (self.css_config, self.general_config), self._generate_compound_selectors_parts),
+            # Layout стили из css.json
+            ('layout', (self.css_config, devices_inputs, self.objects_css, self.objects_css_by_page,
+                        self.sections_config, self.html_config), lambda: self._block_parts(
+                "/* ===== LAYOUT СТИЛИ ===== */\n\n", self.layout_generator.generate(), always=True)),
+            # Стили для section из general.json (после layout, чтобы перекрыть их)
+            ('section', self.general_config, lambda: self._block_parts(
+                "/* ===== СТИЛИ СЕКЦИЙ ИЗ GENERAL.JSON (перекрывают layout) ===== */\n\n",
+                self.section_generator.generate())),
+            # Стили для section из default.json (после layout, чтобы перекрыть их)
+            ('section_default', (default_json, self.general_config), lambda: self._block_parts(
+                "/* ===== СТИЛИ СЕКЦИЙ ИЗ DEFAULT.JSON ===== */\n\n",
+                get_section_styles_css(source_dir, self.general_config))),
+            # Стили из if.json
+            ('if', self.if_config, lambda: self._block_parts(
+                "/* ===== УСЛОВНЫЕ СТИЛИ (if) ===== */\n\n", self.conditional_generator.generate())),
+            # Стили из filter.json
+            ('filter', (self.filter_config, self.default_config), lambda: self._block_parts(
+                "/* ===== ФИЛЬТРОВАННЫЕ СТИЛИ (filter) ===== */\n\n", self.filter_generator.generate())),
+            # Стили для колонок из div_column.json
+            ('div_column', (self.div_column_config, devices_inputs), lambda: self._block_parts(
+                "/* ===== СТИЛИ ДЛЯ КОЛОНОК (div_column) ===== */\n\n", self._generate_div_column_css())),
+            # Стили для col: синтаксиса из objects.json
+            ('col_syntax', (self.sections_config, self.div_column_config, devices_inputs), lambda: self._block_parts(
+                "/* ===== СТИЛИ ДЛЯ COL: СИНТАКСИСА ===== */\n\n", self._generate_col_syntax_css())),
+        ]
+    
+    @staticmethod
+    def _read_default_json(source_dir: Path = None) -> Optional[str]:
+        """Текст default.json (входные данные блоков default/component/alignment/modal/section_default)"""
+        if source_dir is None:
+            # Тот же путь по умолчанию, что и в css/layout/default.py
+            source_dir = Path(__file__).resolve().parent.parent.parent / '2_source'
+        default_json_path = find_file_without_asterisk(source_dir / 'css', 'default', '.json')
+        if not default_json_path.exists():
+            return None
+        return default_json_path.read_text(encoding='utf-8')
+    
+    def generate_report(self) -> str:
+        """
+        Генерирует отладочные стили (report.json + default_report/objects_css.json) для css/report.css
         
-        # Глобальные стили из general.json
-        if self.general_config:
-            css_parts.append("/* ===== ГЛОБАЛЬНЫЕ СТИЛИ (general) ===== */\n\n")
-            css_parts.append(self.base_generator.generate())
-            css_parts.append("\n")
+        Файл подключается перед style.css, поэтому, как и раньше, стили layout перекрывают
+        базовые отладочные стили. CSS-переменные здесь не используются: report разрешает
+        те же ссылки через свой конфиг, и одноимённые переменные перекрыли бы :root из style.css.
         
-        # Стили из report.json (если включено в config.json и файл существует)
-        # ВАЖНО: генерируем ДО layout, чтобы медиа-запросы из layout перекрывали базовые стили
-        if self._is_report_enabled() and self.report_config:
+        Returns:
+            CSS код (пустая строка, если отладочных стилей нет)
+        """
+        if not self.report_config and not self.report_objects_css:
+            return ''
+        
+        init_css_vars(False)
+        css_parts = ["/* Отладочные стили diskokras (report) - сгенерировано автоматически */\n"]
+        if self.report_config:
             css_parts.append("/* ===== ОТЛАДОЧНЫЕ СТИЛИ (report) ===== */\n\n")
             css_parts.append(self.report_generator.generate())
             css_parts.append("\n")
+        report_objects_css = self.layout_generator.generate_report_objects_css()
+        if report_objects_css:
+            css_parts.append("/* ===== ОТЛАДОЧНЫЕ СТИЛИ ЭЛЕМЕНТОВ (report objects_css) ===== */\n\n")
+            css_parts.append(report_objects_css)
+            css_parts.append("\n")
+        return '\n'.join(css_parts)
+    
+    @staticmethod
+    def _block_parts(header: str, content: str, always: bool = False) -> List[str]:
+        """Части блока: заголовок, содержимое, разделитель (пустой блок пропускается)"""
+        if not content and not always:
+            return []
+        return [header, content, "\n"]
+    
+    def _run_blocks(self, blocks: List[Tuple[str, Any, Callable[[], List[str]]]]) -> List[List[str]]:
+        """
+        Выполняет блоки в пуле потоков (config.json: "css_workers", 1 - последовательно)
         
-        # Обрабатываем составные селекторы из css.json (например, "header.nav", "turn.nav", "turn.column_3.row_1.group_1")
-        # ВАЖНО: генерируем ПОСЛЕ report, чтобы специфичные селекторы перекрывали базовые стили из report
-        css_parts.append("/* ===== СОСТАВНЫЕ СЕЛЕКТОРЫ ИЗ CSS.JSON ===== */\n\n")
+        Блоки с неизменными входными данными берутся из дискового кэша.
+        
+        Returns:
+            Части CSS каждого блока в исходном порядке
+        """
+        def run(name, inputs, block_fn):
+            # CSS-переменные блока собираются отдельно, чтобы имена не зависели от порядка потоков
+            return self.css_cache.get_or_generate(name, inputs, block_fn)
+        
+        workers = int(self.app_config.get('css_workers', DEFAULT_CSS_WORKERS))
+        if workers <= 1:
+            results = [run(*block) for block in blocks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='css') as executor:
+                futures = [executor.submit(run, *block) for block in blocks]
+                results = [future.result() for future in futures]
+        
+        return [merge_css_vars(parts, collected) for parts, collected in results]
+    
+    def _generate_compound_selectors_parts(self) -> List[str]:
+        """Составные селекторы из css.json (например, "header.nav", "turn.nav", "turn.column_3.row_1.group_1")"""
+        css_parts = ["/* ===== СОСТАВНЫЕ СЕЛЕКТОРЫ ИЗ CSS.JSON ===== */\n\n"]
         for key, value in self.css_config.items():
             # Пропускаем ключи с пробелами (они обрабатываются в layout_generator.py)
             if ' ' in key:
@@ -217,55 +339,7 @@ class CSSGenerator:
                         css_parts.append(self._process_properties_with_important(value))
                         css_parts.append("}\n\n")
         css_parts.append("\n")
-        
-        # Layout стили из css.json
-        css_parts.append("/* ===== LAYOUT СТИЛИ ===== */\n\n")
-        css_parts.append(self.layout_generator.generate())
-        css_parts.append("\n")
-        
-        # Стили для section из general.json (после layout, чтобы перекрыть их)
-        section_styles = self.section_generator.generate()
-        if section_styles:
-            css_parts.append("/* ===== СТИЛИ СЕКЦИЙ ИЗ GENERAL.JSON (перекрывают layout) ===== */\n\n")
-            css_parts.append(section_styles)
-            css_parts.append("\n")
-        
-        # Стили для section из default.json (после layout, чтобы перекрыть их)
-        section_styles = get_section_styles_css(source_dir, self.general_config)
-        if section_styles:
-            css_parts.append("/* ===== СТИЛИ СЕКЦИЙ ИЗ DEFAULT.JSON ===== */\n\n")
-            css_parts.append(section_styles)
-            css_parts.append("\n")
-        
-        # Стили из if.json
-        if_css = self.conditional_generator.generate()
-        if if_css:
-            css_parts.append("/* ===== УСЛОВНЫЕ СТИЛИ (if) ===== */\n\n")
-            css_parts.append(if_css)
-            css_parts.append("\n")
-        
-        # Стили из filter.json
-        filter_css = self.filter_generator.generate()
-        if filter_css:
-            css_parts.append("/* ===== ФИЛЬТРОВАННЫЕ СТИЛИ (filter) ===== */\n\n")
-            css_parts.append(filter_css)
-            css_parts.append("\n")
-        
-        # Стили для колонок из div_column.json
-        div_column_css = self._generate_div_column_css()
-        if div_column_css:
-            css_parts.append("/* ===== СТИЛИ ДЛЯ КОЛОНОК (div_column) ===== */\n\n")
-            css_parts.append(div_column_css)
-            css_parts.append("\n")
-        
-        # Стили для col: синтаксиса из objects.json
-        col_syntax_css = self._generate_col_syntax_css()
-        if col_syntax_css:
-            css_parts.append("/* ===== СТИЛИ ДЛЯ COL: СИНТАКСИСА ===== */\n\n")
-            css_parts.append(col_syntax_css)
-            css_parts.append("\n")
-        
-        return '\n'.join(css_parts)
+        return css_parts
     
     def _process_dict_properties_with_important(self, properties: dict, indent: str = "    ", current_section: str = None, config_for_refs: dict = None) -> str:
         """Обрабатывает словарь CSS свойств с добавлением !important
@@ -400,8 +474,8 @@ class CSSGenerator:
         for col_key, col_styles in desktop_config.items():
             if col_key.startswith('col-'):
                 # Генерируем селектор для классов с суффиксом _col-N
-                # Например, col-2 → [class*='_col-2']
-                selector = f"[class*='_{col_key}']"
+                # Например, col-2 → [class*='_col-2'] (в классовом режиме ._cols-2)
+                selector = col_selector(col_key)
                 css_parts.append(f"{selector} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_styles))
                 css_parts.append("}\n")
@@ -409,26 +483,26 @@ class CSSGenerator:
                 # Добавляем более специфичный селектор для перекрытия правил типа [data-path='main_btn'] div.gr7
                 # [data-path] div[class*='_col-2'] имеет такую же специфичность (0,2,1) как [data-path] div.gr7
                 # и идет позже в CSS, поэтому перекрывает его
-                specific_selector = f"[data-path] div[class*='_{col_key}']"
+                specific_selector = f"{any_path_selector()} div{selector}"
                 css_parts.append(f"{specific_selector} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_styles))
                 css_parts.append("}\n")
                 
-                # Также применяем grid к div[data-template] внутри элементов с _col-N
-                # Это нужно для cycle, который генерирует элементы внутри data-template
-                template_selector = f"{selector} > div[data-template]"
+                # Также применяем grid к div[data-template-id] внутри элементов с _col-N
+                # Это нужно для cycle, который генерирует элементы внутри контейнера шаблона
+                template_selector = f"{selector} > div[data-template-id]"
                 css_parts.append(f"{template_selector} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_styles))
                 css_parts.append("}\n")
                 
-                # Добавляем селектор для div[data-template] который САМ имеет класс _col-N
-                # Это нужно для cycle_col-N, который создает div[data-template] с классом _col-N
-                template_with_class = f"div[data-template][class*='_{col_key}']"
+                # Добавляем селектор для div[data-template-id] который САМ имеет класс _col-N
+                # Это нужно для cycle_col-N, который создает div[data-template-id] с классом _col-N
+                template_with_class = f"div[data-template-id]{selector}"
                 css_parts.append(f"{template_with_class} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_styles))
                 css_parts.append("}\n")
                 
-                # Добавляем стили для дочерних элементов div[data-template] с классом _col-N
+                # Добавляем стили для дочерних элементов div[data-template-id] с классом _col-N
                 # чтобы они правильно размещались в grid колонках
                 child_selector_template = f"{template_with_class} > div"
                 css_parts.append(f"{child_selector_template} {{")
@@ -439,13 +513,13 @@ class CSSGenerator:
                 css_parts.append("}\n")
                 
                 # Добавляем еще более специфичный селектор для гарантированного применения
-                # div[class*='_col-2'] > div[data-template] с явным указанием display: grid
-                very_specific = f"div{selector} > div[data-template]"
+                # div[class*='_col-2'] > div[data-template-id] с явным указанием display: grid
+                very_specific = f"div{selector} > div[data-template-id]"
                 css_parts.append(f"{very_specific} {{")
                 css_parts.append(self._process_dict_properties_with_important(col_styles))
                 css_parts.append("}\n")
                 
-                # Добавляем стили для дочерних элементов внутри div[data-template]
+                # Добавляем стили для дочерних элементов внутри div[data-template-id]
                 # чтобы они правильно размещались в grid колонках
                 # Важно: НЕ добавляем width, чтобы grid сам управлял размерами
                 child_selector = f"{template_selector} > div"
@@ -465,7 +539,7 @@ class CSSGenerator:
             css_parts.append(f"@media (max-width: {tablet_breakpoint}) and (min-width: {mobile_breakpoint_num + 1}px) {{")
             for selector_key, selector_styles in tablet_config.items():
                 # Селектор может быть "col-2, col-3" или просто "col-2"
-                selectors = [f"[class*='_{s.strip()}']" for s in selector_key.split(',')]
+                selectors = [col_selector(s.strip()) for s in selector_key.split(',')]
                 selector = ', '.join(selectors)
                 css_parts.append(f"    {selector} {{")
                 css_parts.append(self._process_dict_properties_with_important(selector_styles, indent="        "))
@@ -478,7 +552,7 @@ class CSSGenerator:
             css_parts.append(f"@media (max-width: {mobile_breakpoint}) {{")
             for selector_key, selector_styles in mobile_config.items():
                 # Селектор может быть "col-2, col-3" или просто "col-2"
-                selectors = [f"[class*='_{s.strip()}']" for s in selector_key.split(',')]
+                selectors = [col_selector(s.strip()) for s in selector_key.split(',')]
                 selector = ', '.join(selectors)
                 css_parts.append(f"    {selector} {{")
                 css_parts.append(self._process_dict_properties_with_important(selector_styles, indent="        "))
@@ -551,9 +625,9 @@ class CSSGenerator:
                     
                     if class_name:
                         # Для элементов с классом используем более специфичный селектор
-                        selector = f"[data-path*='{last_part}'] {tag_name}.{class_name}"
+                        selector = f"{path_contains_selector(last_part)} {tag_name}.{class_name}"
                     else:
-                        selector = f"[data-path*='{last_part}'] {tag_name}"
+                        selector = f"{path_contains_selector(last_part)} {tag_name}"
                     
                     # Если есть col: синтаксис, сохраняем информацию
                     if col_info:
@@ -729,38 +803,14 @@ class CSSGenerator:
                             devices[device_name] = device_value
         return devices
     
-    def _is_report_enabled(self) -> bool:
-        """
-        Проверяет, включен ли репорт.
-        Использует report_checker для проверки переключателя REPORT_ENABLED
-        """
-        return is_report_enabled()
-    
-    def save(self, css_content: str, css_file: Path) -> None:
+    def save(self, css_content: str, sink: OutputSink, css_file: str = 'css/style.css') -> None:
         """
         Сохраняет CSS в файл
         
         Args:
             css_content: Содержимое CSS
-            css_file: Путь к файлу CSS
+            sink: Результат сборки
+            css_file: Путь к файлу CSS в результате
         """
-        # Убеждаемся, что директория существует
-        css_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Удаляем старый файл (если существует)
-        if css_file.exists():
-            css_file.unlink()
-        
-        # Записываем новое содержимое через open() для гарантии полной записи
-        with open(css_file, 'w', encoding='utf-8') as f:
-            f.write(css_content)
-        
-        # Проверяем, что файл записан правильно
-        if not css_file.exists():
-            raise IOError(f"Файл не был создан: {css_file}")
-        
-        # Финальная проверка содержимого
-        saved_content = css_file.read_text(encoding='utf-8')
-        if saved_content != css_content:
-            raise IOError(f"Файл не записан правильно! Размеры: ожидалось {len(css_content)}, записано {len(saved_content)}")
+        sink.write_text(css_file, css_content)
 
@@ -5,9 +5,9 @@
 Создаёт только form_*_db_paths.json для форм с кнопкой button_json.
 """
 
-from pathlib import Path
 from typing import Dict, Any
 
+from core.output_sink import OutputSink
 from utils.form_structure_extractor import forms_with_button_json
 
 
@@ -22,26 +22,23 @@ class FormJsonGenerator:
         self.configs = configs
         self.sections = configs.get('sections', {})
 
-    def generate(self, output_dir: Path) -> Dict[str, Path]:
+    def generate(self, sink: OutputSink) -> Dict[str, str]:
         """
-        Для форм с кнопкой button_json создаёт пустой JSON (описание путей в БД) в output_dir.
+        Для форм с кнопкой button_json создаёт пустой JSON (описание путей в БД) в send_form_json/.
 
         Args:
-            output_dir: Директория результата (3_result).
+            sink: Результат сборки.
 
         Returns:
-            Словарь { form_class_db_paths: путь_к_файлу }.
+            Словарь { form_class_db_paths: путь_к_файлу в результате }.
         """
-        output_dir = Path(output_dir)
-        send_form_dir = output_dir / 'send_form_json'
-        send_form_dir.mkdir(parents=True, exist_ok=True)
+        send_form_dir = 'send_form_json'
+        sink.make_dir(send_form_dir)
         written = {}
 
         # Для форм с кнопкой button_json создаём пустой JSON — описание будущих путей в БД
         for form_class in forms_with_button_json(self.sections):
             db_paths_filename = f"form_{form_class}_db_paths.json"
-            db_paths_path = send_form_dir / db_paths_filename
-            db_paths_path.write_text("{}", encoding='utf-8')
-            written[f"{form_class}_db_paths"] = db_paths_path
+            written[f"{form_class}_db_paths"] = sink.write_text(f"{send_form_dir}/{db_paths_filename}", "{}")
 
         return written
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сборка JS по страницам (config.json: "js_bundle": true или {"minify": false})
+
+Без режима все 2_source/js/*.js склеиваются в js/script.js, и каждая страница
+загружает его целиком. С режимом модули делятся на части (chunks):
+- core - модули, которые нужны каждой странице, и таблицы сборки
+  (window.CLASS_MAP, window.IMAGE_MAP);
+- по одной части на остальные модули; страница подключает модуль, только если
+  в её HTML (вместе с фрагментами модалок) есть его маркеры (JS_FEATURES).
+
+Имена частей содержат хэш содержимого (js/core.1a2b3c4d.js), поэтому ?v= не нужен,
+а файлы можно кэшировать навсегда. Части сжимаются (utils.js_utils.minify_js).
+Целый js/script.js в этом режиме не сохраняется: его не подключает ни одна страница.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.output_sink import OutputSink
+from utils.css_parser import HTMLTokenIndex
+from utils.js_utils import minify_js
+
+
+CORE_CHUNK_NAME = 'core'
+
+# Маркеры модулей: модуль нужен странице, если срабатывает хотя бы один селектор.
+# Модули без записи нужны всегда. При добавлении в js/ нового модуля или новой точки
+# входа (querySelector/closest верхнего уровня) маркеры нужно дописать сюда.
+JS_FEATURES = {
+    'api_loader.js': ("[data-source='api']",),
+    'form_button_json.js': ('[data-button-json]',),
+    'functions.js': ('[data-template-id]', '[data-function-sum]', '[data-function-result]',
+                     '.btn_details', '.search-client-wrap'),
+    'modal_1.js': ('[data-modal]',),
+    'page_nav.js': ('[data-page-fragments]',),
+}
+
+_SCRIPT_TAG_RE = re.compile(r'<script src="\.\./js/script\.js(?:\?v=[^"]*)?"></script>')
+
+
+def get_js_bundle_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, bool]]:
+    """
+    Читает настройки сборки JS из config.json
+
+    Returns:
+        {'minify': bool} или None если режим выключен
+    """
+    value = (app_config or {}).get('js_bundle')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {'minify': bool(settings.get('minify', True))}
+
+
+class JSBundler:
+    """Делит модули js/ на части и подключает их к страницам"""
+
+    def __init__(self, source_js_dir: Path, minify: bool = True):
+        """
+        Args:
+            source_js_dir: 2_source/js
+            minify: Сжимать ли части
+        """
+        self.minify = minify
+        # Модули в порядке склейки script.js
+        self.modules: Dict[str, str] = {
+            js_file.name: js_file.read_text(encoding='utf-8')
+            for js_file in sorted(Path(source_js_dir).glob('*.js')) if js_file.is_file()
+        }
+
+    def page_modules(self, html: str) -> List[str]:
+        """
+        Модули, которые нужны HTML страницы
+
+        Args:
+            html: HTML страницы вместе с фрагментами модалок
+        """
+        index = HTMLTokenIndex(html)
+        return [
+            name for name in self.modules
+            if name not in JS_FEATURES or any(index.matches_selector(s) for s in JS_FEATURES[name])
+        ]
+
+    def build(self, pages_html: Dict[str, str], sink: OutputSink, output_js_dir: str = 'js',
+              prelude: str = '') -> Dict[str, List[str]]:
+        """
+        Сохраняет части и определяет, какие из них подключает каждая страница
+
+        Args:
+            pages_html: {страница: HTML вместе с фрагментами модалок}
+            sink: Результат сборки
+            output_js_dir: Директория частей в результате
+            prelude: Код в начало core (таблицы сборки)
+
+        Returns:
+            {страница: [имена файлов частей в порядке подключения]}
+        """
+        needs = {page: self.page_modules(html) for page, html in pages_html.items()}
+        core = [name for name in self.modules if all(name in modules for modules in needs.values())]
+
+        chunk_files = {CORE_CHUNK_NAME: self._save_chunk(
+            CORE_CHUNK_NAME, prelude + ''.join(self._module_code(name) for name in core), sink, output_js_dir)}
+        result = {}
+        for page, modules in needs.items():
+            files = [chunk_files[CORE_CHUNK_NAME]]
+            for name in modules:
+                if name in core:
+                    continue
+                if name not in chunk_files:
+                    chunk_files[name] = self._save_chunk(Path(name).stem.strip(), self._module_code(name),
+                                                         sink, output_js_dir)
+                files.append(chunk_files[name])
+            result[page] = files
+        return result
+
+    def _module_code(self, name: str) -> str:
+        code = self.modules[name]
+        if self.minify:
+            return minify_js(code)
+        return f"// {name}\n{code}\n\n"
+
+    def _save_chunk(self, chunk_name: str, code: str, sink: OutputSink, output_js_dir: str) -> str:
+        digest = hashlib.sha256(code.encode('utf-8')).hexdigest()[:8]
+        file_name = f"{chunk_name}.{digest}.js"
+        sink.write_text(f"{output_js_dir}/{file_name}", code)
+        return file_name
+
+    @staticmethod
+    def rewrite_page(html: str, chunk_files: List[str], prefetch_files: Iterable[str] = ()) -> str:
+        """
+        Заменяет подключение script.js подключением частей
+
+        Args:
+            html: HTML страницы
+            chunk_files: Части страницы в порядке подключения
+            prefetch_files: Части страниц из ссылок (resource_hints) - <link rel="prefetch"> в <head>
+        """
+        tags = ''.join(f'<script src="../js/{file_name}"></script>' for file_name in chunk_files)
+        html = _SCRIPT_TAG_RE.sub(lambda m: tags, html, count=1)
+        links = ''.join(f'<link rel="prefetch" href="../js/{file_name}">'
+                        for file_name in prefetch_files if file_name not in chunk_files)
+        if links:
+            html = html.replace('</head>', links + '</head>', 1)
+        return html
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Фрагменты страниц для переходов без перезагрузки (config.json: "page_fragments": true)
+
+Рядом с каждой страницей сохраняется pages/<страница>.json:
+
+    {"page": "shino", "title": "...",
+     "sections": [{"id": "header", "hash": "1a2b3c4d", "shared": true},
+                  {"id": "main", "hash": "5e6f7a8b", "html": "<section ...>...</section>"}],
+     "blocks": [{"hash": "...", "shared": true}, ...],
+     "scripts": ["../js/script.js?v=..."]}
+
+- sections - секции body в порядке страницы;
+- blocks - встроенные скрипты данных после секций (bd_local, button_json, реестр
+  шаблонов, if.json) и скрытый спрайт иконок;
+- scripts - подключаемые JS страницы.
+
+Секции и блоки страниц получают data-fragment-hash (хэш содержимого). js/page_nav.js
+перехватывает переходы по ссылкам на страницы сборки: элементы с тем же хэшем
+остаются на месте, остальные заменяются из фрагмента. Элемент, одинаковый на всех
+страницах, где он есть (шапка, меню, наборы данных), помечается "shared" и хранится
+без html - он уже есть на экране. Если его нет или странице нужен JS, которого нет
+на текущей, выполняется обычный переход.
+
+Фрагменты строятся по готовым страницам - после production, сжатия классов, сборки JS
+и версий ресурсов.
+"""
+
+import html as html_lib
+import json
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.output_sink import OutputSink
+from utils.asset_utils import content_hash
+
+
+PAGE_FRAGMENTS_ATTR = 'data-page-fragments'
+FRAGMENT_HASH_ATTR = 'data-fragment-hash'
+
+# Верхний уровень body: секции (с вложенными секциями), скрипты и спрайт иконок
+_BODY_TOKEN_RE = re.compile(
+    r'<section\b[^>]*>|</section\s*>|<script\b[^>]*>.*?</script\s*>|<svg\b[^>]*>.*?</svg\s*>',
+    re.DOTALL | re.IGNORECASE)
+_BODY_RE = re.compile(r'<body\b[^>]*>(.*)</body\s*>', re.DOTALL | re.IGNORECASE)
+_TITLE_RE = re.compile(r'<title>(.*?)</title>', re.DOTALL | re.IGNORECASE)
+_ID_RE = re.compile(r'\sid="([^"]*)"')
+_SRC_RE = re.compile(r'\ssrc="([^"]*)"')
+
+
+def is_page_fragments_enabled(app_config: Optional[Dict[str, Any]]) -> bool:
+    """Включены ли фрагменты страниц в config.json"""
+    return bool((app_config or {}).get('page_fragments'))
+
+
+def split_body(page_html: str) -> List[Dict[str, Any]]:
+    """
+    Элементы верхнего уровня body
+
+    Returns:
+        [{'kind': 'section' | 'block' | 'script', 'key': ..., 'start': ..., 'end': ...}] -
+        позиции в page_html; key - id секции, открывающий тег блока или src скрипта
+    """
+    body = _BODY_RE.search(page_html)
+    if not body:
+        return []
+    items = []
+    depth = 0
+    section_start = 0
+    for match in _BODY_TOKEN_RE.finditer(page_html, body.start(1), body.end(1)):
+        token = match.group(0)
+        if token[:8].lower() == '<section':
+            if depth == 0:
+                section_start = match.start()
+            depth += 1
+        elif token[:9].lower() == '</section':
+            depth -= 1
+            if depth == 0:
+                id_match = _ID_RE.search(page_html[section_start:match.end()].split('>', 1)[0])
+                items.append({'kind': 'section', 'key': id_match.group(1) if id_match else '',
+                              'start': section_start, 'end': match.end()})
+        elif depth == 0:
+            open_tag = token.split('>', 1)[0] + '>'
+            src = _SRC_RE.search(open_tag) if token[:7].lower() == '<script' else None
+            if src:
+                items.append({'kind': 'script', 'key': src.group(1), 'start': match.start(), 'end': match.end()})
+            else:
+                items.append({'kind': 'block', 'key': open_tag, 'start': match.start(), 'end': match.end()})
+    return items
+
+
+def _add_hash_attr(element_html: str, digest: str) -> str:
+    """Добавляет data-fragment-hash в открывающий тег элемента"""
+    tag_end = re.match(r'<[\w-]+', element_html).end()
+    return f'{element_html[:tag_end]} {FRAGMENT_HASH_ATTR}="{digest}"{element_html[tag_end:]}'
+
+
+class PageFragmentGenerator:
+    """Строит фрагменты страниц и помечает элементы страниц хэшами"""
+
+    def build(self, pages_html: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        Args:
+            pages_html: {страница: готовый HTML}
+
+        Returns:
+            ({страница: HTML с data-fragment-hash}, {страница: фрагмент})
+        """
+        parsed = {}
+        # (вид, ключ) -> хэши на страницах; элемент общий, если хэш везде один
+        versions = defaultdict(list)
+        for page, page_html in pages_html.items():
+            elements = []
+            seen = defaultdict(int)
+            for item in split_body(page_html):
+                element_html = page_html[item['start']:item['end']]
+                if item['kind'] == 'script':
+                    elements.append((item, None, None, element_html))
+                    continue
+                # Одинаковые блоки (например, несколько <script>) различаются по номеру
+                key = (item['kind'], item['key'], seen[(item['kind'], item['key'])])
+                seen[(item['kind'], item['key'])] += 1
+                digest = content_hash(element_html.encode('utf-8'))
+                versions[key].append(digest)
+                elements.append((item, key, digest, _add_hash_attr(element_html, digest)))
+            parsed[page] = elements
+
+        shared = {key for key, digests in versions.items() if len(digests) > 1 and len(set(digests)) == 1}
+        annotated, fragments = {}, {}
+        for page, page_html in pages_html.items():
+            title = _TITLE_RE.search(page_html)
+            fragment = {'page': page, 'title': html_lib.unescape(title.group(1)) if title else '',
+                        'sections': [], 'blocks': [], 'scripts': []}
+            parts = []
+            pos = 0
+            for item, key, digest, element_html in parsed[page]:
+                parts += [page_html[pos:item['start']], element_html]
+                pos = item['end']
+                if item['kind'] == 'script':
+                    fragment['scripts'].append(html_lib.unescape(item['key']))
+                    continue
+                entry = {'id': item['key']} if item['kind'] == 'section' else {}
+                entry['hash'] = digest
+                if key in shared:
+                    entry['shared'] = True
+                else:
+                    entry['html'] = element_html
+                fragment['sections' if item['kind'] == 'section' else 'blocks'].append(entry)
+            parts.append(page_html[pos:])
+            annotated[page] = ''.join(parts)
+            fragments[page] = fragment
+        return annotated, fragments
+
+    @staticmethod
+    def save(fragments: Dict[str, Dict[str, Any]], sink: OutputSink, pages_dir: str = 'pages') -> List[str]:
+        """Сохраняет pages/<страница>.json"""
+        return [
+            sink.write_text(f'{pages_dir}/{page}.json', json.dumps(fragment, ensure_ascii=False, separators=(',', ':')))
+            for page, fragment in fragments.items()
+        ]
@@ -5,26 +5,53 @@
 """
 
 import json
-from typing import Dict
+from typing import Dict, Tuple
 from pathlib import Path
 from core.config_manager import ConfigManager
+from core.output_sink import OutputSink
+from generators.css.critical_css import CriticalCSSExtractor, get_critical_css_settings
+from generators.page_fragments import PAGE_FRAGMENTS_ATTR, is_page_fragments_enabled
+from generators.report_checker import is_report_enabled
+from generators.resource_hints import (find_data_urls, find_images, find_linked_pages, get_resource_hints_settings,
+                                       render_hints)
+from processors.modal_fragments import FRAGMENTS_DIR_NAME, expand_fragments, get_fragment_names, is_prefetch_enabled
+from processors.template_registry import render_registry_script
+from utils.image_utils import add_lazy_loading
+from utils.selector_utils import get_col_marker_keys
+from utils.svg_utils import embed_icon_sprite
 
 
 class PageGenerator:
     """Генерирует HTML страницы"""
     
-    def __init__(self, config_manager: ConfigManager, sections_html: Dict[str, str], source_dir: Path = None, build_version: str = None):
+    def __init__(self, config_manager: ConfigManager, sections_html: Dict[str, str], source_dir: Path = None, build_version: str = None,
+                 css_content: str = None, has_report_css: bool = False):
         """
         Args:
             config_manager: Менеджер конфигураций
             sections_html: Словарь с HTML секций (может быть пустым, используется как кэш)
             source_dir: Путь к исходникам (для загрузки JSON из bd/)
-            build_version: Версия сборки для сброса кэша (?v= в URL скриптов и конфигов)
+            build_version: Хэш конфигов button_json (window.BUILD_VERSION: ?v= при их загрузке);
+                ?v= ресурсов страниц проставляет build.py по содержимому файлов (utils.asset_utils)
+            css_content: Готовый style.css (нужен для режима critical_css)
+            has_report_css: Создан css/report.css с отладочными стилями
         """
         self.config = config_manager
         self.sections_html = sections_html  # Используется как кэш
         self.source_dir = source_dir
         self.build_version = build_version or ''
+        self.has_report_css = has_report_css
+        # Critical CSS: правила первых секций inline в <head>, style.css грузится отложенно
+        self.critical_settings = get_critical_css_settings(getattr(config_manager, 'config', {}))
+        self.critical_extractor = None
+        if self.critical_settings and css_content:
+            self.critical_extractor = CriticalCSSExtractor(css_content, self.critical_settings['max_bytes'])
+        # Подсказки загрузки (resource_hints): preload первых секций, prefetch связанных страниц
+        self.hint_settings = get_resource_hints_settings(getattr(config_manager, 'config', {}))
+        # Фрагменты страниц (page_fragments): body помечается для js/page_nav.js
+        self.page_fragments = is_page_fragments_enabled(getattr(config_manager, 'config', {}))
+        self._rendered_sections = {}  # (page, section) -> HTML секции для страницы
+        self._bodies = {}  # page -> BODY (нужен и для prefetch со связанных страниц)
         # Импортируем здесь для избежания циклических зависимостей
         from generators.section_generator import SectionGenerator
         self.section_generator = SectionGenerator(config_manager, source_dir)
@@ -64,11 +91,14 @@ class PageGenerator:
         # Получаем список секций
         section_keys = self.config.get_page_sections(page_name)
         
-        # Генерируем HEAD
-        head_html = self._generate_head(title, description, keywords)
-        
         # Генерируем BODY
-        body_html = self._generate_body(page_name, section_keys)
+        body_html = self._get_body(page_name)
+        
+        # Генерируем HEAD (после BODY: critical CSS считается по уже сгенерированным секциям)
+        critical_css = self._get_critical_css(page_name, section_keys)
+        prefetch_names = get_fragment_names(body_html) if is_prefetch_enabled() else []
+        hints_html = self._get_resource_hints(page_name, section_keys, body_html)
+        head_html = self._generate_head(title, description, keywords, critical_css, prefetch_names, hints_html)
         
         # Собираем полный HTML
         return f'''<!DOCTYPE html>
@@ -77,31 +107,120 @@ class PageGenerator:
 {body_html}
 </html>'''
     
-    def _generate_head(self, title: str, description: str, keywords: str) -> str:
+    def _generate_head(self, title: str, description: str, keywords: str, critical_css: str = '',
+                       prefetch_names: list = None, hints_html: str = '') -> str:
         """Генерирует HEAD секцию"""
-        css_href = f'../css/style.css?v={self.build_version}' if self.build_version else '../css/style.css'
+        css_href = '../css/style.css'
+        report_link, report_script = self._generate_report_link()
+        if critical_css:
+            # Полный stylesheet не блокирует отрисовку: preload + переключение rel после загрузки
+            stylesheet_html = f'''<style>{critical_css}</style>
+    <link rel="preload" href="{css_href}" as="style" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="{css_href}"></noscript>'''
+        else:
+            stylesheet_html = f'<link rel="stylesheet" href="{css_href}">'
+        # Фрагменты модалок (lazy_modals с prefetch): браузер загружает их в простое
+        for name in prefetch_names or []:
+            stylesheet_html += f'\n    <link rel="prefetch" href="../{FRAGMENTS_DIR_NAME}/{name}">'
+        stylesheet_html += hints_html
         return f'''<head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
     <meta name="description" content="{description}">
     <meta name="keywords" content="{keywords}">
     <title>{title}</title>
-    <link rel="stylesheet" href="{css_href}">
+    {report_link}{stylesheet_html}{report_script}
 </head>'''
     
-    def _generate_body(self, page_name: str, section_keys: list) -> str:
-        """Генерирует BODY секцию"""
-        import re
-        sections_html_parts = []
-        script_tags = []  # Собираем все script теги из секций
+    def _generate_report_link(self) -> Tuple[str, str]:
+        """
+        Подключение css/report.css перед style.css (стили layout перекрывают отладочные)
+        
+        При REPORT_ENABLED = 1 - обычной ссылкой, иначе только по флагу ?report в адресе страницы:
+        скрипт стоит после стилей и вставляет ссылку перед первым из них (critical CSS или style.css).
         
+        Returns:
+            (ссылка перед стилями, скрипт после стилей)
+        """
+        if not self.has_report_css:
+            return '', ''
+        report_href = '../css/report.css'
+        if is_report_enabled():
+            return f'<link rel="stylesheet" href="{report_href}">\n    ', ''
+        return '', (
+            "\n    <script>if (/[?&]report(=|&|$)/.test(location.search)) {"
+            "var l = document.createElement('link'); l.rel = 'stylesheet'; "
+            f"l.href = '{report_href}'; document.head.insertBefore(l, "
+            "document.querySelector('head > style, link[href*=\"css/style.css\"]'));"
+            "}</script>"
+        )
+    
+    def _get_body(self, page_name: str) -> str:
+        """BODY страницы (с кэшем)"""
+        if page_name not in self._bodies:
+            self._bodies[page_name] = self._generate_body(page_name, self.config.get_page_sections(page_name))
+        return self._bodies[page_name]
+    
+    def _get_resource_hints(self, page_name: str, section_keys: list, body_html: str) -> str:
+        """
+        <link rel="preload"/"prefetch"> страницы (режим resource_hints, иначе пусто)
+        
+        preload - картинки и данные первых секций; prefetch - страницы из ссылок
+        (фрагменты .json в режиме page_fragments) и их первые картинки, которых нет на этой странице.
+        """
+        if not self.hint_settings:
+            return ''
+        first_sections = []
         for sec_key in section_keys:
+            if len(first_sections) >= self.hint_settings['sections']:
+                break
+            section_html = self._render_section(sec_key, page_name)
+            if section_html:
+                # Тот же номер секции, что и в BODY: картинки с loading="lazy" не подгружаются заранее
+                first_sections.append(add_lazy_loading(section_html, len(first_sections)))
+        first_html = '\n'.join(first_sections)
+        
+        prefetch_urls = []
+        if self.hint_settings['prefetch']:
+            page_images = set(find_images(body_html))
+            for linked_page in find_linked_pages(body_html, self.config.pages.keys(), page_name):
+                prefetch_urls.append(f'{linked_page}.json' if self.page_fragments else f'{linked_page}.html')
+                prefetch_urls += [url for url in find_images(self._get_body(linked_page), eager_only=True)
+                                  if url not in page_images and url not in prefetch_urls]
+        return render_hints(find_images(first_html, eager_only=True), find_data_urls(first_html, body_html),
+                            prefetch_urls)
+    
+    def _get_critical_css(self, page_name: str, section_keys: list) -> str:
+        """Critical CSS для первых N секций страницы (порядок из pages.json)"""
+        if not self.critical_extractor:
+            return ''
+        first_sections = section_keys[:self.critical_settings['sections']]
+        html = '\n'.join(
+            f'<section id="{sec_key}" class="section-{sec_key}">{self._render_section(sec_key, page_name)}</section>'
+            for sec_key in first_sections
+        )
+        return self.critical_extractor.extract(html, page_name)
+    
+    def _render_section(self, sec_key: str, page_name: str) -> str:
+        """HTML секции для страницы (с кэшем: используется и в BODY, и для critical CSS)"""
+        cache_key = (page_name, sec_key)
+        if cache_key not in self._rendered_sections:
             # Генерируем секцию для конкретной страницы (чтобы правильно обработать условия if)
             section_html = self.section_generator.generate_section(sec_key, page_name)
-            
             # Если не получилось, пытаемся взять из кэша
             if not section_html:
                 section_html = self.sections_html.get(sec_key, '')
+            self._rendered_sections[cache_key] = section_html
+        return self._rendered_sections[cache_key]
+    
+    def _generate_body(self, page_name: str, section_keys: list) -> str:
+        """Генерирует BODY секцию"""
+        import re
+        sections_html_parts = []
+        script_tags = []  # Собираем все script теги из секций
+        
+        for sec_key in section_keys:
+            section_html = self._render_section(sec_key, page_name)
             
             if section_html:
                 # Извлекаем script теги из секции
@@ -111,6 +230,9 @@ class PageGenerator:
                 # Удаляем script теги из секции (они будут добавлены в конец body)
                 section_html = re.sub(r'<script[^>]*type="application/json"[^>]*>.*?</script>', '', section_html, flags=re.DOTALL)
                 
+                # Картинки ниже первых секций - отложенная загрузка (image_pipeline)
+                section_html = add_lazy_loading(section_html, len(sections_html_parts))
+                
                 # Оборачиваем в <section>
                 section_tag = f'''<section id="{sec_key}" class="section-{sec_key}">
 {section_html}
@@ -118,6 +240,10 @@ class PageGenerator:
                 sections_html_parts.append(section_tag)
         
         body_content = '\n    '.join(sections_html_parts)
+        # Вместе с фрагментами модалок (lazy_modals): их источники, шаблоны и кнопки тоже на этой странице
+        page_content = expand_fragments(body_content)
+        # Символы повторяющихся иконок страницы (icon_sprite) - один раз после секций
+        body_content = embed_icon_sprite(body_content, page_content)
         
         # Источники bd, уже вставленные из секций (с data-bd-api и фильтрами) — не дублировать
         # Также не добавляем script для PostgreSQL-источников (span с data-bd-url fetch_table.php)
@@ -127,7 +253,7 @@ class PageGenerator:
             if m:
                 skip_sources.add(m.group(1))
         # Добавляем в skip все data-bd-source из body (включая span для PostgreSQL)
-        for m in re.finditer(r'data-bd-source="([^"]+)"', body_content):
+        for m in re.finditer(r'data-bd-source="([^"]+)"', page_content):
             skip_sources.add(m.group(1))
         
         scripts_html = self._generate_bd_scripts(skip_sources=skip_sources)
@@ -136,24 +262,30 @@ class PageGenerator:
         elif scripts_html:
             scripts_html = scripts_html
 
-        button_json_scripts = self._generate_button_json_config_scripts(body_content)
+        button_json_scripts = self._generate_button_json_config_scripts(page_content)
         if button_json_scripts:
             scripts_html = scripts_html + '\n    ' + button_json_scripts if scripts_html else button_json_scripts
 
+        # Шаблоны data-template-id страницы - один реестр (одинаковые шаблоны секций не повторяются)
+        registry_script = render_registry_script(page_content)
+        if registry_script:
+            scripts_html = scripts_html + '\n    ' + registry_script if scripts_html else registry_script
+
         if_labels_script = self._generate_if_labels_script()
         if if_labels_script:
             scripts_html = scripts_html + '\n    ' + if_labels_script if scripts_html else if_labels_script
         
-        from datetime import datetime
-        build_marker = f'<!-- build: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} -->'
         v = self.build_version
         version_script = f'<script>window.BUILD_VERSION="{v}";</script>\n    ' if v else ''
-        script_src = f'../js/script.js?v={v}' if v else '../js/script.js'
-        return f'''<body data-page="{page_name}">
-    {build_marker}
+        col_marker_keys = get_col_marker_keys()
+        if col_marker_keys:
+            # Классовый режим селекторов: functions.js ставит те же маркеры _cols-N в шаблонах
+            version_script += f'<script>window.COL_MARKER_KEYS={json.dumps(col_marker_keys)};</script>\n    '
+        fragments_attr = f' {PAGE_FRAGMENTS_ATTR}' if self.page_fragments else ''
+        return f'''<body data-page="{page_name}"{fragments_attr}>
     {body_content}
 {('    ' + scripts_html + '\n') if scripts_html else ''}
-    {version_script}<script src="{script_src}"></script>
+    {version_script}<script src="../js/script.js"></script>
 </body>'''
     
     def _generate_bd_scripts(self, skip_sources: set = None) -> str:
@@ -167,7 +299,7 @@ class PageGenerator:
         
         skip_sources = skip_sources or set()
         scripts = []
-        for json_file in bd_dir.glob('*.json'):
+        for json_file in sorted(bd_dir.glob('*.json')):
             table_name = json_file.stem
             if table_name in skip_sources:
                 continue
@@ -201,7 +333,7 @@ class PageGenerator:
         if not button_json_dir.exists():
             return ''
         scripts = []
-        for name in found:
+        for name in sorted(found):
             path = button_json_dir / f'{name}.json'
             if not path.is_file():
                 continue
@@ -214,17 +346,16 @@ class PageGenerator:
                 print(f"   ⚠️ button_json {name}: {e}")
         return '\n    '.join(scripts) if scripts else ''
     
-    def save_all(self, pages_html: Dict[str, str], output_dir: Path):
+    def save_all(self, pages_html: Dict[str, str], sink: OutputSink, output_dir: str = 'pages'):
         """
         Сохраняет все страницы в файлы
         
         Args:
             pages_html: Словарь с HTML страниц
-            output_dir: Директория для сохранения
+            sink: Результат сборки
+            output_dir: Директория страниц в результате
         """
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+        sink.make_dir(output_dir)
         
         for page_name, html in pages_html.items():
-            file_path = output_dir / f"{page_name}.html"
-            file_path.write_text(html, encoding='utf-8')
+            sink.write_text(f"{output_dir}/{page_name}.html", html)
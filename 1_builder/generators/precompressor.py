@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Готовые сжатые копии файлов (config.json: "precompress": true или
+{"min_size": 1024, "brotli": true, "workers": 4})
+
+Рядом с каждым текстовым файлом сборки (html, css, js, json, svg) больше min_size
+сохраняются file.gz и, если установлен модуль brotli, file.br. Веб-сервер отдаёт их
+без сжатия на лету (.htaccess / .nginx.conf - "server_config"). Копия не сохраняется,
+если она не меньше исходного файла.
+
+Сжатие идёт в пуле потоков. Сжатые данные хранятся в .build_cache/compress/ по хэшу
+содержимого: файл, который не изменился с прошлой сборки, заново не сжимается.
+Вывод детерминирован (gzip без времени и имени файла).
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from core.output_sink import OutputSink
+from generators.server_config_generator import COMPRESSIBLE_TYPES
+
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# Данные, которые PHP перезаписывает после сборки: сжатая копия устарела бы
+RUNTIME_DATA_DIRS = ('send_form_json',)
+
+
+def get_precompress_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Читает настройки сжатых копий из config.json
+
+    Returns:
+        {'min_size': int, 'brotli': bool, 'workers': int} или None если режим выключен
+    """
+    value = (app_config or {}).get('precompress')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {
+        'min_size': max(0, int(settings.get('min_size', DEFAULT_MIN_SIZE))),
+        'brotli': bool(settings.get('brotli', True)) and brotli is not None,
+        'workers': max(1, int(settings.get('workers', DEFAULT_WORKERS))),
+    }
+
+
+class Precompressor:
+    """Сохраняет .gz/.br рядом с текстовыми файлами сборки"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, min_size: int = DEFAULT_MIN_SIZE,
+                 use_brotli: bool = True, workers: int = DEFAULT_WORKERS):
+        """
+        Args:
+            cache_dir: Директория кэша сжатых данных (None - без кэша)
+            min_size: Минимальный размер файла в байтах
+            use_brotli: Сохранять ли .br (нужен модуль brotli)
+            workers: Потоков сжатия (1 - последовательно)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.min_size = min_size
+        self.encodings = ['gz'] + (['br'] if use_brotli and brotli is not None else [])
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._used_cache_files = set()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_before = 0
+        self.bytes_after: Dict[str, int] = {encoding: 0 for encoding in self.encodings}
+
+    def find_files(self, sink: OutputSink) -> List[str]:
+        """Текстовые файлы сборки не меньше min_size (без данных, которые меняет PHP)"""
+        return [
+            rel_path for rel_path in sink.list_files()
+            if Path(rel_path).suffix[1:] in COMPRESSIBLE_TYPES
+            and rel_path.split('/', 1)[0] not in RUNTIME_DATA_DIRS
+            and sink.size(rel_path) >= self.min_size
+        ]
+
+    def compress_dir(self, sink: OutputSink) -> List[str]:
+        """
+        Сжимает текстовые файлы результата
+
+        Returns:
+            Записанные сжатые копии
+        """
+        files = self.find_files(sink)
+        if self.workers <= 1:
+            results = [self.compress_file(sink, rel_path) for rel_path in files]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='compress') as executor:
+                results = list(executor.map(lambda rel_path: self.compress_file(sink, rel_path), files))
+        self._prune_cache()
+        return [rel_path for written in results for rel_path in written]
+
+    def compress_file(self, sink: OutputSink, rel_path: str) -> List[str]:
+        """
+        Сохраняет сжатые копии одного файла
+
+        Returns:
+            Записанные копии (пусто, если сжатие не уменьшает файл)
+        """
+        data = sink.read_bytes(rel_path)
+        digest = hashlib.sha256(data).hexdigest()
+        written = []
+        sizes = {}
+        for encoding in self.encodings:
+            compressed, hit = self._get_or_compress(digest, encoding, data)
+            sizes[encoding] = min(len(compressed), len(data))
+            if len(compressed) < len(data):
+                written.append(sink.write_bytes(f"{rel_path}.{encoding}", compressed))
+            with self._lock:
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        with self._lock:
+            self.bytes_before += len(data)
+            for encoding, size in sizes.items():
+                self.bytes_after[encoding] += size
+        return written
+
+    def _get_or_compress(self, digest: str, encoding: str, data: bytes) -> Tuple[bytes, bool]:
+        """Сжатые данные из кэша или заново -> (данные, взяты ли из кэша)"""
+        cache_file = self.cache_dir / f"{digest}.{encoding}" if self.cache_dir else None
+        if cache_file is not None:
+            with self._lock:
+                self._used_cache_files.add(cache_file.name)
+            try:
+                return cache_file.read_bytes(), True
+            except OSError:
+                pass
+
+        if encoding == 'gz':
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            compressed = brotli.compress(data, quality=11)
+
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(compressed)
+                os.replace(tmp_path, cache_file)
+            except OSError as e:
+                print(f"   ⚠️  Не удалось записать кэш сжатия {cache_file.name}: {e}")
+        return compressed, False
+
+    def _prune_cache(self):
+        """Удаляет из кэша данные файлов, которых нет в этой сборке"""
+        if self.cache_dir is None or not self.cache_dir.is_dir():
+            return
+        for cache_file in self.cache_dir.iterdir():
+            if cache_file.name not in self._used_cache_files:
+                try:
+                    cache_file.unlink()
+                except OSError:
+                    pass
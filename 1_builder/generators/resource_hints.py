@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Подсказки загрузки для страниц (config.json: "resource_hints": true
+или {"sections": 1, "prefetch": false})
+
+Всё вычисляется по сгенерированному HTML, а не по ручным спискам:
+- <link rel="preload"> - картинки первых секций (без loading="lazy") и данные, которые
+  JS первых секций загружает сразу: data-api-url (api_loader.js) и data-bd-url источников,
+  для которых на странице нет встроенного <script data-bd-source> (functions.js);
+- <link rel="prefetch"> - страницы, на которые ведут ссылки <a href="*.html"> (меню),
+  и их картинки, которых нет на текущей странице. В режиме page_fragments вместо
+  страницы загружается её фрагмент pages/*.json - его запрашивает js/page_nav.js.
+  В режиме js_bundle к ним добавляются части JS этих страниц (JSBundler.rewrite_page).
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+
+DEFAULT_HINT_SECTIONS = 1
+
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_SRC_RE = re.compile(r'\ssrc="([^"]+)"')
+_API_URL_RE = re.compile(r'data-api-url="([^"]+)"')
+_BD_SPAN_RE = re.compile(r'<span\b[^>]*\bdata-bd-source="([^"]+)"[^>]*>')
+_BD_URL_RE = re.compile(r'\bdata-bd-url="([^"]+)"')
+_INLINE_BD_RE = re.compile(r'<script type="application/json" data-bd-source="([^"]+)"')
+_PAGE_LINK_RE = re.compile(r'<a\b[^>]*\shref="([\w-]+)\.html"')
+_PREFETCH_PAGE_RE = re.compile(r'<link rel="prefetch" href="([\w-]+)\.(?:html|json)">')
+
+
+def get_resource_hints_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Читает настройки подсказок загрузки из config.json
+
+    Returns:
+        {'sections': N, 'prefetch': bool} или None если режим выключен
+    """
+    value = (app_config or {}).get('resource_hints')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {
+        'sections': max(0, int(settings.get('sections', DEFAULT_HINT_SECTIONS))),
+        'prefetch': bool(settings.get('prefetch', True)),
+    }
+
+
+def find_images(html: str, eager_only: bool = False) -> List[str]:
+    """src картинок HTML в порядке появления (eager_only - без loading="lazy")"""
+    images = []
+    for tag in _IMG_TAG_RE.findall(html):
+        match = _SRC_RE.search(tag)
+        if match and not (eager_only and 'loading="lazy"' in tag):
+            images.append(match.group(1))
+    return list(dict.fromkeys(images))
+
+
+def find_data_urls(html: str, page_html: str) -> List[str]:
+    """
+    Данные, которые JS загружает для HTML сразу после загрузки страницы
+
+    Args:
+        html: HTML первых секций
+        page_html: HTML всей страницы (встроенные источники bd не загружаются)
+    """
+    inline_sources = set(_INLINE_BD_RE.findall(page_html))
+    urls = _API_URL_RE.findall(html)
+    for match in _BD_SPAN_RE.finditer(html):
+        url = _BD_URL_RE.search(match.group(0))
+        if url and match.group(1) not in inline_sources:
+            urls.append(url.group(1))
+    return list(dict.fromkeys(urls))
+
+
+def find_linked_pages(html: str, pages: Iterable[str], current_page: str) -> List[str]:
+    """Страницы сборки, на которые ведут ссылки HTML (в порядке появления, без текущей)"""
+    pages = set(pages)
+    return list(dict.fromkeys(
+        name for name in _PAGE_LINK_RE.findall(html) if name in pages and name != current_page))
+
+
+def find_prefetched_pages(html: str) -> List[str]:
+    """Страницы из <link rel="prefetch"> готовой страницы (сама страница или её фрагмент)"""
+    return _PREFETCH_PAGE_RE.findall(html)
+
+
+def render_hints(preload_images: List[str], preload_data: List[str],
+                 prefetch_urls: List[str]) -> str:
+    """Теги <link> для <head> (каждый с новой строки, с отступом head)"""
+    links = [f'<link rel="preload" href="{url}" as="image">' for url in preload_images]
+    # crossorigin: запрос fetch() с same-origin credentials совпадает с такой загрузкой
+    links += [f'<link rel="preload" href="{url}" as="fetch" crossorigin>' for url in preload_data]
+    links += [f'<link rel="prefetch" href="{url}">' for url in prefetch_urls]
+    return ''.join(f'\n    {link}' for link in links)
@@ -7,8 +7,14 @@
 from typing import Dict
 from pathlib import Path
 from core.config_manager import ConfigManager
+from core.output_sink import OutputSink
 from processors.element_processor import ElementProcessor
 from processors.layout_processor import LayoutProcessor
+from processors.modal_fragments import expand_fragments, init_lazy_modals
+from processors.template_registry import render_registry_script
+from utils.selector_utils import init_selector_mode
+from utils.grid_layout_utils import init_layout_engine
+from utils.svg_utils import embed_icon_sprite, init_icon_sprite
 
 
 class SectionGenerator:
@@ -22,6 +28,15 @@ class SectionGenerator:
         """
         self.config = config_manager
         self.source_dir = source_dir
+        
+        # Режим селекторов (атрибутные/классовые) - рендерер добавляет классы-маркеры
+        init_selector_mode(self.config.config, self.config.div_column)
+        # Движок разметки секций (flex/grid), config.json: "layout_engine"
+        init_layout_engine(self.config.config)
+        # Модалки кнопок во фрагментах, config.json: "lazy_modals"
+        init_lazy_modals(self.config.config)
+        # Спрайт иконок, config.json: "icon_sprite"
+        init_icon_sprite(self.config.config)
     
     def generate_all(self) -> Dict[str, str]:
         """
@@ -95,16 +110,16 @@ class SectionGenerator:
             print(f"   ✅ Script теги найдены в generate_section для {section_name}")
         return html
     
-    def save_all(self, sections_html: Dict[str, str], output_dir: Path):
+    def save_all(self, sections_html: Dict[str, str], sink: OutputSink, output_dir: str = 'sections'):
         """
         Сохраняет все секции в файлы
         
         Args:
             sections_html: Словарь с HTML секций
-            output_dir: Директория для сохранения
+            sink: Результат сборки
+            output_dir: Директория секций в результате
         """
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+        sink.make_dir(output_dir)
         
         # Создаем set чтобы избежать дублирования при сохранении
         saved_files = set()
@@ -120,10 +135,13 @@ class SectionGenerator:
                 print(f"   ✅ Script теги найдены в секции {section_key} перед сохранением")
             
             # Сохраняем файл
-            file_path = output_dir / f"{section_key}.html"
+            file_path = f"{output_dir}/{section_key}.html"
             
             # Проверяем, не сохраняли ли уже идентичный файл
             file_signature = f"{section_key}:{html}"
             if file_signature not in saved_files:
-                file_path.write_text(html, encoding='utf-8')
+                # Шаблоны и иконки секции - в конце файла (фрагмент самодостаточен)
+                section_content = expand_fragments(html)
+                sink.write_text(file_path,
+                                embed_icon_sprite(html, section_content) + render_registry_script(section_content))
                 saved_files.add(file_signature)
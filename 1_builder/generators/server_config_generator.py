@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Настройки кэширования для веб-сервера (config.json: "server_config": true
+или {"apache": true, "nginx": false})
+
+По списку файлов, которые записала сборка, создаются 3_result/.htaccess (Apache 2.4)
+и 3_result/.nginx.conf (include в блок server). Файлы делятся на группы:
+- immutable - имя содержит хэш содержимого (js/core.1a2b3c4d.js, img/logo.3f9a1c2b.svg):
+  кэшируются на год без повторных запросов;
+- versioned - подключаются с ?v=<хэш> (css/style.css, js/script.js, button_json/*.json):
+  кэшируются на год, новая версия приходит по новому URL;
+- dynamic - PHP: не кэшируются;
+- остальное (страницы, секции, фрагменты, данные, которые меняет PHP) - no-cache:
+  браузер хранит копию, но каждый раз проверяет её (ETag/Last-Modified).
+
+Для текстовых файлов включается сжатие: готовые file.gz / file.br ("precompress")
+отдаются, если они есть и браузер их принимает, остальное сжимается сервером на лету.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from core.output_sink import OutputSink
+from utils.asset_utils import VERSIONED_ASSETS
+
+
+HTACCESS_FILE_NAME = '.htaccess'
+NGINX_FILE_NAME = '.nginx.conf'
+
+CACHE_CONTROL = {
+    'immutable': 'public, max-age=31536000, immutable',
+    'versioned': 'public, max-age=31536000',
+    'dynamic': 'no-store',
+    'revalidate': 'no-cache',
+}
+
+# Текстовые форматы: сжатие на лету и готовые .gz/.br
+COMPRESSIBLE_TYPES = {
+    'html': 'text/html',
+    'css': 'text/css',
+    'js': 'application/javascript',
+    'json': 'application/json',
+    'svg': 'image/svg+xml',
+}
+
+# Каталоги с данными, которые подключаются с ?v= (window.BUILD_VERSION)
+VERSIONED_DATA_DIRS = ('button_json',)
+
+_HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{8}\.[A-Za-z0-9]+$')
+# Сжатые копии не влияют на группу файла
+_COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def get_server_config_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, bool]]:
+    """
+    Читает настройки конфигов веб-сервера из config.json
+
+    Returns:
+        {'apache': bool, 'nginx': bool} или None если режим выключен
+    """
+    value = (app_config or {}).get('server_config')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {'apache': bool(settings.get('apache', True)), 'nginx': bool(settings.get('nginx', True))}
+
+
+def strip_compressed_suffix(rel_path: str) -> str:
+    """Путь исходного файла для сжатой копии (js/script.js.gz -> js/script.js)"""
+    if rel_path.endswith(_COMPRESSED_SUFFIXES):
+        return rel_path.rsplit('.', 1)[0]
+    return rel_path
+
+
+def classify_file(rel_path: str) -> str:
+    """
+    Группа кэширования файла
+
+    Args:
+        rel_path: Путь относительно 3_result (через /)
+
+    Returns:
+        'immutable', 'versioned', 'dynamic' или 'revalidate'
+    """
+    rel_path = strip_compressed_suffix(rel_path)
+    if rel_path.endswith('.php'):
+        return 'dynamic'
+    if _HASHED_NAME_RE.search(rel_path.rsplit('/', 1)[-1]):
+        return 'immutable'
+    if rel_path in VERSIONED_ASSETS or rel_path.split('/', 1)[0] in VERSIONED_DATA_DIRS:
+        return 'versioned'
+    return 'revalidate'
+
+
+class ServerConfigGenerator:
+    """Создаёт .htaccess и конфиг nginx по файлам сборки"""
+
+    def __init__(self, sink: OutputSink):
+        """
+        Args:
+            sink: Результат сборки - файлы уже записаны
+        """
+        self.sink = sink
+        self.files: List[str] = [
+            rel_path for rel_path in sink.list_files()
+            if rel_path.rsplit('/', 1)[-1] not in (HTACCESS_FILE_NAME, NGINX_FILE_NAME)
+        ]
+
+    def get_patterns(self) -> Dict[str, List[str]]:
+        """
+        Регулярные выражения путей (конец URL, с /) для групп с особым кэшированием
+
+        Returns:
+            {группа: [выражения]}; группа revalidate - по умолчанию, без выражений
+        """
+        patterns = {'immutable': set(), 'versioned': set(), 'dynamic': set()}
+        for rel_path in self.files:
+            rel_path = strip_compressed_suffix(rel_path)
+            group = classify_file(rel_path)
+            if group == 'revalidate':
+                continue
+            directory, _, name = rel_path.rpartition('/')
+            prefix = f'/{re.escape(directory)}/' if directory else '/'
+            extension = re.escape(name.rsplit('.', 1)[-1])
+            if group == 'immutable':
+                patterns[group].add(rf'{prefix}[^/]+\.[0-9a-f]{{8}}\.{extension}')
+            elif group == 'dynamic':
+                patterns[group].add(rf'{prefix}[^/]+\.php')
+            elif directory in VERSIONED_DATA_DIRS:
+                patterns[group].add(rf'{prefix}[^/]+\.{extension}')
+            else:
+                patterns[group].add(f'{prefix}{re.escape(name)}')
+        return {group: sorted(items) for group, items in patterns.items() if items}
+
+    @staticmethod
+    def _group_regex(patterns: List[str]) -> str:
+        # Сжатые копии (file.js.gz) кэшируются так же, как сам файл
+        suffix = '(?:' + '|'.join(re.escape(s) for s in _COMPRESSED_SUFFIXES) + ')?$'
+        return f'(?:{"|".join(patterns)}){suffix}'
+
+    def render_htaccess(self) -> str:
+        """Текст .htaccess (Apache 2.4: mod_headers, mod_rewrite, mod_deflate)"""
+        types = '|'.join(COMPRESSIBLE_TYPES)
+        lines = [
+            '# Создан сборкой (build.py), изменения будут перезаписаны',
+            '',
+            'AddDefaultCharset utf-8',
+            '',
+            '<Files ".nginx.conf">',
+            '    Require all denied',
+            '</Files>',
+            '',
+            '# Кэширование',
+            '<IfModule mod_headers.c>',
+            f'    Header set Cache-Control "{CACHE_CONTROL["revalidate"]}"',
+        ]
+        for group, patterns in self.get_patterns().items():
+            lines += [
+                f'    <If "%{{REQUEST_URI}} =~ m#{self._group_regex(patterns)}#">',
+                f'        Header set Cache-Control "{CACHE_CONTROL[group]}"',
+                '    </If>',
+            ]
+        lines += [
+            '</IfModule>',
+            '',
+            '# Готовые сжатые копии (file.br, file.gz)',
+            '<IfModule mod_rewrite.c>',
+            '    RewriteEngine On',
+        ]
+        for encoding, suffix in (('br', 'br'), ('gzip', 'gz')):
+            lines += [
+                f'    RewriteCond %{{HTTP:Accept-Encoding}} \\b{encoding}\\b',
+                f'    RewriteCond %{{REQUEST_FILENAME}}.{suffix} -f',
+                f'    RewriteRule ^(.+\\.(?:{types}))$ $1.{suffix} [L]',
+            ]
+        for extension, mime in COMPRESSIBLE_TYPES.items():
+            lines.append(f'    RewriteRule \\.{extension}\\.(?:gz|br)$ - [T={mime},E=no-gzip:1,E=no-brotli:1]')
+        lines += ['</IfModule>', '<IfModule mod_headers.c>']
+        for encoding, suffix in (('br', 'br'), ('gzip', 'gz')):
+            lines += [
+                f'    <FilesMatch "\\.(?:{types})\\.{suffix}$">',
+                f'        Header set Content-Encoding {encoding}',
+                '        Header append Vary Accept-Encoding',
+                '    </FilesMatch>',
+            ]
+        lines += [
+            '</IfModule>',
+            '',
+            '# Сжатие на лету (файлы без готовой копии)',
+            '<IfModule mod_deflate.c>',
+            f'    AddOutputFilterByType DEFLATE {" ".join(sorted(set(COMPRESSIBLE_TYPES.values())))}',
+            '</IfModule>',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def render_nginx(self) -> str:
+        """Текст конфига nginx (include в блок server)"""
+        lines = [
+            '# Создан сборкой (build.py), изменения будут перезаписаны',
+            '# Подключение: include <путь к 3_result>/.nginx.conf; в блоке server.',
+            '# add_header наследуется только в location без собственных add_header.',
+            '',
+            'charset utf-8;',
+            '',
+            'location ~ /\\.(?:htaccess|nginx\\.conf)$ {',
+            '    return 404;',
+            '}',
+            '',
+            '# Кэширование',
+            f'set $cache_control "{CACHE_CONTROL["revalidate"]}";',
+        ]
+        for group, patterns in self.get_patterns().items():
+            lines += [
+                f'if ($uri ~ "{self._group_regex(patterns)}") {{',
+                f'    set $cache_control "{CACHE_CONTROL[group]}";',
+                '}',
+            ]
+        lines += [
+            'add_header Cache-Control $cache_control;',
+            '',
+            '# Готовые сжатые копии (file.gz; file.br - модуль ngx_brotli)',
+            'gzip_static on;',
+            '# brotli_static on;',
+            '',
+            '# Сжатие на лету (файлы без готовой копии)',
+            'gzip on;',
+            'gzip_vary on;',
+            f'gzip_types {" ".join(sorted(set(COMPRESSIBLE_TYPES.values()) - {"text/html"}))};',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def save(self, apache: bool = True, nginx: bool = True) -> List[str]:
+        """
+        Сохраняет конфиги в корень результата
+
+        Returns:
+            Пути записанных файлов
+        """
+        written = []
+        for enabled, file_name, render in ((apache, HTACCESS_FILE_NAME, self.render_htaccess),
+                                           (nginx, NGINX_FILE_NAME, self.render_nginx)):
+            if enabled:
+                written.append(self.sink.write_text(file_name, render()))
+        return written
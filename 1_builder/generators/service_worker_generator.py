@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Service worker и список предзагрузки (config.json: "service_worker": true)
+
+Сборка сохраняет в корень 3_result:
+- precache-manifest.<хэш>.js - список файлов сайта (страницы, css, js, img, данные
+  bd_local и button_json, фрагменты модалок) с хэшем содержимого каждого. В список
+  не попадают исходные имена картинок, у которых есть копия с хэшем (img/manifest.json,
+  "image_pipeline"), и js/*.js, на которые не ссылается ни одна страница или фрагмент
+  (script.js в режиме "js_bundle");
+- sw.js - service worker: при установке загружает файлы списка, которых ещё нет
+  в кэше с тем же хэшем (после выкладки заново скачиваются только изменённые),
+  старые версии удаляет при активации.
+
+Запросы к файлам списка обслуживаются из кэша (cache-first), GET-запросы к PHP -
+из сети, а без сети - последним полученным ответом (network-first). POST и
+запросы к другим сайтам service worker не трогает.
+
+Страницы регистрируют sw.js скриптом перед </body>. Service worker работает только
+через HTTPS (или localhost), с file:// регистрация просто не выполняется.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from core.output_sink import OutputSink
+from utils.asset_utils import content_hash
+from utils.image_utils import IMAGE_MANIFEST_FILE_NAME
+
+
+SERVICE_WORKER_FILE_NAME = 'sw.js'
+PRECACHE_MANIFEST_PREFIX = 'precache-manifest'
+
+# Не попадают в список: серверные скрипты и данные, отладочные секции,
+# данные, которые PHP меняет после сборки, конфиги веб-сервера и сжатые копии
+PRECACHE_EXCLUDED_DIRS = ('php', 'owner', 'save_bd', 'send_form_json', 'data', 'sections')
+PRECACHE_EXCLUDED_SUFFIXES = ('.php', '.gz', '.br')
+PRECACHE_EXCLUDED_NAMES = ('.htaccess', '.nginx.conf', SERVICE_WORKER_FILE_NAME)
+
+REGISTER_SCRIPT = ("<script>if ('serviceWorker' in navigator) "
+                   "navigator.serviceWorker.register('../sw.js').catch(function() {});</script>")
+
+SERVICE_WORKER_TEMPLATE = """// Service worker DISKOKRAS (создан сборкой, build.py)
+importScripts('__MANIFEST_FILE__');
+
+const PRECACHE = 'diskokras-precache';
+const RUNTIME = 'diskokras-runtime';
+
+// Полный URL файла -> хэш содержимого
+const revisions = new Map((self.__PRECACHE_MANIFEST || []).map(
+    entry => [new URL(entry.url, self.registration.scope).href, entry.revision]));
+
+function cacheKey(url, revision) {
+    return url + '?__rev=' + revision;
+}
+
+self.addEventListener('install', event => {
+    // Загружаются только файлы, которых нет в кэше с текущим хэшем
+    event.waitUntil(caches.open(PRECACHE).then(cache => Promise.all(
+        Array.from(revisions, ([url, revision]) => cache.match(cacheKey(url, revision)).then(cached => {
+            if (cached) return;
+            return fetch(url, { cache: 'no-cache' }).then(response => {
+                if (!response.ok) throw new Error(response.status + ' ' + url);
+                return cache.put(cacheKey(url, revision), response);
+            });
+        }))
+    )).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    const current = new Set(Array.from(revisions, ([url, revision]) => cacheKey(url, revision)));
+    event.waitUntil(caches.keys().then(names => Promise.all(names.map(name => {
+        if (name !== PRECACHE && name !== RUNTIME) return caches.delete(name);
+        if (name !== PRECACHE) return;
+        return caches.open(PRECACHE).then(cache => cache.keys().then(requests => Promise.all(
+            requests.filter(request => !current.has(request.url)).map(request => cache.delete(request)))));
+    }))).then(() => self.clients.claim()));
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+    // PHP: сначала сеть, без сети - последний ответ
+    if (url.pathname.endsWith('.php')) {
+        event.respondWith(fetch(request).then(response => {
+            if (response.ok) {
+                const copy = response.clone();
+                caches.open(RUNTIME).then(cache => cache.put(request, copy));
+            }
+            return response;
+        }).catch(() => caches.open(RUNTIME).then(cache => cache.match(request)).then(
+            cached => cached || Response.error())));
+        return;
+    }
+
+    // Файлы сборки: из кэша (?v= не важен - версию задаёт список), если нет - из сети
+    let path = url.origin + url.pathname;
+    if (path.endsWith('/')) path += 'index.html';
+    const revision = revisions.get(path);
+    if (revision === undefined) return;
+    event.respondWith(caches.open(PRECACHE).then(cache => cache.match(cacheKey(path, revision))).then(
+        cached => cached || fetch(request)));
+});
+"""
+
+
+def is_service_worker_enabled(app_config: Optional[Dict[str, Any]]) -> bool:
+    """Включён ли service worker в config.json"""
+    return bool((app_config or {}).get('service_worker'))
+
+
+class ServiceWorkerGenerator:
+    """Создаёт sw.js и список предзагрузки по файлам сборки"""
+
+    def __init__(self, sink: OutputSink):
+        """
+        Args:
+            sink: Результат сборки - страницы уже окончательные
+        """
+        self.sink = sink
+
+    def build_manifest(self) -> List[Dict[str, str]]:
+        """
+        Список предзагрузки
+
+        Returns:
+            [{'url': путь от корня сайта, 'revision': хэш содержимого}] в порядке путей
+        """
+        manifest = []
+        skipped = self._find_unused_files()
+        for rel_path in self.sink.list_files():
+            name = rel_path.rsplit('/', 1)[-1]
+            if rel_path.split('/', 1)[0] in PRECACHE_EXCLUDED_DIRS or rel_path in skipped:
+                continue
+            if name.endswith(PRECACHE_EXCLUDED_SUFFIXES) or name in PRECACHE_EXCLUDED_NAMES \
+                    or name.startswith(PRECACHE_MANIFEST_PREFIX + '.'):
+                continue
+            manifest.append({'url': rel_path, 'revision': content_hash(self.sink.read_bytes(rel_path))})
+        return manifest
+
+    def _find_unused_files(self) -> Set[str]:
+        """Файлы, которые страницы не загружают: исходники картинок с копией с хэшем и JS без ссылок"""
+        unused = set()
+        image_manifest = f"img/{IMAGE_MANIFEST_FILE_NAME}"
+        if self.sink.exists(image_manifest):
+            images = json.loads(self.sink.read_text(image_manifest))
+            unused.update(f"img/{name}" for name, entry in images.items() if entry.get('src') != name)
+        page_files = self.sink.glob('pages/*.html') + self.sink.glob('pages/*.json') + self.sink.glob('fragments/*.html')
+        pages = ''.join(self.sink.read_text(path) for path in page_files)
+        unused.update(path for path in self.sink.glob('js/*.js') if f"../{path}" not in pages)
+        return unused
+
+    def save(self, manifest: List[Dict[str, str]]) -> List[str]:
+        """
+        Сохраняет список предзагрузки и sw.js
+
+        Returns:
+            [путь списка, путь sw.js]
+        """
+        manifest_code = f"self.__PRECACHE_MANIFEST = {json.dumps(manifest, ensure_ascii=False, indent=1)};\n"
+        manifest_path = self.sink.write_text(
+            f"{PRECACHE_MANIFEST_PREFIX}.{content_hash(manifest_code.encode('utf-8'))}.js", manifest_code)
+        sw_path = self.sink.write_text(SERVICE_WORKER_FILE_NAME,
+                                       SERVICE_WORKER_TEMPLATE.replace('__MANIFEST_FILE__', manifest_path))
+        return [manifest_path, sw_path]
+
+    @staticmethod
+    def register_in_page(html: str) -> str:
+        """Добавляет в страницу регистрацию sw.js (перед </body>)"""
+        if REGISTER_SCRIPT in html:
+            return html
+        index = html.rfind('</body>')
+        if index == -1:
+            return html + REGISTER_SCRIPT
+        return html[:index] + REGISTER_SCRIPT + html[index:]
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сжатие имён классов (config.json: "mangle_classes": true
+                     или "mangle_classes": {"reserved": ["search-client-wrap", "modal*"]})
+
+Генерируемые классы (section-header, header-1-2-1, content-title, _col-2, ...)
+повторяются в HTML и CSS тысячи раз. После сборки они заменяются короткими
+именами (a, b, ..., a0, ...) согласованно во всех страницах, секциях, style.css,
+report.css и inline critical CSS. Самые частые классы получают самые короткие имена.
+
+Классы, которые создаёт JS (functions.js: content-${key}, field-paymet, ...),
+переводятся той же таблицей: она записывается в начало script.js как window.CLASS_MAP.
+
+Не переименовываются (reserved):
+- классы, которые читает рукописный JS (RUNTIME_SELECTORS из production_processor);
+- классы, попадающие под [class*=...]/[class^=...] в CSS и JS;
+- значения data-toggle (JS ищет элемент по классу с этим именем);
+- имена и шаблоны fnmatch из "reserved" в config.json.
+"""
+
+import fnmatch
+import json
+import re
+from collections import Counter
+from itertools import count, product
+from string import ascii_lowercase, digits
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from processors.production_processor import CLASS_NAME_ATTRIBUTES, RUNTIME_SELECTORS
+from utils.css_parser import parse_compound, parse_css, rename_selector_classes, rewrite_selectors, split_compounds
+
+
+_IDENT_RE = re.compile(r'-?[_a-zA-Z][\w-]*')
+_TAG_RE = re.compile(r'<(script|style)\b([^>]*)>(.*?)</\1\s*>|<!--.*?-->|<([a-zA-Z][\w-]*)([^>]*)>',
+                     re.DOTALL | re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+_CLASS_ATTR_RE = re.compile(r'(\sclass\s*=\s*)(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+
+
+def get_mangle_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, List[str]]]:
+    """
+    Читает настройки сжатия классов из config.json
+
+    Returns:
+        {'reserved': [имена и шаблоны]} или None если режим выключен
+    """
+    value = (app_config or {}).get('mangle_classes')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {'reserved': [str(name) for name in settings.get('reserved', [])]}
+
+
+def _short_names():
+    """a ... z, a0 ... z9, aa ... - первый символ всегда буква"""
+    for length in count(1):
+        for first in ascii_lowercase:
+            for rest in product(ascii_lowercase + digits, repeat=length - 1):
+                yield first + ''.join(rest)
+
+
+class ClassMangler:
+    """Строит таблицу коротких имён классов и применяет её к HTML, CSS и JS"""
+
+    def __init__(self, css_content: str, reserved: Iterable[str] = ()):
+        """
+        Args:
+            css_content: Итоговый style.css
+            reserved: Имена и шаблоны fnmatch классов, которые нельзя переименовывать
+        """
+        self.css_content = css_content or ''
+        self.reserved_patterns = list(reserved)
+        self.class_map: Dict[str, str] = {}
+        # Подстроки из [class*=...], [class^=...] и т.п.: классы с ними не трогаем
+        self._class_substrings: Set[str] = set()
+        self._css_classes: Counter = Counter()
+        self._runtime_classes: Set[str] = set()
+        self._collect_selectors(self.css_content)
+        for selector in RUNTIME_SELECTORS:
+            self._add_selector(selector, runtime=True)
+
+    def _collect_selectors(self, css: str):
+        def walk(rules):
+            for rule in rules:
+                if rule.children:
+                    walk(rule.children)
+                for selector in rule.selectors:
+                    self._add_selector(selector)
+        walk(parse_css(css))
+
+    def _add_selector(self, selector: str, runtime: bool = False):
+        for compound in split_compounds(selector):
+            parts = parse_compound(compound)
+            if runtime:
+                self._runtime_classes.update(parts['class'])
+            else:
+                self._css_classes.update(parts['class'])
+            for name, op, value in parts['attr']:
+                if name.lower() == 'class' and op and value:
+                    self._class_substrings.add(value)
+
+    def build_map(self, html_texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Строит таблицу по индексу классов: частота в HTML + CSS
+
+        Args:
+            html_texts: HTML всех страниц и секций
+
+        Returns:
+            {класс: короткое имя}
+        """
+        usage = Counter(self._css_classes)
+        reserved = set()
+        for html_text in html_texts:
+            for tag_match in _TAG_RE.finditer(html_text):
+                if not tag_match.group(4):
+                    continue
+                for attr_match in _ATTR_RE.finditer(tag_match.group(5)):
+                    name = attr_match.group(1).lower()
+                    value = next((v for v in attr_match.group(2, 3, 4) if v is not None), '')
+                    if name == 'class':
+                        usage.update(value.split())
+                    elif name in CLASS_NAME_ATTRIBUTES:
+                        reserved.add(value)
+
+        taken = set(usage) | self._runtime_classes | reserved
+        candidates = [
+            name for name, _ in sorted(usage.items(), key=lambda item: (-item[1], item[0]))
+            if name not in reserved and name not in self._runtime_classes and not self._is_reserved(name)
+        ]
+        names = _short_names()
+        self.class_map = {}
+        for class_name in candidates:
+            short = next(names)
+            while short in taken or any(sub in short for sub in self._class_substrings):
+                short = next(names)
+            if len(short) < len(class_name):
+                self.class_map[class_name] = short
+        return self.class_map
+
+    def _is_reserved(self, class_name: str) -> bool:
+        if not _IDENT_RE.fullmatch(class_name):
+            return True
+        if any(sub in class_name for sub in self._class_substrings):
+            return True
+        return any(fnmatch.fnmatchcase(class_name, pattern) for pattern in self.reserved_patterns)
+
+    # --- Применение таблицы ---
+
+    def rewrite_css(self, css: str) -> str:
+        """Переименовывает классы в селекторах (тела правил не меняются)"""
+        if not self.class_map:
+            return css
+        return rewrite_selectors(css, lambda prelude: rename_selector_classes(prelude, self.class_map))
+
+    def rewrite_html(self, html_text: str) -> str:
+        """Переименовывает классы в атрибутах class и во inline <style>; скрипты и комментарии не меняются"""
+        if not self.class_map:
+            return html_text
+
+        def replace_tag(match):
+            if match.group(1):
+                if match.group(1).lower() != 'style':
+                    return match.group(0)
+                text = match.group(0)
+                start, end = match.start(3) - match.start(0), match.end(3) - match.start(0)
+                return text[:start] + self.rewrite_css(match.group(3)) + text[end:]
+            if not match.group(4):
+                return match.group(0)
+            return f"<{match.group(4)}{_CLASS_ATTR_RE.sub(replace_class, match.group(5))}>"
+
+        def replace_class(match):
+            value = next(v for v in match.group(2, 3, 4) if v is not None)
+            classes = ' '.join(self.class_map.get(name, name) for name in value.split())
+            return f'{match.group(1)}"{classes}"'
+
+        return _TAG_RE.sub(replace_tag, html_text)
+
+    def js_map_script(self) -> str:
+        """Таблица для JS (начало script.js): классы, которые создаёт functions.js, переводятся ею же"""
+        return f"// class_map\nwindow.CLASS_MAP = {json.dumps(self.class_map, ensure_ascii=False, sort_keys=True)};\n\n"
@@ -4,16 +4,18 @@
 Процессор циклов - обрабатывает циклы cycle
 """
 
-import json
 from typing import Any, Dict, Optional
 
+from processors.template_registry import template_id_attr
+from utils.selector_utils import col_marker_classes
+
 
 class CycleProcessor:
     """Обрабатывает циклы cycle"""
     
     def process_cycle(self, cycle_data: Dict, bd_sources: Dict, template_processor, database_processor, cycle_key: str = 'cycle', original_cycle_key: str = None) -> str:
         """
-        Обрабатывает цикл и генерирует контейнер с data-template
+        Обрабатывает цикл и генерирует контейнер с data-template-id
         
         Args:
             cycle_data: Данные цикла
@@ -24,7 +26,7 @@ class CycleProcessor:
             original_cycle_key: Оригинальный ключ цикла (cycle_gr8, cycle_gr8 col:2,1,1 и т.д.)
             
         Returns:
-            HTML строка с контейнером div и data-template
+            HTML строка с контейнером div и data-template-id
         """
         if not isinstance(cycle_data, dict):
             return ''
@@ -40,7 +42,7 @@ class CycleProcessor:
                     if bd_html:
                         html_parts.append(bd_html)
         
-        # Определяем классы для div[data-template]
+        # Определяем классы для div[data-template-id]
         classes = []
         
         # Добавляем класс из оригинального ключа (например, gr8 из cycle_gr8)
@@ -59,11 +61,13 @@ class CycleProcessor:
             classes.append(f'_col-{col_num}')
             if col_num == '1':
                 contents_attr = ' style="display:contents"'
+            # Классовый режим селекторов: маркеры _cols-N вместо [class*='_col-N']
+            classes.extend(col_marker_classes(classes))
         
         class_attr = f' class="{" ".join(classes)}"' if classes else ''
         
-        # Создаем контейнер с data-template для cycle
-        # Передаем всю структуру cycle (включая сам cycle) в data-template
+        # Создаем контейнер шаблона для cycle
+        # В реестр шаблонов передаем всю структуру cycle (включая сам cycle)
         cycle_template = {'cycle': cycle_data}
         template_attrs = template_processor.generate_template_attrs(cycle_template)
         
@@ -77,15 +81,13 @@ class CycleProcessor:
                     all_classes = f"{existing_classes} {' '.join(classes)}".strip()
                     template_attrs = template_attrs.replace(f'class="{existing_classes}"', f'class="{all_classes}"')
                 else:
-                    # Если нет class, добавляем перед data-template
+                    # Если нет class, добавляем перед data-template-id
                     template_attrs = f'{class_attr}{template_attrs}'
             html_parts.append(f'<div{template_attrs}{contents_attr}></div>')
         else:
-            # Если template_attrs пустой, все равно создаем контейнер с data-template
+            # Если template_attrs пустой, все равно создаем контейнер шаблона
             # (для случая когда cycle содержит div_field-paymet с api: префиксами)
-            template_json = json.dumps(cycle_template, ensure_ascii=False)
-            # Используем одинарные кавычки для атрибута, чтобы не экранировать двойные кавычки в JSON
-            html_parts.append(f"<div{class_attr} data-template='{template_json}'{contents_attr}></div>")
+            html_parts.append(f"<div{class_attr}{template_id_attr(cycle_template)}{contents_attr}></div>")
         
         return ''.join(html_parts)
     
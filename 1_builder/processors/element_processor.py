@@ -14,6 +14,8 @@ from processors.template_processor import TemplateProcessor
 from processors.database_processor import DatabaseProcessor
 from processors.cycle_processor import CycleProcessor
 from processors.element_type_detector import ElementTypeDetector
+from processors.modal_fragments import attach_modal
+from utils.selector_utils import col_marker_classes
 from utils.element_utils import (
     parse_html_tag, extract_link_info
 )
@@ -130,7 +132,8 @@ class ElementProcessor:
                         # Создаем кнопку
                         button_element = ElementFactory.create(nested_key, nested_value, context_with_path)
                         if button_element:
-                            return button_element.render() + modal_html
+                            # В режиме lazy_modals модалка уходит во фрагмент, кнопка получает data-modal-src
+                            return attach_modal(button_element.render(), modal_html)
         
         elif element_type == 'complex':
             # Сложная структура - обрабатываем рекурсивно
@@ -146,10 +149,7 @@ class ElementProcessor:
         element = ElementFactory.create(key, element_data, context_with_path)
         
         if element:
-            html = element.render()
-            if modal_html:
-                return html + modal_html
-            return html
+            return attach_modal(element.render(), modal_html)
         
         # 8. Если это сложная структура, обрабатываем рекурсивно
         if isinstance(element_data, dict):
@@ -234,6 +234,8 @@ class ElementProcessor:
                         # Для процентных колонок добавляем класс с процентом
                         percent = int(col_info['percentage'])
                         classes.append(f"_col-{percent}pct")
+                    # Классовый режим селекторов: маркеры _cols-N вместо [class*='_col-N']
+                    classes.extend(col_marker_classes(classes))
                 
                 attrs = f' class="{" ".join(classes)}"' if classes else ''
                 
@@ -257,7 +259,7 @@ class ElementProcessor:
                     is_template = self.template_processor.is_template(value, bd_sources)
                     
                     if is_template:
-                        # Это шаблон - генерируем только контейнер с data-template
+                        # Это шаблон - генерируем только контейнер с data-template-id
                         template_attrs = self.template_processor.generate_template_attrs(value)
                         html_parts.append(f"<{tag_name}{attrs}{template_attrs}></{tag_name}>")
                     else:
@@ -312,7 +314,7 @@ class ElementProcessor:
                     is_template = self.template_processor.is_template(value, bd_sources)
                     
                     if is_template:
-                        # Это шаблон - генерируем только контейнер с data-template
+                        # Это шаблон - генерируем только контейнер с data-template-id
                         template_attrs = self.template_processor.generate_template_attrs(value)
                         # Определяем тег контейнера (div по умолчанию)
                         tag_name = 'div'
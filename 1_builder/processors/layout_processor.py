@@ -7,6 +7,8 @@
 from typing import Dict, List
 from .element_processor import ElementProcessor
 from utils.path_utils import PathUtils
+from utils.selector_utils import COLUMN_CLASS, is_class_selectors_enabled, path_class
+from utils.grid_layout_utils import GRID_CLASS, cell_class, get_section_grid, is_grid_layout, is_stacked_column, stack_class
 
 
 class LayoutProcessor:
@@ -36,6 +38,9 @@ class LayoutProcessor:
         Returns:
             HTML строка с полной структурой
         """
+        if is_grid_layout():
+            return self._generate_grid_html()
+        
         html_parts = [f'<div class="layout section-{self.section_name}">']
         
         # Проверяем, есть ли колонки
@@ -59,6 +64,70 @@ class LayoutProcessor:
             print(f"   ✅ Script теги найдены в layout_processor для секции {self.section_name}")
         return result
     
+    def _generate_grid_html(self) -> str:
+        """
+        Генерирует плоскую структуру для grid-движка (config.json: "layout_engine": "grid")
+        
+        .column - grid-контейнер, его дети - ячейки (колонка, строка): группа строки
+        с классом _cell-C-R, а если групп в строке несколько - обёртка row row_N.
+        Обёртки col_N и одиночные row_N не выводятся, размещение задаёт CSS. Колонка из
+        нескольких строк рядом с другими - одна ячейка-стопка _cell-C (is_stacked_column).
+        Секция из одних строк grid не требует: ячейки идут в .layout друг под другом.
+        
+        Returns:
+            HTML строка
+        """
+        html_parts = [f'<div class="layout section-{self.section_name}">']
+        
+        columns = self._get_columns()
+        if columns:
+            html_parts.append(f'<div class="column {GRID_CLASS}">')
+            grid = get_section_grid(self.html_config)
+            for col_key in columns:
+                self.current_col = col_key.split('_')[1]
+                col_config = self.html_config[col_key]
+                rows = sorted([k for k in col_config.keys() if k.startswith('row_')])
+                if is_stacked_column(grid, self.current_col):
+                    html_parts.append(f'<div class="{stack_class(self.current_col)}">')
+                    html_parts.append(self._generate_grid_cells(col_config, rows, in_stack=True))
+                    html_parts.append('</div>')
+                else:
+                    html_parts.append(self._generate_grid_cells(col_config, rows))
+            html_parts.append('</div>')
+        else:
+            html_parts.append(self._generate_grid_cells(self.html_config, self._get_rows()))
+        
+        html_parts.append('</div>')
+        return ''.join(html_parts)
+    
+    def _generate_grid_cells(self, config: Dict, rows: List[str], in_stack: bool = False) -> str:
+        """
+        Генерирует ячейки grid для строк одной колонки
+        
+        Args:
+            config: Конфиг колонки или секции
+            rows: Список ключей строк
+            in_stack: Строки внутри ячейки-стопки (без классов ячеек)
+            
+        Returns:
+            HTML строка
+        """
+        html_parts = []
+        for row_key in rows:
+            self.current_row = row_key.split('_')[1]
+            cell = '' if in_stack else cell_class(self._get_current_col_num(), self.current_row)
+            row_config = config[row_key]
+            groups = sorted([k for k in row_config.keys() if k.startswith('gr_')])
+            
+            if len(groups) == 1:
+                # Единственная группа сама становится ячейкой
+                html_parts.append(self._generate_groups(row_config, groups, extra_class=cell))
+            else:
+                html_parts.append(f'<div class="{f"row {row_key} {cell}".rstrip()}">')
+                html_parts.append(self._generate_groups(row_config, groups))
+                html_parts.append('</div>')
+        return ''.join(html_parts)
+    
     def _get_columns(self) -> List[str]:
         """Получает список колонок"""
         return sorted([k for k in self.html_config.keys() 
@@ -87,6 +156,9 @@ class LayoutProcessor:
             
             # Нормализуем имя класса к col_X
             col_class = col_key.replace('column_', 'col_')
+            if is_class_selectors_enabled():
+                # Маркер вместо [class^='col_'] (col_N остаётся первым классом)
+                col_class += f' {COLUMN_CLASS}'
             
             html_parts.append(f'<div class="{col_class}">')
             
@@ -148,13 +220,14 @@ class LayoutProcessor:
         
         return ''.join(html_parts)
     
-    def _generate_groups(self, row_config: Dict, groups: List[str]) -> str:
+    def _generate_groups(self, row_config: Dict, groups: List[str], extra_class: str = '') -> str:
         """
         Генерирует HTML для групп внутри строки
         
         Args:
             row_config: Конфиг строки
             groups: Список ключей групп (gr_1, gr_2, etc)
+            extra_class: Дополнительный класс группы (ячейка grid-разметки)
             
         Returns:
             HTML строка
@@ -180,6 +253,8 @@ class LayoutProcessor:
             
             # Класс группы: {СЕКЦИЯ}-{КОЛОНКА}-{СТРОКА}-{ГРУППА}
             group_class = f"{self.section_name}-{col_num}-{row_num}-{group_num}"
+            if extra_class:
+                group_class += f" {extra_class}"
             
             # Генерируем открывающий тег
             if tag == 'a' and href:
@@ -223,5 +298,7 @@ class LayoutProcessor:
         # Получаем HTML элемента
         element_html = self.element_processor.process_element(element_path)
         
-        # Оборачиваем в marking-item
-        return f'<div class="marking-item" data-path="{element_path}">{element_html}</div>'
+        # Оборачиваем в marking-item (в классовом режиме - с маркером _path-X вместо [data-path='X'])
+        marker = path_class(element_path)
+        wrapper_class = f'marking-item {marker}' if marker else 'marking-item'
+        return f'<div class="{wrapper_class}" data-path="{element_path}">{element_html}</div>'
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ленивые модалки (config.json: "lazy_modals": true или {"prefetch": true})
+
+Модалка кнопки (["button", "text:...", "modal:id", {...}]) не выводится в страницу,
+а сохраняется отдельным фрагментом fragments/modal-<хэш>.html. Кнопка получает
+data-modal-src, modal_1.js загружает фрагмент при первом открытии и вставляет его
+сразу после кнопки - туда же, где модалка стояла бы в странице, поэтому селекторы
+CSS срабатывают как раньше.
+
+С prefetch страница подключает фрагменты через <link rel="prefetch">: браузер
+загружает их в простое, и первое открытие берёт фрагмент из кэша.
+
+Фрагменты загружаются fetch(), поэтому режим работает только через HTTP (не file://).
+"""
+
+import hashlib
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from core.output_sink import OutputSink
+
+
+FRAGMENTS_DIR_NAME = 'fragments'
+MODAL_SRC_ATTR = 'data-modal-src'
+
+_MODAL_ATTR_RE = re.compile(r'(\sdata-modal="[^"]*")')
+_MODAL_SRC_RE = re.compile(rf'{MODAL_SRC_ATTR}="\.\./{FRAGMENTS_DIR_NAME}/([^"]+)"')
+
+# Состояние режима (задаётся один раз до генерации, дальше только читается)
+_settings: Optional[Dict[str, bool]] = None
+# Фрагменты сборки: имя файла -> HTML
+_fragments: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def get_lazy_modal_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, bool]]:
+    """
+    Читает настройки ленивых модалок из config.json
+
+    Returns:
+        {'prefetch': bool} или None если режим выключен
+    """
+    value = (app_config or {}).get('lazy_modals')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {'prefetch': bool(settings.get('prefetch', False))}
+
+
+def init_lazy_modals(app_config: Optional[Dict[str, Any]]):
+    """
+    Инициализирует режим ленивых модалок
+
+    Args:
+        app_config: Настройки сборки из config.json
+    """
+    global _settings
+    _settings = get_lazy_modal_settings(app_config)
+
+
+def is_lazy_modals_enabled() -> bool:
+    """Выносятся ли модалки кнопок во фрагменты"""
+    return _settings is not None
+
+
+def is_prefetch_enabled() -> bool:
+    """Подключать ли фрагменты страницы через <link rel="prefetch">"""
+    return bool(_settings and _settings['prefetch'])
+
+
+def attach_modal(trigger_html: str, modal_html: str) -> str:
+    """
+    Соединяет кнопку и её модалку
+
+    В ленивом режиме модалка регистрируется фрагментом, а кнопка (с data-modal)
+    получает data-modal-src. Вне режима или если элемент не открывает модалку -
+    модалка выводится сразу после кнопки, как раньше.
+
+    Args:
+        trigger_html: HTML кнопки
+        modal_html: HTML модалки
+
+    Returns:
+        HTML для страницы
+    """
+    if not modal_html or not is_lazy_modals_enabled() or not _MODAL_ATTR_RE.search(trigger_html):
+        return trigger_html + modal_html
+    name = register_fragment(modal_html)
+    src_attr = f' {MODAL_SRC_ATTR}="../{FRAGMENTS_DIR_NAME}/{name}"'
+    return _MODAL_ATTR_RE.sub(lambda m: m.group(1) + src_attr, trigger_html, count=1)
+
+
+def register_fragment(html: str) -> str:
+    """
+    Регистрирует фрагмент (одинаковые модалки разных страниц - один файл)
+
+    Returns:
+        Имя файла фрагмента
+    """
+    name = f"modal-{hashlib.sha256(html.encode('utf-8')).hexdigest()[:10]}.html"
+    with _lock:
+        _fragments.setdefault(name, html)
+    return name
+
+
+def get_fragment_names(html: str) -> List[str]:
+    """Фрагменты, на которые ссылаются кнопки HTML (в порядке появления, без повторов)"""
+    return list(dict.fromkeys(name for name in _MODAL_SRC_RE.findall(html) if name in _fragments))
+
+
+def expand_fragments(html: str) -> str:
+    """
+    HTML вместе с фрагментами его модалок (для поиска шаблонов, источников bd и т.п.)
+
+    Фрагменты могут ссылаться на свои фрагменты (кнопка модалки внутри модалки).
+    """
+    parts = [html]
+    seen = set()
+    pending = get_fragment_names(html)
+    while pending:
+        name = pending.pop(0)
+        if name in seen:
+            continue
+        seen.add(name)
+        parts.append(_fragments[name])
+        pending.extend(get_fragment_names(_fragments[name]))
+    return ''.join(parts)
+
+
+def save_fragments(sink: OutputSink, output_dir: str = FRAGMENTS_DIR_NAME) -> List[str]:
+    """
+    Сохраняет все зарегистрированные фрагменты
+
+    Args:
+        sink: Результат сборки
+        output_dir: Директория фрагментов в результате
+
+    Returns:
+        Пути сохранённых файлов в результате
+    """
+    sink.make_dir(output_dir)
+    return [sink.write_text(f"{output_dir}/{name}", html) for name, html in sorted(_fragments.items())]
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Production-режим HTML (build.py --production)
+
+Готовые страницы и секции переписываются без изменения внешнего вида и поведения:
+- удаляются комментарии;
+- удаляются data-* атрибуты, которые не читает ни CSS, ни JS;
+- из class удаляются классы, на которые не ссылаются ни CSS, ни JS;
+- пробелы между тегами схлопываются до одного, в <head> убираются совсем;
+- JSON в <script type="application/json"> записывается без отступов.
+
+Что читает JS, задано явным списком RUNTIME_SELECTORS: при добавлении в js/
+нового getAttribute('data-...') или querySelector('.класс') его нужно дописать сюда.
+Обёртки layout (marking-item, row_N, col_N) остаются: на них есть общие правила
+CSS (.marking-item, .row, [class^='col_']), и их удаление меняет раскладку.
+"""
+
+import html
+import json
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.output_sink import OutputSink
+from utils.css_parser import CSSRule, attr_value_matches, parse_compound, parse_css, split_compounds
+
+
+# Селекторы и атрибуты, которые читает JS (js/*.js): querySelector/closest/matches,
+# getAttribute/hasAttribute, classList.contains. [attr] - нужен атрибут с любым значением
+RUNTIME_SELECTORS = (
+    # burger_menu_toggle.js
+    "[data-path='header_menu']", 'nav.menu1', 'icon.content-burger',
+    # modal_1.js
+    '[data-modal]', '[data-modal-src]', '[data-modal-close]', "[class*='modal']", '.active', '.content-close',
+    '[data-toggle]', '.visible',
+    # functions.js
+    '[data-template-id]', '[data-template-registry]', '[data-source]', '[data-bd-source]',
+    '[data-bd-api]', '[data-bd-url]', '[data-bd-filter]', '[data-bd-link]', '[data-api-url]', '[data-function-sum]',
+    '[data-function-result]', '[data-required-one]', '[data-if-labels]',
+    '[data-button-json]', '[data-button-json-config]', '[data-save-bd]', '[data-save-bd-config]',
+    '.fp04-field', '.selected', '.gr', '.wr-fields', '.field', '.content-suffix', '.spoiler',
+    '.btn_details', '.card', '.div_card', '.open', '.search-client-wrap', '.opened',
+    # form_button_json.js (rowsSelector из button_json/*.json)
+    '[data-action]',
+    # page_nav.js
+    '[data-page-fragments]', '[data-fragment-hash]',
+)
+
+# Атрибуты, значения которых JS использует как имя класса (querySelector(`.${toggleTarget}`))
+CLASS_NAME_ATTRIBUTES = ('data-toggle',)
+
+# Элементы, содержимое которых выводится как есть
+PRESERVE_TAGS = ('pre', 'textarea')
+# Элементы без отрисовки: пробелы вокруг них не видны и переносятся за них
+SILENT_TAGS = ('script', 'style', 'link', 'meta', 'template')
+
+_START_TAG_RE = re.compile(r'<([^\s/>]+)(.*?)\s*(/?)>$', re.DOTALL)
+_ATTR_RE = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+))?')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class _References:
+    """Классы и атрибуты (с условиями на значение), на которые ссылаются селекторы"""
+
+    def __init__(self):
+        self.classes: Set[str] = set()
+        self.attrs: Dict[str, List[Tuple[Optional[str], Optional[str]]]] = {}
+
+    def add_rules(self, rules: List[CSSRule]):
+        for rule in rules:
+            if rule.children:
+                self.add_rules(rule.children)
+            for selector in rule.selectors:
+                self.add_selector(selector)
+
+    def add_selector(self, selector: str):
+        for compound in split_compounds(selector):
+            parts = parse_compound(compound)
+            self.classes.update(parts['class'])
+            for name, op, value in parts['attr']:
+                self.attrs.setdefault(name.lower(), []).append((op, value))
+
+    def keeps_attr(self, name: str, value: str) -> bool:
+        """Может ли хоть один селектор сработать на атрибут с таким значением"""
+        return any(attr_value_matches(op, expected, value) for op, expected in self.attrs.get(name, ()))
+
+
+class ProductionHTMLProcessor:
+    """Переписывает HTML страниц и секций для production-режима"""
+
+    def __init__(self, css_content: str):
+        """
+        Args:
+            css_content: Итоговый style.css (по нему определяется, какие классы и атрибуты нужны)
+        """
+        self.refs = _References()
+        self.refs.add_rules(parse_css(css_content or ''))
+        for selector in RUNTIME_SELECTORS:
+            self.refs.add_selector(selector)
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def process(self, html_text: str) -> str:
+        """
+        Args:
+            html_text: HTML страницы или секции
+
+        Returns:
+            Переписанный HTML
+        """
+        # Классы, которые JS найдёт по значению data-toggle
+        class_names = set()
+        for name in CLASS_NAME_ATTRIBUTES:
+            for match in re.finditer(rf'\s{name}\s*=\s*["\']?([^"\'\s>]+)', html_text):
+                class_names.add(html.unescape(match.group(1)))
+        # Секции и фрагменты модалок без <body> - это содержимое body
+        fragment = not re.search(r'<body[\s>]', html_text, re.IGNORECASE)
+        rewriter = _HTMLRewriter(self.refs, class_names, fragment)
+        rewriter.feed(html_text)
+        rewriter.close()
+        result = rewriter.result()
+        self.bytes_before += len(html_text.encode('utf-8'))
+        self.bytes_after += len(result.encode('utf-8'))
+        return result
+
+    def process_file(self, sink: OutputSink, path: str):
+        """Переписывает файл результата на месте"""
+        sink.write_text(path, self.process(sink.read_text(path)))
+
+
+class _HTMLRewriter(HTMLParser):
+    """Потоковая перезапись HTML: теги и текст выводятся по мере разбора"""
+
+    def __init__(self, refs: _References, class_names: Set[str], fragment: bool = False):
+        super().__init__(convert_charrefs=False)
+        self.refs = refs
+        self.class_names = class_names
+        self.out: List[str] = []
+        self.in_body = fragment
+        self.pending_space = False   # пробел, который выводится перед следующим видимым содержимым
+        self.preserve_depth = 0      # глубина внутри pre/textarea
+        self.raw_text = False        # внутри <script>/<style>
+        self.json_script = False     # внутри <script type="application/json">
+        self.script_data: List[str] = []
+
+    def result(self) -> str:
+        return ''.join(self.out)
+
+    # --- Теги ---
+
+    def handle_starttag(self, tag, attrs):
+        self._emit_tag(tag, self._rewrite_start_tag(tag, dict(attrs)))
+        if tag == 'body':
+            self.in_body = True
+        elif tag in PRESERVE_TAGS:
+            self.preserve_depth += 1
+        elif tag in ('script', 'style'):
+            self.raw_text = True
+            self.json_script = tag == 'script' and (dict(attrs).get('type') or '').lower() == 'application/json'
+            self.script_data = []
+
+    def handle_startendtag(self, tag, attrs):
+        self._emit_tag(tag, self._rewrite_start_tag(tag, dict(attrs)))
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            if self.json_script:
+                self.out.append(self._json_content())
+            self.raw_text = False
+            self.json_script = False
+        elif tag in PRESERVE_TAGS and self.preserve_depth:
+            self.preserve_depth -= 1
+        elif tag == 'body':
+            # Пробелы в конце body не отображаются
+            self.in_body = False
+        self._emit_tag(tag, f'</{tag}>')
+
+    def _emit_tag(self, tag: str, text: str):
+        if not self.in_body:
+            # Вне body пробелы между тегами не отображаются
+            self.pending_space = False
+        elif tag not in SILENT_TAGS:
+            self._flush_space()
+        self.out.append(text)
+
+    def _rewrite_start_tag(self, tag: str, attrs: Dict[str, Optional[str]]) -> str:
+        """Собирает открывающий тег без лишних атрибутов и классов (исходные кавычки и регистр сохраняются)"""
+        raw = self.get_starttag_text() or f'<{tag}>'
+        match = _START_TAG_RE.match(raw)
+        if not match:
+            return raw
+        name, attrs_text, self_closing = match.groups()
+        chunks = []
+        for attr_match in _ATTR_RE.finditer(attrs_text):
+            attr_name = attr_match.group(1).lower()
+            value = attrs.get(attr_name)
+            if attr_name.startswith('data-') and not self.refs.keeps_attr(attr_name, value or ''):
+                continue
+            if attr_name == 'class' and value is not None:
+                classes = self._prune_classes(value)
+                if classes is None:
+                    continue
+                if classes != value:
+                    chunks.append(f'class="{html.escape(classes)}"')
+                    continue
+            chunks.append(attr_match.group(0))
+        attrs_html = ''.join(' ' + chunk for chunk in chunks)
+        return f"<{name}{attrs_html}{'/' if self_closing else ''}>"
+
+    def _prune_classes(self, value: str) -> Optional[str]:
+        """
+        Оставляет классы, на которые есть ссылки
+
+        Returns:
+            Новое значение class (None - атрибут не нужен)
+        """
+        kept = ' '.join(t for t in value.split() if t in self.refs.classes or t in self.class_names)
+        class_selectors = self.refs.attrs.get('class', ())
+        new_value = kept if kept or any(op is None for op, _ in class_selectors) else None
+        # Селекторы по строке классов ([class^='col_'], [class*='modal']) должны срабатывать как раньше
+        for op, expected in class_selectors:
+            after = new_value is not None and attr_value_matches(op, expected, new_value)
+            if attr_value_matches(op, expected, value) != after:
+                return value
+        return new_value
+
+    # --- Текст ---
+
+    def handle_data(self, data):
+        if self.json_script:
+            self.script_data.append(data)
+            return
+        if self.raw_text:
+            self.out.append(data)
+            return
+        if self.preserve_depth:
+            self._flush_space()
+            self.out.append(data)
+            return
+        text = _SPACE_RE.sub(' ', data)
+        if not text.strip():
+            self.pending_space = self.pending_space or bool(text)
+            return
+        if text[0] == ' ':
+            self.pending_space = True
+        self._flush_space()
+        self.out.append(text.strip(' '))
+        self.pending_space = text[-1] == ' '
+
+    def handle_entityref(self, name):
+        self._flush_space()
+        self.out.append(f'&{name};')
+
+    def handle_charref(self, name):
+        self._flush_space()
+        self.out.append(f'&#{name};')
+
+    def _flush_space(self):
+        if self.pending_space:
+            self.out.append(' ')
+        self.pending_space = False
+
+    def _json_content(self) -> str:
+        """Содержимое JSON-скрипта без отступов (при ошибке разбора - как было)"""
+        raw = ''.join(self.script_data)
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return raw.strip()
+        # </ внутри строк не должен закрывать <script>
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+    # --- Прочее ---
+
+    def handle_comment(self, data):
+        # Условные комментарии IE остаются, остальные удаляются
+        if data.startswith('[if') or data.startswith('[endif'):
+            self.out.append(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.out.append(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self.out.append(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        self.out.append(f'<![{data}]>')
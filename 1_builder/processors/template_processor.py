@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Процессор шаблонов - генерирует шаблоны с data-template атрибутами
+Процессор шаблонов - генерирует контейнеры шаблонов с data-template-id
 """
 
-import json
 from typing import Any, Dict, Optional
 
+from processors.template_registry import template_id_attr
+
 
 class TemplateProcessor:
-    """Генерирует шаблоны с data-template атрибутами"""
+    """Генерирует контейнеры шаблонов с data-template-id (шаблоны - в реестре страницы)"""
     
     def is_template(self, element_dict: Dict, bd_sources: Dict) -> bool:
         """
@@ -55,13 +56,13 @@ class TemplateProcessor:
     
     def generate_template_attrs(self, element_dict: Dict) -> str:
         """
-        Генерирует data-template атрибуты для шаблона
+        Регистрирует шаблон и генерирует атрибут data-template-id
         
         Args:
             element_dict: Словарь с элементами шаблона
             
         Returns:
-            Строка с data-template атрибутами или пустая строка
+            Строка с атрибутом data-template-id или пустая строка
         """
         def has_direct_api_prefix(value: Any) -> bool:
             """Проверяет наличие api: префиксов ТОЛЬКО на первом уровне (не рекурсивно)"""
@@ -99,10 +100,8 @@ class TemplateProcessor:
         has_cycle = self._has_cycle_recursive(element_dict)
         
         if has_api or has_bd_source or has_cycle:
-            # Генерируем JSON с шаблоном для JavaScript
-            template_json = json.dumps(element_dict, ensure_ascii=False)
-            # Используем одинарные кавычки для атрибута, чтобы не экранировать двойные кавычки в JSON
-            return f" data-template='{template_json}'"
+            # Шаблон для JavaScript - в реестр, у контейнера только id
+            return template_id_attr(element_dict)
         
         return ''
     
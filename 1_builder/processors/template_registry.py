@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Реестр шаблонов - каждый шаблон хранится один раз за сборку
+
+Контейнер шаблона несёт только data-template-id="t<хэш>", сами шаблоны
+выводятся в конце страницы одним скриптом:
+
+    <script type="application/json" data-template-registry>{"t1a2b...": {...}}</script>
+
+Id - хэш содержимого, поэтому одинаковые шаблоны в разных секциях и на разных
+страницах получают один id. В реестр страницы попадают только её шаблоны.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Dict, Optional
+
+
+TEMPLATE_ID_ATTR = 'data-template-id'
+REGISTRY_ATTR = 'data-template-registry'
+
+_TEMPLATE_ID_RE = re.compile(rf'{TEMPLATE_ID_ATTR}="([^"]+)"')
+
+# Шаблоны сборки: id -> шаблон
+_templates: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def register_template(template: Any) -> str:
+    """
+    Регистрирует шаблон
+
+    Args:
+        template: Структура шаблона (порядок ключей важен - в нём JS создаёт элементы)
+
+    Returns:
+        Id шаблона
+    """
+    template_json = json.dumps(template, ensure_ascii=False)
+    template_id = 't' + hashlib.sha256(template_json.encode('utf-8')).hexdigest()[:10]
+    with _lock:
+        _templates.setdefault(template_id, template)
+    return template_id
+
+
+def template_id_attr(template: Any) -> str:
+    """Атрибут контейнера шаблона: ' data-template-id="..."'"""
+    return f' {TEMPLATE_ID_ATTR}="{register_template(template)}"'
+
+
+def get_template(template_id: str) -> Optional[Any]:
+    """Шаблон по id (None, если не зарегистрирован)"""
+    return _templates.get(template_id)
+
+
+def render_registry_script(html: str) -> str:
+    """
+    Скрипт-реестр с шаблонами, на которые ссылается HTML
+
+    Args:
+        html: HTML страницы или секции
+
+    Returns:
+        <script type="application/json" data-template-registry>...</script> или пустая строка
+    """
+    used = {}
+    for template_id in _TEMPLATE_ID_RE.findall(html):
+        if template_id not in used and template_id in _templates:
+            used[template_id] = _templates[template_id]
+    if not used:
+        return ''
+    # </ внутри строк не должен закрывать <script>
+    registry_json = json.dumps(used, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return f'<script type="application/json" {REGISTRY_ATTR}>{registry_json}</script>'
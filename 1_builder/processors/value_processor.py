@@ -5,12 +5,52 @@ value_processor.py - Обработка значений CSS с поддержк
 """
 
 import re
-from typing import Any, Dict, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 from colorsys import rgb_to_hls, hls_to_rgb
 
 # Глобальная переменная для библиотеки цветов
 _colors_config: Dict[str, str] = {}
 
+# Старые именованные цвета (для обратной совместимости, библиотека color.json их перекрывает)
+_NAMED_COLORS = {
+    'magenta': (255, 0, 255),
+    'cyan': (0, 255, 255),
+    'yellow': (255, 255, 0),
+    'red': (255, 0, 0),
+    'green': (0, 128, 0),
+    'lime': (0, 255, 0),  # Ярко-зеленый (lime)
+    'blue': (0, 0, 255),
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+}
+
+# Таблица палитры: имя цвета (в т.ч. gray_1, gray_2...) -> RGB, строится один раз в init_colors
+_palette: Dict[str, tuple] = dict(_NAMED_COLORS)
+
+_HEX_RE = re.compile(r'[0-9a-f]{3}|[0-9a-f]{6}')
+_DIGITS_RE = re.compile(r'^\d+$')
+_LEGACY_MODIFIER_RE = re.compile(r'^(\w+)-([\d.]+)$')
+_RGBA_RE = re.compile(r'rgba\(\s*(\d+),\s*(\d+),\s*(\d+),\s*([\d.]+)\s*\)')
+
+# Кэши разрешения значений (заменяются целиком в init_colors) и статистика попаданий [hits, misses]
+_caches: Dict[str, Dict] = {'rgb': {}, 'modifier': {}, 'resolve': {}}
+_cache_stats: Dict[str, list] = {name: [0, 0] for name in _caches}
+_MISSING = object()
+
+# Генераторы CSS работают параллельно (CSSGenerator, "css_workers"):
+# палитра и кэши после init_colors только читаются/дополняются, счётчики и реестр
+# CSS-переменных защищены блокировкой, переменные собираются по потокам (collect_css_vars)
+_lock = threading.Lock()
+_local = threading.local()
+
+# Режим CSS custom properties (config.json: "css_vars": true):
+# цвета из ссылок выводятся как var(--имя), значения собираются в блок :root -
+# по одной переменной на цвет (ссылки с тем же цветом получают ту же переменную)
+_css_vars_enabled: bool = False
+_css_vars: Dict[str, str] = {}
+
 
 def init_colors(colors_config: Dict[str, str]):
     """
@@ -19,8 +59,254 @@ def init_colors(colors_config: Dict[str, str]):
     Args:
         colors_config: Словарь с цветами из library/color.json
     """
-    global _colors_config
-    _colors_config = colors_config or {}
+    global _colors_config, _palette, _caches
+    colors_config = colors_config or {}
+    palette = _build_palette(colors_config)
+    # Подменяем состояние целиком: потоки видят либо старую, либо новую палитру с её кэшами
+    with _lock:
+        _colors_config = colors_config
+        _palette = palette
+        _caches = {name: {} for name in _caches}
+        for stats in _cache_stats.values():
+            stats[0] = stats[1] = 0
+
+
+def _parse_hex(hex_color: Any) -> Optional[tuple]:
+    """Разбирает hex-цвет ("#ff00ff", "ff00ff", "#fff") в RGB кортеж или None"""
+    if not isinstance(hex_color, str):
+        return None
+    hex_color = hex_color.lower()
+    if hex_color.startswith('#'):
+        hex_color = hex_color[1:]
+    if not _HEX_RE.fullmatch(hex_color):
+        return None
+    if len(hex_color) == 3:
+        # Короткий формат #fff -> #ffffff
+        hex_color = ''.join(c + c for c in hex_color)
+    return (int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16))
+
+
+def _build_palette(colors_config: Dict[str, Any]) -> Dict[str, tuple]:
+    """
+    Строит таблицу палитры из color.json
+    
+    Порядок приоритетов как при поиске: элементы массива (gray_1, gray_2...)
+    перекрывают одноимённые ключи, ключи библиотеки перекрывают старые именованные цвета.
+    """
+    palette = dict(_NAMED_COLORS)
+    indexed = {}
+    for name, value in colors_config.items():
+        # Если это массив, основной цвет - первый элемент
+        first = value[0] if isinstance(value, list) and value else value
+        rgb = _parse_hex(first)
+        if rgb is not None:
+            palette[name] = rgb
+        if isinstance(value, list):
+            for index, item in enumerate(value, 1):
+                rgb = _parse_hex(item)
+                if rgb is not None:
+                    indexed[f"{name}_{index}"] = rgb
+    palette.update(indexed)
+    return palette
+
+
+def _memoize(cache_name: str, key: Any, compute):
+    """
+    Возвращает значение из кэша или вычисляет и запоминает его
+    
+    Вычисление идёт без блокировки: при гонке два потока посчитают одно и то же
+    значение, результат одинаковый.
+    """
+    cache = _caches[cache_name]
+    value = cache.get(key, _MISSING)
+    with _lock:
+        _cache_stats[cache_name][0 if value is not _MISSING else 1] += 1
+    if value is _MISSING:
+        value = compute()
+        cache[key] = value
+    return value
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Статистика кэшей разрешения значений
+    
+    Returns:
+        {'rgb': {'hits': N, 'misses': M}, 'modifier': {...}, 'resolve': {...}}
+    """
+    with _lock:
+        return {name: {'hits': hits, 'misses': misses} for name, (hits, misses) in _cache_stats.items()}
+
+
+def init_css_vars(enabled: bool):
+    """
+    Включает/выключает режим CSS-переменных и очищает собранные переменные
+    
+    Args:
+        enabled: True - цвета из ссылок заменяются на var(--имя)
+    """
+    global _css_vars_enabled, _css_vars
+    with _lock:
+        _css_vars_enabled = bool(enabled)
+        _css_vars = {}
+
+
+def get_css_vars() -> Dict[str, str]:
+    """Возвращает собранные CSS-переменные {"--имя": "значение"}"""
+    with _lock:
+        return dict(_css_vars)
+
+
+@contextmanager
+def collect_css_vars() -> Iterator[Dict[str, str]]:
+    """
+    Собирает CSS-переменные, зарегистрированные в текущем потоке, в отдельный словарь
+    
+    Используется для блоков CSS, которые генерируются параллельно: имена внутри блока
+    назначаются в его собственном порядке, а merge_css_vars объединяет блоки
+    в исходном порядке - результат не зависит от того, какой поток закончил раньше.
+    """
+    collected: Dict[str, str] = {}
+    previous = getattr(_local, 'css_vars', None)
+    _local.css_vars = collected
+    try:
+        yield collected
+    finally:
+        _local.css_vars = previous
+
+
+def merge_css_vars(parts: List[str], collected: Dict[str, str]) -> List[str]:
+    """
+    Добавляет переменные блока в общий реестр
+    
+    Если имя уже занято другим значением, переменной блока назначается свободный
+    суффикс, а ссылки var(--имя) в тексте блока переименовываются.
+    
+    Args:
+        parts: Части CSS блока
+        collected: Переменные блока (из collect_css_vars)
+        
+    Returns:
+        Части CSS с учётом переименований
+    """
+    with _lock:
+        renames = _merge_into(_css_vars, collected)
+    return _rename_css_vars(parts, renames)
+
+
+def replay_css_vars(parts: List[str], collected: Dict[str, str]) -> List[str]:
+    """
+    Регистрирует переменные вложенного фрагмента (например, взятого из кэша) в текущем реестре
+    
+    Работает как merge_css_vars, но внутри collect_css_vars пишет в реестр потока.
+    
+    Args:
+        parts: Части CSS фрагмента
+        collected: Переменные фрагмента
+        
+    Returns:
+        Части CSS с учётом переименований
+    """
+    registry = getattr(_local, 'css_vars', None)
+    if registry is None:
+        with _lock:
+            renames = _merge_into(_css_vars, collected)
+    else:
+        renames = _merge_into(registry, collected)
+    return _rename_css_vars(parts, renames)
+
+
+def _merge_into(registry: Dict[str, str], collected: Dict[str, str]) -> Dict[str, str]:
+    """Добавляет переменные в реестр, возвращает переименования {старое имя: новое}"""
+    renames: Dict[str, str] = {}
+    for name, value in collected.items():
+        existing = _find_css_var(registry, value)
+        if existing is not None:
+            # Цвет уже есть в реестре - переменная блока заменяется ею
+            if existing != name:
+                renames[name] = existing
+            continue
+        if name not in registry:
+            registry[name] = value
+            continue
+        base_name = re.sub(r'-\d+$', '', name)
+        suffix = 2
+        new_name = f"{base_name}-{suffix}"
+        while new_name in collected or new_name in registry:
+            suffix += 1
+            new_name = f"{base_name}-{suffix}"
+        registry[new_name] = value
+        renames[name] = new_name
+    return renames
+
+
+def _rename_css_vars(parts: List[str], renames: Dict[str, str]) -> List[str]:
+    """Переименовывает ссылки var(--имя) в частях CSS"""
+    if not renames:
+        return parts
+    pattern = re.compile(r'var\((' + '|'.join(re.escape(name) for name in renames) + r')\)')
+    return [pattern.sub(lambda m: f"var({renames[m.group(1)]})", part) for part in parts]
+
+
+def generate_root_css() -> str:
+    """
+    Генерирует блок :root со всеми собранными CSS-переменными
+    
+    Returns:
+        CSS строка (пустая, если переменных нет)
+    """
+    css_vars = get_css_vars()
+    if not css_vars:
+        return ''
+    lines = [f"    {name}: {value};" for name, value in sorted(css_vars.items())]
+    return ":root {\n" + "\n".join(lines) + "\n}\n"
+
+
+def _register_css_var(ref: str, value: str) -> str:
+    """
+    Регистрирует цвет как CSS-переменную и возвращает var(...)
+    
+    Одна переменная на цвет: если цвет уже зарегистрирован (в том числе в другой записи -
+    #000000 и rgba(0, 0, 0, 1.0)), возвращается его переменная. Имя новой переменной
+    строится из первой ссылки на цвет: "page.bg-color.darker-80" -> --page-bg-color-darker-80,
+    "yellow.150" -> --yellow-150. Если имя уже занято другим цветом, добавляется суффикс -2, -3...
+    """
+    base_name = '--' + re.sub(r'[^a-z0-9_-]+', '-', ref.lower()).strip('-')
+    # Внутри collect_css_vars - реестр потока, иначе общий
+    registry = getattr(_local, 'css_vars', None)
+    if registry is None:
+        with _lock:
+            return _register_in(_css_vars, base_name, value)
+    return _register_in(registry, base_name, value)
+
+
+def _register_in(registry: Dict[str, str], base_name: str, value: str) -> str:
+    """Назначает имя переменной в реестре и возвращает var(...)"""
+    name = _find_css_var(registry, value)
+    if name is None:
+        name = base_name
+        suffix = 2
+        while name in registry:
+            name = f"{base_name}-{suffix}"
+            suffix += 1
+        registry[name] = value
+    return f"var({name})"
+
+
+def _find_css_var(registry: Dict[str, str], value: str) -> Optional[str]:
+    """Первая переменная реестра с тем же цветом, что value (None - такого цвета нет)"""
+    key = _css_var_key(value)
+    return next((name for name, existing in registry.items() if _css_var_key(existing) == key), None)
+
+
+def _css_var_key(value: str) -> Any:
+    """Цвет значения переменной (r, g, b, alpha) без учёта записи; не цвет - сама строка"""
+    match = _RGBA_RE.fullmatch(value.strip().lower())
+    if match:
+        r, g, b, alpha = match.groups()
+        return int(r), int(g), int(b), float(alpha)
+    rgb = _color_to_rgb(value)
+    return (*rgb, 1.0) if rgb is not None else value.strip().lower()
 
 
 def process_css_value(value: Any, general_config: Dict, current_section: str = None) -> str:
@@ -114,7 +400,7 @@ def process_css_value(value: Any, general_config: Dict, current_section: str = N
                 else:
                     # "100" + "vh" -> "100vh"
                     return f"{val_str}{unit}"
-            elif is_number or re.match(r'^\d+$', second):
+            elif is_number or _DIGITS_RE.match(second):
                 # Это число (int/float) или строка с числом - проверяем, может быть это прозрачность для цвета
                 opacity_value = int(float(second_raw)) if is_number else int(second)
                 if 0 <= opacity_value <= 100:
@@ -127,7 +413,10 @@ def process_css_value(value: Any, general_config: Dict, current_section: str = N
                             # Преобразуем процент в alpha: 100 -> 1.0, 50 -> 0.5, 0 -> 0.0
                             alpha = opacity_value / 100.0
                             r, g, b = rgb
-                            return f"rgba({r}, {g}, {b}, {alpha})"
+                            rgba = f"rgba({r}, {g}, {b}, {alpha})"
+                            if _css_vars_enabled:
+                                return _register_css_var(f"{val_str}.a{opacity_value}", rgba)
+                            return rgba
                 
                 # Если не цвет, то это просто значение
                 return f"{val_str} {second}"
@@ -161,8 +450,17 @@ def resolve_reference(ref: str, general_config: Dict, current_section: str = Non
         current_section: Текущая секция для относительных ссылок
         
     Returns:
-        Вычисленное значение
+        Вычисленное значение (в режиме css_vars для цветов - var(--имя))
     """
+    value = _resolve_reference_value(ref, general_config, current_section)
+    # Цвет, полученный по ссылке, выносим в :root (литералы и нераспознанные ссылки - как есть)
+    if _css_vars_enabled and value != ref and color_to_rgb(value) is not None:
+        return _register_css_var(ref, value)
+    return value
+
+
+def _resolve_reference_value(ref: str, general_config: Dict, current_section: str = None) -> str:
+    """Вычисляет значение ссылки (без учёта режима css_vars)"""
     # Если это hex-цвет, возвращаем как есть
     if ref.startswith('#'):
         return ref
@@ -197,10 +495,7 @@ def resolve_reference(ref: str, general_config: Dict, current_section: str = Non
                 modifiers = [property_name] + modifiers
             
             # Применяем модификаторы к цвету
-            result = section_name
-            for modifier in modifiers:
-                result = apply_modifier(result, modifier)
-            return result
+            return _apply_modifiers(section_name, modifiers)
         return ref  # Секция не найдена
     
     section_config = general_config[section_name]
@@ -220,11 +515,22 @@ def resolve_reference(ref: str, general_config: Dict, current_section: str = Non
     base_value = str(base_value)
     
     # Применяем модификаторы
-    result = base_value
-    for modifier in modifiers:
-        result = apply_modifier(result, modifier)
+    return _apply_modifiers(base_value, modifiers)
+
+
+def _apply_modifiers(base_value: str, modifiers: list) -> str:
+    """
+    Применяет цепочку модификаторов к базовому значению (с кэшем)
     
-    return result
+    Ключ кэша - само значение, на которое указала ссылка, а не конфиг:
+    одна и та же ссылка через general и report может дать разные цвета.
+    """
+    def compute():
+        result = base_value
+        for modifier in modifiers:
+            result = apply_modifier(result, modifier)
+        return result
+    return _memoize('resolve', (base_value, tuple(modifiers)), compute)
 
 
 def apply_modifier(value: str, modifier: str) -> str:
@@ -243,8 +549,13 @@ def apply_modifier(value: str, modifier: str) -> str:
     Returns:
         Модифицированное значение
     """
+    return _memoize('modifier', (value, modifier), lambda: _apply_modifier(value, modifier))
+
+
+def _apply_modifier(value: str, modifier: str) -> str:
+    """Применяет модификатор к значению (без кэша)"""
     # Проверяем, является ли модификатор просто числом (новый формат)
-    if re.match(r'^\d+$', modifier):
+    if _DIGITS_RE.match(modifier):
         # Новый формат: просто число
         brightness = int(modifier)
         
@@ -274,7 +585,7 @@ def apply_modifier(value: str, modifier: str) -> str:
         return rgb_to_hex(rgb)
     
     # Старый формат: "darker-0.8" или "darker-80" (для обратной совместимости)
-    match = re.match(r'^(\w+)-([\d.]+)$', modifier)
+    match = _LEGACY_MODIFIER_RE.match(modifier)
     if not match:
         return value  # Неизвестный формат модификатора
     
@@ -317,93 +628,20 @@ def color_to_rgb(color_str: str) -> Optional[tuple]:
     Returns:
         Кортеж (r, g, b) или None если не удалось распознать
     """
+    return _memoize('rgb', color_str, lambda: _color_to_rgb(color_str))
+
+
+def _color_to_rgb(color_str: str) -> Optional[tuple]:
+    """Разбор цвета без кэша: сначала hex, затем таблица палитры"""
     color_str = color_str.strip().lower()
     
-    # Hex формат: #ff00ff или ff00ff
-    if color_str.startswith('#'):
-        color_str = color_str[1:]
-    
-    if len(color_str) == 6 and all(c in '0123456789abcdef' for c in color_str):
-        r = int(color_str[0:2], 16)
-        g = int(color_str[2:4], 16)
-        b = int(color_str[4:6], 16)
-        return (r, g, b)
-    
-    # Короткий формат hex: #fff -> #ffffff
-    if len(color_str) == 3 and all(c in '0123456789abcdef' for c in color_str):
-        r = int(color_str[0] + color_str[0], 16)
-        g = int(color_str[1] + color_str[1], 16)
-        b = int(color_str[2] + color_str[2], 16)
-        return (r, g, b)
-    
-    # Сначала проверяем библиотеку цветов из color.json
-    # Поддерживаем формат gray_1, gray_2 и т.д. для доступа к элементам массива
-    if _colors_config:
-        # Проверяем формат color_name_index (например, gray_1, gray_2)
-        if '_' in color_str:
-            parts = color_str.rsplit('_', 1)  # Разделяем по последнему подчеркиванию
-            if len(parts) == 2 and parts[1].isdigit():
-                base_color = parts[0]  # "gray"
-                index = int(parts[1]) - 1  # "1" -> индекс 0, "2" -> индекс 1
-                
-                # Проверяем, есть ли массив с таким именем
-                if base_color in _colors_config:
-                    color_value = _colors_config[base_color]
-                    if isinstance(color_value, list) and 0 <= index < len(color_value):
-                        hex_color = color_value[index]
-                        # Конвертируем hex в RGB
-                        if isinstance(hex_color, str) and hex_color.startswith('#'):
-                            hex_color = hex_color[1:]
-                        if len(hex_color) == 6 and all(c in '0123456789abcdef' for c in hex_color.lower()):
-                            r = int(hex_color[0:2], 16)
-                            g = int(hex_color[2:4], 16)
-                            b = int(hex_color[4:6], 16)
-                            return (r, g, b)
-                        elif len(hex_color) == 3 and all(c in '0123456789abcdef' for c in hex_color.lower()):
-                            # Короткий формат #fff -> #ffffff
-                            r = int(hex_color[0] + hex_color[0], 16)
-                            g = int(hex_color[1] + hex_color[1], 16)
-                            b = int(hex_color[2] + hex_color[2], 16)
-                            return (r, g, b)
-        
-        # Обычная проверка цвета (не массив)
-        if color_str in _colors_config:
-            hex_color = _colors_config[color_str]
-            # Если это массив, берем первый элемент
-            if isinstance(hex_color, list) and len(hex_color) > 0:
-                hex_color = hex_color[0]
-            # Конвертируем hex в RGB
-            if isinstance(hex_color, str) and hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            if len(hex_color) == 6 and all(c in '0123456789abcdef' for c in hex_color.lower()):
-                r = int(hex_color[0:2], 16)
-                g = int(hex_color[2:4], 16)
-                b = int(hex_color[4:6], 16)
-                return (r, g, b)
-            elif len(hex_color) == 3 and all(c in '0123456789abcdef' for c in hex_color.lower()):
-                # Короткий формат #fff -> #ffffff
-                r = int(hex_color[0] + hex_color[0], 16)
-                g = int(hex_color[1] + hex_color[1], 16)
-                b = int(hex_color[2] + hex_color[2], 16)
-                return (r, g, b)
-    
-    # Fallback: старые именованные цвета (для обратной совместимости)
-    named_colors = {
-        'magenta': (255, 0, 255),
-        'cyan': (0, 255, 255),
-        'yellow': (255, 255, 0),
-        'red': (255, 0, 0),
-        'green': (0, 128, 0),
-        'lime': (0, 255, 0),  # Ярко-зеленый (lime)
-        'blue': (0, 0, 255),
-        'black': (0, 0, 0),
-        'white': (255, 255, 255),
-    }
-    
-    if color_str in named_colors:
-        return named_colors[color_str]
-    
-    return None
+    # Hex формат: #ff00ff, ff00ff, #fff
+    rgb = _parse_hex(color_str)
+    if rgb is not None:
+        return rgb
+    
+    # Библиотека цветов из color.json (включая gray_1, gray_2...) и старые именованные цвета
+    return _palette.get(color_str)
 
 
 def darken_color(rgb: tuple, factor: float) -> tuple:
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка critical CSS: inline-стили - начало каскада полного stylesheet
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generators.css.critical_css import CriticalCSSExtractor
+
+
+HTML = '<div class="box"><p class="text">x</p></div>'
+
+# Все правила срабатывают на HTML; третье - длинное, четвёртое - короткое переопределение
+FULL_CSS = '\n'.join([
+    '.box {color: red;}',
+    '.text {margin: 0;}',
+    '.box .text {' + ' '.join(f'--pad-{i}: {i}px;' for i in range(40)) + '}',
+    '.text {margin: 1px;}',
+])
+
+
+def test_budget_keeps_leading_rules():
+    """Правило сверх бюджета останавливает выборку - короткие правила после него не попадают"""
+    full = CriticalCSSExtractor(FULL_CSS, max_bytes=100000).extract(HTML).split('\n')
+    assert len(full) == 4
+
+    # Короткое четвёртое правило в бюджет помещается, длинное третье - нет
+    budget = sum(len(rule.encode('utf-8')) + 1 for rule in full[:2] + full[3:])
+    inlined = CriticalCSSExtractor(FULL_CSS, max_bytes=budget).extract(HTML).split('\n')
+    assert inlined == full[:len(inlined)]
+    assert inlined == full[:2]
+
+
+def test_empty_rules_are_skipped():
+    """Правила без объявлений в inline-стили не попадают"""
+    css = CriticalCSSExtractor('.box {}\n.text {margin: 0;}').extract(HTML)
+    assert css == '.text {margin: 0;}'
+
+
+if __name__ == '__main__':
+    test_budget_keeps_leading_rules()
+    test_empty_rules_are_skipped()
+    print("✅ critical CSS - начало каскада")
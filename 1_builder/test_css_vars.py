@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка режима css_vars: одна переменная :root на цвет
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.insert(0, str(Path(__file__).parent))
+
+from processors.value_processor import (collect_css_vars, generate_root_css, get_css_vars, init_colors,
+                                        init_css_vars, merge_css_vars, process_css_value, resolve_reference)
+
+
+GENERAL = {'page': {'bg-color': 'black', 'color': '#000'}}
+
+
+def setup():
+    init_colors({})
+    init_css_vars(True)
+
+
+def test_same_color_shares_variable():
+    """Разные ссылки на один цвет (в любой записи) дают одну переменную"""
+    setup()
+    refs = [
+        resolve_reference('page.bg-color', GENERAL),
+        resolve_reference('page.color', GENERAL),
+        process_css_value(['black', 100], GENERAL),
+    ]
+    assert refs == ['var(--page-bg-color)'] * 3
+    assert list(get_css_vars()) == ['--page-bg-color']
+    assert generate_root_css().count('--') == 1
+
+
+def test_blocks_merge_by_color():
+    """Блоки, собранные параллельно, при объединении переиспользуют переменную цвета"""
+    setup()
+    first = resolve_reference('page.bg-color', GENERAL)
+    with collect_css_vars() as collected:
+        block = [f"a {{color: {resolve_reference('page.color', GENERAL)};}}"]
+    assert merge_css_vars(block, collected) == [f"a {{color: {first};}}"]
+    assert list(get_css_vars()) == ['--page-bg-color']
+
+
+def test_name_collision_gets_suffix():
+    """Имя, занятое другим цветом, получает суффикс"""
+    setup()
+    assert resolve_reference('page.bg-color', GENERAL) == 'var(--page-bg-color)'
+    other = {'page': {'bg-color': 'white'}}
+    assert resolve_reference('page.bg-color', other) == 'var(--page-bg-color-2)'
+
+
+if __name__ == '__main__':
+    test_same_color_shares_variable()
+    test_blocks_merge_by_color()
+    test_name_collision_gets_suffix()
+    init_css_vars(False)
+    print("✅ css_vars: одна переменная на цвет")
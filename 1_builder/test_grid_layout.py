@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка grid-разметки: строки колонок стоят там же, где во flex-разметке (col_N)
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Добавляем путь к модулям
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.grid_layout_utils import cell_class, compute_grid_placement, get_grid_cells, stack_class
+
+
+def flex_row_tops(grid: List[Tuple[str, List[str]]], heights: Dict[str, int]) -> Dict[str, int]:
+    """Верх каждой строки во flex-разметке: строки col_N идут друг под другом"""
+    tops = {}
+    for col_num, rows in grid:
+        top = 0
+        for row_num in rows:
+            tops[cell_class(col_num, row_num)] = top
+            top += heights[cell_class(col_num, row_num)]
+    return tops
+
+
+def grid_row_tops(grid: List[Tuple[str, List[str]]], heights: Dict[str, int]) -> Dict[str, int]:
+    """
+    Верх каждой строки в grid-разметке (одна линия колонок)
+
+    Треки строк - auto: трек получает высоту самой высокой ячейки в нём, а ячейка
+    на несколько треков делит недостающую высоту между ними поровну.
+    """
+    _, areas = compute_grid_placement(grid, [100 / len(grid)] * len(grid), wrap=False)
+    cell_heights = {}
+    for col_num, rows in grid:
+        cells = get_grid_cells(grid, col_num)
+        if cells == [stack_class(col_num)]:
+            cell_heights[cells[0]] = sum(heights[cell_class(col_num, row_num)] for row_num in rows)
+        else:
+            cell_heights.update((cell, heights[cell]) for cell in cells)
+
+    spans = {}
+    for cell, area in areas.items():
+        row_start, _, row_end, _ = (int(part) for part in area.split('/'))
+        spans[cell] = (row_start, row_end)
+    tracks = [0] * max(end for _, end in spans.values())
+    for cell, (start, end) in spans.items():
+        if end - start == 1:
+            tracks[start] = max(tracks[start], cell_heights[cell])
+    for cell, (start, end) in spans.items():
+        extra = cell_heights[cell] - sum(tracks[start:end])
+        if end - start > 1 and extra > 0:
+            for track in range(start, end):
+                tracks[track] += extra / (end - start)
+
+    tops = {}
+    for col_num, rows in grid:
+        for cell in get_grid_cells(grid, col_num):
+            top = sum(tracks[:spans[cell][0]])
+            if cell == stack_class(col_num):
+                for row_num in rows:
+                    tops[cell_class(col_num, row_num)] = top
+                    top += heights[cell_class(col_num, row_num)]
+            else:
+                tops[cell] = top
+    return tops
+
+
+def test_two_rows_next_to_tall_single_row():
+    """Высокая ячейка рядом не раздвигает строки соседней колонки"""
+    grid = [('1', ['1', '2']), ('2', ['1'])]
+    heights = {'_cell-1-1': 20, '_cell-1-2': 30, '_cell-2-1': 200}
+    assert grid_row_tops(grid, heights) == flex_row_tops(grid, heights)
+
+
+def test_rows_of_two_columns_are_independent():
+    """Строка N одной колонки не опускается до высоты строки N соседней"""
+    grid = [('1', ['1', '2']), ('2', ['1', '2', '3'])]
+    heights = {'_cell-1-1': 100, '_cell-1-2': 10, '_cell-2-1': 10, '_cell-2-2': 10, '_cell-2-3': 10}
+    assert grid_row_tops(grid, heights) == flex_row_tops(grid, heights)
+
+
+def test_single_column_rows_stay_cells():
+    """Колонка без соседей не нуждается в стопке: строки - ячейки сетки"""
+    grid = [('1', ['1', '2'])]
+    _, areas = compute_grid_placement(grid, [100], wrap=False)
+    assert areas == {'_cell-1-1': '1 / 1 / 2 / 2', '_cell-1-2': '2 / 1 / 3 / 2'}
+
+
+if __name__ == '__main__':
+    test_two_rows_next_to_tall_single_row()
+    test_rows_of_two_columns_are_independent()
+    test_single_column_rows_stay_cells()
+    print("✅ grid-разметка совпадает с flex")
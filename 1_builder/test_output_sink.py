@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка DirectorySink: прошлая сборка (.prev) не меняется вместе с рабочей
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.output_sink import DirectorySink, get_previous_dir, rollback_directory
+
+
+FORM_FILE = 'send_form_json/form_1.json'
+
+
+def build(root: Path, index_file: Path, files: dict):
+    """Сборка в root с заданными файлами"""
+    with DirectorySink(root, index_file) as sink:
+        for rel_path, text in files.items():
+            sink.write_text(rel_path, text)
+
+
+def test_previous_build_survives_in_place_write():
+    """PHP переписывает файл рабочей сборки на месте - .prev остаётся прежней"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / '3_result'
+        index_file = Path(tmp) / 'index.json'
+        build(root, index_file, {FORM_FILE: '{"v": 1}', 'pages/index.html': 'old'})
+        build(root, index_file, {FORM_FILE: '{"v": 1}', 'pages/index.html': 'new'})
+        previous = get_previous_dir(root)
+        assert (previous / FORM_FILE).stat().st_ino != (root / FORM_FILE).stat().st_ino
+
+        # Как file_put_contents: тот же inode, новое содержимое
+        with open(root / FORM_FILE, 'r+', encoding='utf-8') as f:
+            f.truncate(0)
+            f.write('{"v": 2}')
+        assert (previous / FORM_FILE).read_text(encoding='utf-8') == '{"v": 1}'
+
+        assert rollback_directory(root)
+        assert (root / FORM_FILE).read_text(encoding='utf-8') == '{"v": 1}'
+        assert (root / 'pages/index.html').read_text(encoding='utf-8') == 'old'
+
+
+def test_unchanged_files_keep_mtime():
+    """Неизменённый файл копируется со временем изменения (rsync его пропускает)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / '3_result'
+        index_file = Path(tmp) / 'index.json'
+        build(root, index_file, {'css/style.css': 'a {}'})
+        mtime = (root / 'css/style.css').stat().st_mtime_ns
+        build(root, index_file, {'css/style.css': 'a {}'})
+        assert (root / 'css/style.css').stat().st_mtime_ns == mtime
+
+
+if __name__ == '__main__':
+    test_previous_build_survives_in_place_write()
+    test_unchanged_files_keep_mtime()
+    print("✅ прошлая сборка не зависит от рабочей")
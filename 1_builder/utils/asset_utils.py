@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Версии ресурсов по содержимому
+
+style.css, report.css и script.js подключаются с ?v=<хэш содержимого>: URL меняется
+только вместе с файлом, поэтому после сборки без изменений браузер ничего не
+загружает заново, а одинаковые исходники дают побайтно одинаковый результат.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Iterable
+
+from core.output_sink import OutputSink
+
+
+# Ресурсы, которые подключаются по постоянному имени (файлы с хэшем в имени не нужны)
+VERSIONED_ASSETS = ('css/style.css', 'css/report.css', 'js/script.js')
+
+_ASSET_URL_RE = re.compile(
+    r'''(?<=["'])\.\./(''' + '|'.join(re.escape(path) for path in VERSIONED_ASSETS) + r''')(?:\?v=[^"']*)?(?=["'])''')
+
+
+def content_hash(data: bytes, length: int = 8) -> str:
+    """Короткий хэш содержимого (sha256)"""
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def files_hash(paths: Iterable[Path], length: int = 8) -> str:
+    """
+    Хэш набора файлов (имена и содержимое, порядок не важен)
+
+    Returns:
+        Хэш или пустая строка, если файлов нет
+    """
+    digest = hashlib.sha256()
+    found = False
+    for path in sorted(Path(p) for p in paths):
+        digest.update(path.name.encode('utf-8') + b'\0' + path.read_bytes() + b'\0')
+        found = True
+    return digest.hexdigest()[:length] if found else ''
+
+
+def get_asset_versions(sink: OutputSink) -> Dict[str, str]:
+    """
+    Версии ресурсов сборки
+
+    Args:
+        sink: Результат сборки
+
+    Returns:
+        {путь ресурса: хэш содержимого} для существующих файлов
+    """
+    return {path: content_hash(sink.read_bytes(path)) for path in VERSIONED_ASSETS if sink.exists(path)}
+
+
+def version_asset_urls(html: str, versions: Dict[str, str]) -> str:
+    """
+    Проставляет ?v=<хэш> в ссылках страницы на ресурсы (../css/style.css и т.д.)
+
+    Args:
+        html: HTML страницы
+        versions: Версии ресурсов (get_asset_versions)
+    """
+    def replace(match):
+        version = versions.get(match.group(1))
+        return f'../{match.group(1)}?v={version}' if version else f'../{match.group(1)}'
+
+    return _ASSET_URL_RE.sub(replace, html)
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Лёгкий токенизатор CSS - разбивает сгенерированный stylesheet на правила
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+
+# At-правила, внутри которых лежат обычные правила (разбираем рекурсивно)
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+@dataclass
+class CSSRule:
+    """Правило CSS: селекторы + тело, либо at-правило с вложенными правилами"""
+    prelude: str
+    body: str = ''
+    children: List['CSSRule'] = field(default_factory=list)
+
+    @property
+    def is_at_rule(self) -> bool:
+        return self.prelude.startswith('@')
+
+    @property
+    def selectors(self) -> List[str]:
+        """Список селекторов правила (пустой для at-правил)"""
+        if self.is_at_rule:
+            return []
+        return split_selector_list(self.prelude)
+
+    def to_css(self) -> str:
+        """Собирает правило обратно в текст CSS"""
+        if self.children:
+            inner = '\n'.join('    ' + child.to_css() for child in self.children)
+            return f"{self.prelude} {{\n{inner}\n}}"
+        return f"{self.prelude} {{{self.body}}}"
+
+
+def _skip_string(css: str, i: int) -> int:
+    """Возвращает индекс сразу после строкового литерала, начинающегося в позиции i"""
+    quote = css[i]
+    i += 1
+    while i < len(css):
+        if css[i] == '\\':
+            i += 2
+            continue
+        if css[i] == quote:
+            return i + 1
+        i += 1
+    return i
+
+
+def _find_block_end(css: str, i: int) -> int:
+    """Находит индекс закрывающей скобки блока, открытого в позиции i - 1"""
+    depth = 1
+    while i < len(css):
+        ch = css[i]
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = len(css) if end == -1 else end + 2
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css)
+
+
+def parse_css(css: str) -> List[CSSRule]:
+    """
+    Разбирает CSS на список правил верхнего уровня
+
+    Комментарии отбрасываются, @media/@supports разбираются рекурсивно,
+    прочие at-правила (@font-face, @keyframes) сохраняются с телом как есть.
+
+    Args:
+        css: Текст CSS
+
+    Returns:
+        Список CSSRule в порядке следования
+    """
+    rules = []
+    prelude_start = 0
+    i = 0
+    while i < len(css):
+        ch = css[i]
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = len(css) if end == -1 else end + 2
+            prelude_start = i
+            continue
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch == ';':
+            # At-правило без блока (@import, @charset)
+            prelude = css[prelude_start:i].strip()
+            if prelude:
+                rules.append(CSSRule(prelude=prelude))
+            i += 1
+            prelude_start = i
+            continue
+        if ch == '}':
+            # Лишняя закрывающая скобка - пропускаем
+            i += 1
+            prelude_start = i
+            continue
+        if ch == '{':
+            prelude = ' '.join(css[prelude_start:i].split())
+            end = _find_block_end(css, i + 1)
+            body = css[i + 1:end]
+            if prelude.startswith(NESTED_AT_RULES):
+                rules.append(CSSRule(prelude=prelude, children=parse_css(body)))
+            elif prelude:
+                rules.append(CSSRule(prelude=prelude, body=body))
+            i = end + 1
+            prelude_start = i
+            continue
+        i += 1
+    return rules
+
+
+def split_selector_list(prelude: str) -> List[str]:
+    """
+    Разбивает список селекторов по запятым верхнего уровня
+    (запятые внутри скобок и строк не учитываются)
+    """
+    selectors = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(prelude):
+        ch = prelude[i]
+        if ch in '"\'':
+            i = _skip_string(prelude, i)
+            continue
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            selectors.append(' '.join(prelude[start:i].split()))
+            start = i + 1
+        i += 1
+    tail = ' '.join(prelude[start:].split())
+    if tail:
+        selectors.append(tail)
+    return selectors
+
+
+# Простые части составного селектора
+_SIMPLE_PART_RE = re.compile(
+    r"\.(?P<cls>-?[_a-zA-Z0-9][\w-]*)"
+    r"|#(?P<id>-?[_a-zA-Z][\w-]*)"
+    r"|\[(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~|]?=)\s*(?P<val>'[^']*'|\"[^\"]*\"|[^\]\s]+))?\s*\]"
+    r"|(?P<tag>^[a-zA-Z][\w-]*|\*)"
+)
+_PSEUDO_RE = re.compile(r"::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?")
+
+
+def split_compounds(selector: str) -> List[str]:
+    """Разбивает сложный селектор на составные части по комбинаторам"""
+    depth = 0
+    parts = []
+    current = []
+    i = 0
+    while i < len(selector):
+        ch = selector[i]
+        if ch in '"\'':
+            end = _skip_string(selector, i)
+            current.append(selector[i:end])
+            i = end
+            continue
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        if depth == 0 and (ch.isspace() or ch in '>+~'):
+            if current:
+                parts.append(''.join(current))
+                current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def parse_compound(compound: str) -> Dict[str, list]:
+    """
+    Раскладывает составной селектор на простые части
+
+    Args:
+        compound: Например "div.field-paymet[data-path='main_btn']:hover"
+
+    Returns:
+        {'tag': [...], 'class': [...], 'id': [...], 'attr': [(name, op, value), ...]}
+    """
+    result = {'tag': [], 'class': [], 'id': [], 'attr': []}
+    # Псевдоклассы и псевдоэлементы не сужают набор узлов для нашей оценки
+    compound = _PSEUDO_RE.sub('', compound)
+    for match in _SIMPLE_PART_RE.finditer(compound):
+        if match.group('cls'):
+            result['class'].append(match.group('cls'))
+        elif match.group('id'):
+            result['id'].append(match.group('id'))
+        elif match.group('attr'):
+            value = match.group('val')
+            if value and value[0] in '"\'':
+                value = value[1:-1]
+            result['attr'].append((match.group('attr'), match.group('op'), value))
+        elif match.group('tag') and match.group('tag') != '*':
+            result['tag'].append(match.group('tag').lower())
+    return result
+
+
+def attr_value_matches(op: Optional[str], expected: Optional[str], actual: str) -> bool:
+    """
+    Совпадает ли значение атрибута с условием атрибутного селектора
+
+    Args:
+        op: Оператор ('=', '*=', '^=', '$=', '~=', '|=' или None - атрибут просто есть)
+        expected: Значение из селектора
+        actual: Значение атрибута элемента
+    """
+    if not op:
+        return True
+    if op == '=':
+        return actual == expected
+    if op == '*=':
+        return expected in actual
+    if op == '^=':
+        return actual.startswith(expected)
+    if op == '$=':
+        return actual.endswith(expected)
+    if op == '~=':
+        return expected in actual.split()
+    if op == '|=':
+        return actual == expected or actual.startswith(expected + '-')
+    return True
+
+
+class HTMLTokenIndex:
+    """Набор классов, id, тегов и атрибутов, встречающихся во фрагменте HTML"""
+
+    _TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)([^>]*)>')
+    _ATTR_RE = re.compile(r'([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+    def __init__(self, html: str = '', extra_attrs: Optional[Dict[str, Set[str]]] = None):
+        self.tags: Set[str] = {'html', 'body'}
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+        self.attrs: Dict[str, Set[str]] = {}
+        if extra_attrs:
+            for name, values in extra_attrs.items():
+                self.attrs.setdefault(name, set()).update(values)
+        if html:
+            self.add_html(html)
+
+    def add_html(self, html: str) -> None:
+        """Добавляет в индекс все теги фрагмента"""
+        for tag_match in self._TAG_RE.finditer(html):
+            self.tags.add(tag_match.group(1).lower())
+            for attr_match in self._ATTR_RE.finditer(tag_match.group(2)):
+                name = attr_match.group(1).lower()
+                value = next((v for v in attr_match.group(2, 3, 4) if v is not None), '')
+                self.attrs.setdefault(name, set()).add(value)
+                if name == 'class':
+                    self.classes.update(value.split())
+                elif name == 'id':
+                    self.ids.add(value)
+
+    def _has_attr(self, name: str, op: Optional[str], value: Optional[str]) -> bool:
+        values = self.attrs.get(name.lower())
+        if values is None:
+            return False
+        return any(attr_value_matches(op, value, v) for v in values)
+
+    def matches_selector(self, selector: str) -> bool:
+        """
+        Проверяет, могут ли все простые части селектора встретиться во фрагменте.
+        Структура (вложенность) не проверяется - оценка консервативная.
+        """
+        for compound in split_compounds(selector):
+            parts = parse_compound(compound)
+            if any(tag not in self.tags for tag in parts['tag']):
+                return False
+            if any(cls not in self.classes for cls in parts['class']):
+                return False
+            if any(id_ not in self.ids for id_ in parts['id']):
+                return False
+            if any(not self._has_attr(*attr) for attr in parts['attr']):
+                return False
+        return True
+
+
+_COMBINATORS = ('>', '+', '~')
+
+
+def selector_tokens(selector: str) -> List[str]:
+    """
+    Разбивает сложный селектор на составные части и комбинаторы
+    (скобки и строки учитываются: [class~='x'] и :nth-child(2n+1) не разрываются)
+
+    Returns:
+        Например ['.layout', '>', '.column:hover'] (комбинатор-потомок не выводится)
+    """
+    tokens = []
+    current = []
+    depth = 0
+    i = 0
+    while i < len(selector):
+        ch = selector[i]
+        if ch in '"\'':
+            end = _skip_string(selector, i)
+            current.append(selector[i:end])
+            i = end
+            continue
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        if depth == 0 and (ch.isspace() or ch in _COMBINATORS):
+            if current:
+                tokens.append(''.join(current))
+                current = []
+            if ch in _COMBINATORS:
+                tokens.append(ch)
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    if current:
+        tokens.append(''.join(current))
+    return tokens
+
+
+def normalize_selector(selector: str) -> str:
+    """Приводит селектор к каноническому виду: части и комбинаторы через одиночный пробел"""
+    return ' '.join(selector_tokens(selector))
+
+
+class SelectorIndex:
+    """
+    Индекс селекторов stylesheet - строится за один проход, проверки выполняются поиском в множестве
+
+    Селектор считается найденным, если он является непрерывной частью селектора
+    какого-либо правила (в том числе внутри @media): ".layout.section-x .column"
+    находится в ".layout.section-x .column > .item" и "body .layout.section-x .column:hover".
+    """
+
+    def __init__(self, css: str = '', rules: Optional[List[CSSRule]] = None):
+        """
+        Args:
+            css: Текст CSS (разбирается, если rules не переданы)
+            rules: Уже разобранные правила (parse_css)
+        """
+        self.selectors: Set[str] = set()
+        self._parts: Set[str] = set()
+        self._add_rules(rules if rules is not None else parse_css(css or ''))
+
+    def _add_rules(self, rules: List[CSSRule]) -> None:
+        for rule in rules:
+            if rule.children:
+                self._add_rules(rule.children)
+            for selector in rule.selectors:
+                self._add_selector(selector)
+
+    def _add_selector(self, selector: str) -> None:
+        tokens = selector_tokens(selector)
+        self.selectors.add(' '.join(tokens))
+        for start in range(len(tokens)):
+            if tokens[start] in _COMBINATORS:
+                continue
+            for end in range(start + 1, len(tokens) + 1):
+                last = tokens[end - 1]
+                if last in _COMBINATORS:
+                    continue
+                window = ' '.join(tokens[start:end])
+                self._parts.add(window)
+                # ".column:hover" покрывает и ".column"
+                bare = _PSEUDO_RE.sub('', last)
+                if bare and bare != last:
+                    self._parts.add(' '.join(tokens[start:end - 1] + [bare]))
+
+    def __contains__(self, selector: str) -> bool:
+        return normalize_selector(selector) in self._parts
+
+    def has_exact(self, selector: str) -> bool:
+        """Есть ли правило ровно с таким селектором"""
+        return normalize_selector(selector) in self.selectors
+
+
+_CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+
+
+def rename_selector_classes(selector: str, mapping: Dict[str, str]) -> str:
+    """
+    Переименовывает классы в селекторе (или списке селекторов)
+
+    Значения атрибутных селекторов и строки не затрагиваются:
+    в [data-path='.search-client-wrap+span'] класс не ищется.
+
+    Args:
+        selector: Текст селектора
+        mapping: {старый класс: новый класс}
+    """
+    out = []
+    depth = 0  # глубина внутри [...]
+    start = 0
+    i = 0
+    while i < len(selector):
+        ch = selector[i]
+        if ch in '"\'':
+            i = _skip_string(selector, i)
+            continue
+        if ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        elif ch == '.' and depth == 0:
+            match = _CLASS_RE.match(selector, i)
+            if match and match.group(1) in mapping:
+                out.append(selector[start:i])
+                out.append('.' + mapping[match.group(1)])
+                start = i = match.end()
+                continue
+        i += 1
+    out.append(selector[start:])
+    return ''.join(out)
+
+
+def rewrite_selectors(css: str, rewrite_fn) -> str:
+    """
+    Применяет rewrite_fn к селекторам всех правил, остальной текст CSS не меняется
+
+    Тела правил, комментарии и at-правила кроме @media/@supports выводятся как есть
+    (внутри @media/@supports селекторы переписываются рекурсивно).
+
+    Args:
+        css: Текст CSS
+        rewrite_fn: Функция (текст селекторов) -> новый текст
+    """
+    out = []
+    prelude_start = 0
+    i = 0
+    while i < len(css):
+        ch = css[i]
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            end = len(css) if end == -1 else end + 2
+            out.append(rewrite_fn(css[prelude_start:i]))
+            out.append(css[i:end])
+            i = prelude_start = end
+            continue
+        if ch in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if ch in ';}':
+            # At-правило без блока или лишняя скобка
+            out.append(css[prelude_start:i + 1])
+            i = prelude_start = i + 1
+            continue
+        if ch == '{':
+            prelude = css[prelude_start:i]
+            end = _find_block_end(css, i + 1)
+            body = css[i + 1:end]
+            stripped = prelude.strip()
+            if stripped.startswith(NESTED_AT_RULES):
+                out.append(f"{prelude}{{{rewrite_selectors(body, rewrite_fn)}")
+            elif stripped.startswith('@'):
+                out.append(f"{prelude}{{{body}")
+            else:
+                out.append(f"{rewrite_fn(prelude)}{{{body}")
+            out.append(css[end:end + 1])
+            i = prelude_start = end + 1
+            continue
+        i += 1
+    out.append(css[prelude_start:])
+    return ''.join(out)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Движок разметки секций: flex (по умолчанию) или grid (config.json: "layout_engine": "grid")
+
+В flex-режиме каждая секция - это вложенные обёртки:
+
+    layout > column > col_N > row row_N > group > marking-item
+
+В grid-режиме .column становится grid-контейнером, а обёртки col_N и row_N
+не выводятся: ячейка (col, row) - это сама группа (или row_N, если в строке
+несколько групп) с классом _cell-C-R. Ширины из layout_col.json превращаются
+в grid-template-columns, а переносы колонок (flex-wrap) - в явное размещение
+ячеек по линиям сетки для каждого устройства.
+
+Колонка из нескольких строк рядом с другими колонками остаётся одной ячейкой -
+стопкой _cell-C со строками внутри. Общие треки строк связали бы колонки: строка N
+одной колонки опускалась бы до высоты строки N соседней, а высокая ячейка рядом
+раздвигала бы строки стопки. В flex-разметке строки col_N от соседей не зависят.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+LAYOUT_ENGINES = ('flex', 'grid')
+CELL_CLASS_PREFIX = '_cell-'  # ячейка (колонка, строка) grid-разметки
+GRID_CLASS = 'layout-grid'    # класс grid-контейнера (.column)
+
+# Состояние режима (задаётся один раз до генерации, дальше только читается)
+_layout_engine: str = 'flex'
+_warned_engines = set()  # неизвестные значения, о которых уже предупредили
+
+
+def init_layout_engine(app_config: Optional[Dict[str, Any]]):
+    """
+    Инициализирует движок разметки
+
+    Args:
+        app_config: Настройки сборки из config.json
+    """
+    global _layout_engine
+    engine = (app_config or {}).get('layout_engine', 'flex')
+    if engine not in LAYOUT_ENGINES:
+        if engine not in _warned_engines:
+            _warned_engines.add(engine)
+            print(f"   ⚠️  Неизвестный layout_engine '{engine}', используется flex")
+        engine = 'flex'
+    _layout_engine = engine
+
+
+def is_grid_layout() -> bool:
+    """Включён ли grid-движок разметки"""
+    return _layout_engine == 'grid'
+
+
+def cell_class(col_num: str, row_num: str) -> str:
+    """Класс ячейки grid-разметки: колонка 2, строка 1 -> _cell-2-1"""
+    return f"{CELL_CLASS_PREFIX}{col_num}-{row_num}"
+
+
+def stack_class(col_num: str) -> str:
+    """Класс ячейки-стопки колонки из нескольких строк: колонка 1 -> _cell-1"""
+    return f"{CELL_CLASS_PREFIX}{col_num}"
+
+
+def is_stacked_column(grid: List[Tuple[str, List[str]]], col_num: str) -> bool:
+    """
+    Выводится ли колонка стопкой (несколько строк, и в секции есть другие колонки)
+
+    Args:
+        grid: Структура секции (get_section_grid)
+        col_num: Номер колонки
+    """
+    return len(grid) > 1 and len(dict(grid).get(col_num, [])) > 1
+
+
+def get_grid_cells(grid: List[Tuple[str, List[str]]], col_num: str) -> List[str]:
+    """Классы ячеек колонки, которые размещает сетка (стопка или ячейки строк)"""
+    if is_stacked_column(grid, col_num):
+        return [stack_class(col_num)]
+    return [cell_class(col_num, row_num) for row_num in dict(grid).get(col_num, [])]
+
+
+def get_section_grid(section_html: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
+    """
+    Колонки секции и номера их строк в порядке вывода (как в LayoutProcessor)
+
+    Args:
+        section_html: Разметка секции из layout_html.json
+
+    Returns:
+        [(номер колонки, [номера строк]), ...]; пустой список для секции без колонок
+        (её ячейки идут друг под другом, grid не нужен)
+    """
+    columns = sorted(k for k in section_html if k.startswith('col_') or k.startswith('column_'))
+    result = []
+    for col_key in columns:
+        col_config = section_html[col_key] if isinstance(section_html[col_key], dict) else {}
+        rows = sorted(k for k in col_config if k.startswith('row_'))
+        result.append((col_key.split('_')[1], [row.split('_')[1] for row in rows]))
+    return result
+
+
+def get_column_widths(widths: List[float], count: int) -> List[float]:
+    """
+    Ширины колонок устройства в процентах (недостающие - как последняя, как в flex-стилях)
+
+    Args:
+        widths: Ширины из layout_col.json (desktop/tablet/mobile)
+        count: Количество колонок в разметке
+    """
+    if not widths:
+        return [100 / count] * count if count else []
+    return [widths[i] if i < len(widths) else widths[-1] for i in range(count)]
+
+
+def pack_lines(widths: List[float], wrap: bool) -> List[List[int]]:
+    """
+    Раскладывает колонки по линиям так же, как flex-wrap
+
+    Args:
+        widths: Ширины колонок в процентах
+        wrap: Переносить ли колонки (flex-wrap: wrap)
+
+    Returns:
+        Список линий, в каждой - индексы колонок
+    """
+    if not wrap:
+        return [list(range(len(widths)))] if widths else []
+    lines: List[List[int]] = []
+    line_width = 0.0
+    for idx, width in enumerate(widths):
+        if lines and line_width + width <= 100 + 1e-6:
+            lines[-1].append(idx)
+            line_width += width
+        else:
+            lines.append([idx])
+            line_width = width
+    return lines
+
+
+def _format_number(value: float) -> str:
+    return f"{value:.4f}".rstrip('0').rstrip('.')
+
+
+def compute_grid_placement(grid: List[Tuple[str, List[str]]], widths: List[float],
+                           wrap: bool) -> Tuple[str, Dict[str, str]]:
+    """
+    Строит сетку секции для одного устройства
+
+    Треки колонок - объединение границ колонок во всех линиях, поэтому колонки
+    разной ширины на разных линиях (перенос) размещаются точно. Колонка из
+    нескольких строк рядом с другими - одна ячейка-стопка (is_stacked_column),
+    поэтому в линии из нескольких колонок каждая занимает ровно один трек строки.
+
+    Args:
+        grid: Структура секции (get_section_grid)
+        widths: Ширины колонок в процентах (get_column_widths)
+        wrap: Переносить ли колонки
+
+    Returns:
+        (grid-template-columns, {класс ячейки: grid-area})
+    """
+    lines = pack_lines(widths, wrap)
+
+    # Границы колонок в процентах по всем линиям
+    spans: Dict[int, Tuple[float, float]] = {}
+    total = 100.0  # Линия уже 100% оставляет пустое место справа, как flex-grow: 0
+    for line in lines:
+        position = 0.0
+        for idx in line:
+            spans[idx] = (round(position, 4), round(position + widths[idx], 4))
+            position += widths[idx]
+        total = max(total, round(position, 4))
+    boundaries = {0.0, total}
+    for start, end in spans.values():
+        boundaries.update((start, end))
+    edges = sorted(boundaries)
+    track_index = {edge: i + 1 for i, edge in enumerate(edges)}
+    tracks = [edges[i + 1] - edges[i] for i in range(len(edges) - 1)]
+    template = ' '.join(f"minmax(0, {_format_number(track)}fr)" for track in tracks)
+
+    areas: Dict[str, str] = {}
+    line_row = 1
+    for line in lines:
+        cells = {idx: get_grid_cells(grid, grid[idx][0]) for idx in line}
+        line_rows = max((len(cells[idx]) for idx in line), default=0) or 1
+        for idx in line:
+            col_start, col_end = (track_index[edge] for edge in spans[idx])
+            for row_idx, cell in enumerate(cells[idx]):
+                row_start = line_row + row_idx
+                areas[cell] = f"{row_start} / {col_start} / {row_start + 1} / {col_end}"
+        line_row += line_rows
+    return template, areas
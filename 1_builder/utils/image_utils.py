@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Обработка изображений (config.json: "image_pipeline": true или {"eager_sections": 2})
+
+Без режима 2_source/img копируется в 3_result/img как есть. С режимом:
+- SVG сжимается (пролог, комментарии, <metadata>, пробелы - svg_utils.minify_svg);
+- каждый файл дополнительно сохраняется под именем с хэшем содержимого
+  (logo.3f9a1c2b.svg) - такой файл можно кэшировать навсегда; одинаковые
+  по содержимому изображения сохраняются одним файлом;
+- <img> получают хэшированный src и width/height из заголовка файла
+  (PNG, JPEG, GIF, WebP, SVG) - браузер резервирует место до загрузки;
+  размеры из CSS по-прежнему важнее атрибутов;
+- <img> в секциях страницы после первых eager_sections (по умолчанию 1)
+  получают loading="lazy" decoding="async".
+
+Таблица имён записывается в img/manifest.json и в начало script.js
+(window.IMAGE_MAP): картинки из данных bd/api functions.js берёт по той же таблице.
+Исходные имена файлов остаются - на них могут ссылаться данные с сервера.
+"""
+
+import hashlib
+import json
+import re
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from core.output_sink import OutputSink
+from utils.svg_utils import minify_svg
+
+
+IMAGE_MANIFEST_FILE_NAME = 'manifest.json'
+
+_SVG_TAG_RE = re.compile(r'<svg\b([^>]*)>', re.IGNORECASE)
+_LENGTH_RE = re.compile(r'^\s*([\d.]+)\s*(px|pt|pc|mm|cm|in)?\s*$')
+_IMG_TAG_RE = re.compile(r'<img\b(?![^>]*\sloading=)', re.IGNORECASE)
+
+# Перевод единиц SVG в CSS-пиксели
+_UNITS_TO_PX = {None: 1.0, 'px': 1.0, 'pt': 4 / 3, 'pc': 16.0, 'mm': 96 / 25.4, 'cm': 96 / 2.54, 'in': 96.0}
+
+# Состояние режима (задаётся один раз до генерации, дальше только читается)
+_settings: Optional[Dict[str, int]] = None
+# Изображения сборки: исходное имя -> {'src': имя файла с хэшем, 'width': ..., 'height': ...}
+_images: Dict[str, Dict[str, Any]] = {}
+
+
+def get_image_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    """
+    Читает настройки обработки изображений из config.json
+
+    Returns:
+        {'eager_sections': int} или None если режим выключен
+    """
+    value = (app_config or {}).get('image_pipeline')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {'eager_sections': max(0, int(settings.get('eager_sections', 1)))}
+
+
+def init_image_pipeline(app_config: Optional[Dict[str, Any]]):
+    """
+    Инициализирует режим обработки изображений
+
+    Args:
+        app_config: Настройки сборки из config.json
+    """
+    global _settings
+    _settings = get_image_settings(app_config)
+    _images.clear()
+
+
+def is_image_pipeline_enabled() -> bool:
+    """Включена ли обработка изображений"""
+    return _settings is not None
+
+
+# --- Размеры из заголовков ---
+
+def _png_size(data: bytes) -> Optional[Tuple[int, int]]:
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24])
+    return None
+
+
+def _gif_size(data: bytes) -> Optional[Tuple[int, int]]:
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', data[6:10])
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 9 < len(data):
+        if data[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = data[pos + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+            pos += 1 if marker == 0xFF else 2
+            continue
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        # SOF0..SOF15 (кроме DHT, JPG, DAC) - в них размеры кадра
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def _webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    if data[:4] != b'RIFF' or data[8:12] != b'WEBP':
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None
+
+
+def _svg_length(value: Optional[str]) -> Optional[float]:
+    match = _LENGTH_RE.match(value or '')
+    if not match:
+        return None
+    return float(match.group(1)) * _UNITS_TO_PX[match.group(2)]
+
+
+def _svg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    match = _SVG_TAG_RE.search(data.decode('utf-8', errors='ignore'))
+    if not match:
+        return None
+    attrs = dict(re.findall(r'([\w:-]+)\s*=\s*"([^"]*)"', match.group(1)))
+    width, height = _svg_length(attrs.get('width')), _svg_length(attrs.get('height'))
+    view_box = [float(n) for n in re.split(r'[\s,]+', attrs.get('viewBox', '').strip()) if n]
+    if len(view_box) == 4 and view_box[2] > 0 and view_box[3] > 0:
+        # Недостающий размер - по пропорциям viewBox
+        if width and not height:
+            height = width * view_box[3] / view_box[2]
+        elif height and not width:
+            width = height * view_box[2] / view_box[3]
+        elif not width and not height:
+            width, height = view_box[2], view_box[3]
+    if not width or not height:
+        return None
+    return round(width), round(height)
+
+
+def get_image_size(data: bytes, suffix: str = '') -> Optional[Tuple[int, int]]:
+    """
+    Размеры изображения по заголовку файла
+
+    Args:
+        data: Содержимое файла
+        suffix: Расширение (.svg разбирается как текст)
+
+    Returns:
+        (ширина, высота) в пикселях или None, если формат не распознан
+    """
+    if suffix.lower() == '.svg':
+        return _svg_size(data)
+    for reader in (_png_size, _jpeg_size, _gif_size, _webp_size):
+        size = reader(data)
+        if size:
+            return size
+    return None
+
+
+# --- Этап сборки ---
+
+def process_images(source_img_dir: Path, sink: OutputSink, output_img_dir: str = 'img') -> Dict[str, int]:
+    """
+    Копирует изображения с хэшированными именами и заполняет таблицу имён
+
+    Args:
+        source_img_dir: 2_source/img
+        sink: Результат сборки
+        output_img_dir: Директория изображений в результате
+
+    Returns:
+        Статистика: files, unique, svg_before, svg_after
+    """
+    sink.make_dir(output_img_dir)
+    stats = {'files': 0, 'unique': 0, 'svg_before': 0, 'svg_after': 0}
+    saved = {}  # хэш содержимого -> имя файла с хэшем
+
+    for img_file in sorted(Path(source_img_dir).iterdir()):
+        if not img_file.is_file() or img_file.name == IMAGE_MANIFEST_FILE_NAME:
+            continue
+        data = img_file.read_bytes()
+        if img_file.suffix.lower() == '.svg':
+            stats['svg_before'] += len(data)
+            data = minify_svg(data.decode('utf-8')).encode('utf-8')
+            stats['svg_after'] += len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in saved:
+            saved[digest] = f"{img_file.stem}.{digest[:8]}{img_file.suffix}"
+            sink.write_bytes(f"{output_img_dir}/{saved[digest]}", data)
+            stats['unique'] += 1
+        sink.write_bytes(f"{output_img_dir}/{img_file.name}", data)
+        entry = {'src': saved[digest]}
+        size = get_image_size(data, img_file.suffix)
+        if size:
+            entry['width'], entry['height'] = size
+        _images[img_file.name] = entry
+        stats['files'] += 1
+
+    sink.write_text(f"{output_img_dir}/{IMAGE_MANIFEST_FILE_NAME}",
+                    json.dumps(_images, ensure_ascii=False, indent=2, sort_keys=True))
+    return stats
+
+
+def render_img_attrs(filename: str) -> str:
+    """
+    Атрибуты <img> для файла из 2_source/img
+
+    Returns:
+        ' src="../img/..." alt=""' (+ width/height в режиме обработки изображений)
+    """
+    entry = _images.get(filename) if is_image_pipeline_enabled() else None
+    if not entry:
+        return f' src="../img/{filename}" alt=""'
+    size_attrs = f' width="{entry["width"]}" height="{entry["height"]}"' if 'width' in entry else ''
+    return f' src="../img/{entry["src"]}" alt=""{size_attrs}'
+
+
+def add_lazy_loading(html: str, section_index: int) -> str:
+    """
+    Отложенная загрузка картинок секции, если она ниже первых eager_sections
+
+    Args:
+        html: HTML секции
+        section_index: Номер секции на странице (с 0)
+    """
+    if not is_image_pipeline_enabled() or section_index < _settings['eager_sections']:
+        return html
+    return _IMG_TAG_RE.sub('<img loading="lazy" decoding="async"', html)
+
+
+def image_map_script() -> str:
+    """Таблица для JS (начало script.js): исходное имя -> имя файла с хэшем"""
+    image_map = {name: entry['src'] for name, entry in sorted(_images.items())}
+    return f"// image_map\nwindow.IMAGE_MAP = {json.dumps(image_map, ensure_ascii=False)};\n\n"
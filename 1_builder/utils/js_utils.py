@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Утилиты для работы с JavaScript
+"""
+
+import re
+
+
+# После этих символов и слов "/" начинает регулярное выражение, а не деление
+_REGEX_PRECEDING_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PRECEDING_WORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                          'case', 'do', 'else', 'yield', 'await'}
+_WORD_RE = re.compile(r'[\w$]+$')
+
+
+def minify_js(source: str) -> str:
+    """
+    Сжимает JS без изменения смысла
+
+    Удаляет комментарии, отступы, пробелы в конце строк и пустые строки, повторные
+    пробелы схлопывает. Переводы строк остаются (автоматическая расстановка ;
+    работает как раньше), содержимое строк, шаблонных строк и регулярных выражений
+    не меняется.
+
+    Args:
+        source: Исходный код
+
+    Returns:
+        Сжатый код
+    """
+    out = []
+    i = 0
+    n = len(source)
+    # Стек шаблонных строк: глубина фигурных скобок внутри каждой ${...}
+    template_stack = []
+
+    def last_significant() -> str:
+        for chunk in reversed(out):
+            stripped = chunk.rstrip()
+            if stripped:
+                return stripped
+        return ''
+
+    def regex_allowed() -> bool:
+        prev = last_significant()
+        if not prev:
+            return True
+        if prev[-1] in _REGEX_PRECEDING_CHARS:
+            return True
+        word = _WORD_RE.search(prev)
+        return bool(word) and word.group(0) in _REGEX_PRECEDING_WORDS
+
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ''
+
+        # Комментарии
+        if ch == '/' and nxt == '/':
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if ch == '/' and nxt == '*':
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            # Комментарий между токенами - как пробел
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+            continue
+
+        # Строки
+        if ch in '"\'':
+            j = i + 1
+            while j < n and source[j] != ch and source[j] != '\n':
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            continue
+
+        # Шаблонные строки (и продолжение после ${...})
+        if ch == '`' or (ch == '}' and template_stack and template_stack[-1] == 0):
+            if ch == '}':
+                template_stack.pop()
+            j = i + 1
+            while j < n and source[j] != '`':
+                if source[j] == '\\':
+                    j += 2
+                    continue
+                if source[j] == '$' and j + 1 < n and source[j + 1] == '{':
+                    break
+                j += 1
+            if j < n and source[j] == '$':
+                template_stack.append(0)
+                out.append(source[i:j + 2])
+                i = j + 2
+            else:
+                out.append(source[i:j + 1])
+                i = j + 1
+            continue
+        if template_stack and ch == '{':
+            template_stack[-1] += 1
+        elif template_stack and ch == '}':
+            template_stack[-1] -= 1
+
+        # Регулярные выражения
+        if ch == '/' and regex_allowed():
+            j = i + 1
+            in_class = False
+            while j < n and source[j] != '\n':
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (source[j].isalnum() or source[j] == '_'):
+                j += 1
+            out.append(source[i:j])
+            i = j
+            continue
+
+        # Пробелы кода: без отступов, пробелов в конце строк и пустых строк
+        if ch == '\n' or ch == '\r':
+            while out and out[-1] == ' ':
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n')
+        elif ch in ' \t':
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+        else:
+            out.append(ch)
+        i += 1
+
+    while out and out[-1] in (' ', '\n'):
+        out.pop()
+    return ''.join(out) + '\n'
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Режим селекторов CSS: атрибутные (по умолчанию) или классовые (config.json: "class_selectors": true)
+
+Атрибутные селекторы с подстрокой ([class*='_col-2'], [data-path*='x']) браузер сопоставляет
+и инвалидирует дороже всего. В классовом режиме рендерер добавляет явные классы-маркеры,
+а генераторы CSS целятся в них с той же специфичностью:
+
+    [class*='_col-2']              -> ._cols-2
+    [data-path] div[class*='_col-2'] -> .marking-item div._cols-2
+    [data-path='main_btn']         -> ._path-main_btn
+    [class^='col_']                -> ._column
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Классы-маркеры
+COLS_CLASS_PREFIX = '_cols-'  # _col-N (подстрока в class) -> _cols-N
+PATH_CLASS_PREFIX = '_path-'  # data-path="X" -> _path-X
+COLUMN_CLASS = '_column'      # колонки layout (class="col_N")
+
+_IDENT_RE = re.compile(r'-?[_a-zA-Z][\w-]*')
+
+# Состояние режима (задаётся один раз до генерации, дальше только читается)
+_class_selectors: bool = False
+_col_keys: Tuple[str, ...] = ()
+
+
+def init_selector_mode(app_config: Optional[Dict[str, Any]], div_column_config: Optional[Dict[str, Any]] = None):
+    """
+    Инициализирует режим селекторов
+
+    Args:
+        app_config: Настройки сборки из config.json
+        div_column_config: Конфиг колонок из default/div_column.json (ключи col-N, для которых нужны маркеры)
+    """
+    global _class_selectors, _col_keys
+    _class_selectors = bool((app_config or {}).get('class_selectors', False))
+    _col_keys = tuple(get_col_keys(div_column_config or {}))
+
+
+def is_class_selectors_enabled() -> bool:
+    """Включён ли классовый режим селекторов"""
+    return _class_selectors
+
+
+def get_col_keys(div_column_config: Dict[str, Any]) -> List[str]:
+    """
+    Ключи колонок из div_column.json, для которых генерируются селекторы _col-N
+
+    Returns:
+        Отсортированный список ключей ("col-2", "col-3", ...)
+    """
+    keys = set()
+    for device in ('desktop', 'tablet', 'mobile'):
+        for selector_key in (div_column_config.get(device) or {}):
+            # Ключ может быть "col-2, col-3" или просто "col-2"
+            keys.update(k.strip() for k in selector_key.split(',') if k.strip())
+    return sorted(keys)
+
+
+def _is_ident(value: str) -> bool:
+    return bool(_IDENT_RE.fullmatch(value))
+
+
+def col_marker_class(col_key: str) -> Optional[str]:
+    """"col-2" -> "_cols-2" (None, если ключ нельзя выразить классом)"""
+    if not col_key.startswith('col-'):
+        return None
+    marker = COLS_CLASS_PREFIX + col_key[len('col-'):]
+    return marker if _is_ident(marker) else None
+
+
+def col_marker_classes(classes: List[str]) -> List[str]:
+    """
+    Классы-маркеры, которые рендерер добавляет к элементу в классовом режиме
+
+    Повторяет семантику [class*='_col-N']: маркер ставится, если строка классов
+    содержит подстроку _col-N (так _col-25pct получает и _cols-2).
+
+    Args:
+        classes: Классы элемента
+
+    Returns:
+        Список маркеров (пустой вне классового режима)
+    """
+    if not _class_selectors:
+        return []
+    class_string = ' '.join(classes)
+    markers = []
+    for col_key in _col_keys:
+        marker = col_marker_class(col_key)
+        if marker and f"_{col_key}" in class_string and marker not in classes:
+            markers.append(marker)
+    return markers
+
+
+def get_col_marker_keys() -> List[str]:
+    """Ключи колонок, для которых рантайм (functions.js) тоже ставит маркеры (пусто вне классового режима)"""
+    if not _class_selectors:
+        return []
+    return [col_key for col_key in _col_keys if col_marker_class(col_key)]
+
+
+def col_selector(col_key: str) -> str:
+    """Селектор элементов с классом _col-N"""
+    marker = col_marker_class(col_key) if _class_selectors else None
+    return f".{marker}" if marker else f"[class*='_{col_key}']"
+
+
+def any_path_selector() -> str:
+    """Селектор обёртки элемента (marking-item с data-path)"""
+    return '.marking-item' if _class_selectors else '[data-path]'
+
+
+def path_class(data_path: str) -> Optional[str]:
+    """Класс обёртки для data-path (None вне классового режима или для неидентификаторов)"""
+    if not _class_selectors or not _is_ident(data_path):
+        return None
+    return PATH_CLASS_PREFIX + data_path
+
+
+def path_selector(data_path: str) -> str:
+    """Селектор обёртки с data-path="X" """
+    marker = path_class(data_path)
+    return f".{marker}" if marker else f"[data-path='{data_path}']"
+
+
+def path_contains_selector(part: str) -> str:
+    """
+    Селектор обёртки, путь которой содержит part
+
+    В классовом режиме сужается до точного совпадения пути (data-path у обёрток -
+    это ключи элементов layout, part - последний ключ из objects.json).
+    """
+    marker = path_class(part)
+    return f".{marker}" if marker else f"[data-path*='{part}']"
+
+
+def column_selector() -> str:
+    """Селектор колонок layout (class="col_N")"""
+    return f".{COLUMN_CLASS}" if _class_selectors else "[class^='col_']"
@@ -8,12 +8,13 @@ StyleValidator - Валидатор соответствия HTML структу
 import json
 import sys
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 # Добавляем путь к build для импорта
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.layout_structure_analyzer import LayoutStructureAnalyzer
+from utils.css_parser import SelectorIndex
 
 
 class StyleValidator:
@@ -26,7 +27,24 @@ class StyleValidator:
         """
         self.html_config = html_config
         self.structure_analyzer = LayoutStructureAnalyzer(html_config)
+        # Индекс селекторов последнего проверенного CSS (строится один раз на stylesheet)
+        self._indexed_css: Optional[str] = None
+        self._selector_index: Optional[SelectorIndex] = None
         
+    def get_selector_index(self, css_content: Union[str, SelectorIndex]) -> SelectorIndex:
+        """
+        Индекс селекторов stylesheet (повторные вызовы с тем же CSS используют готовый индекс)
+        
+        Args:
+            css_content: Содержимое CSS файла или уже построенный индекс
+        """
+        if isinstance(css_content, SelectorIndex):
+            return css_content
+        if self._selector_index is None or css_content != self._indexed_css:
+            self._selector_index = SelectorIndex(css_content)
+            self._indexed_css = css_content
+        return self._selector_index
+    
     def analyze_structure(self, section_name: str) -> Dict[str, Any]:
         """
         Анализирует структуру секции и возвращает информацию о вложенности
@@ -88,12 +106,15 @@ class StyleValidator:
             'column_paths': column_paths
         }
     
-    def validate_css_selectors(self, css_content: str, section_name: str) -> Dict[str, List[str]]:
+    def validate_css_selectors(self, css_content: Union[str, SelectorIndex], section_name: str) -> Dict[str, List[str]]:
         """
         Проверяет наличие необходимых CSS селекторов для секции
         
+        Селектор считается найденным, если он входит в селектор какого-либо правила
+        (поиск по индексу SelectorIndex, а не по тексту stylesheet).
+        
         Args:
-            css_content: Содержимое CSS файла
+            css_content: Содержимое CSS файла или индекс селекторов
             section_name: Имя секции
             
         Returns:
@@ -107,23 +128,23 @@ class StyleValidator:
         if not structure:
             return {'missing_selectors': [], 'conflicting_selectors': [], 'found_selectors': []}
         
-        import re
+        index = self.get_selector_index(css_content)
         
         missing = []
         found = []
         conflicting = []
         
-        # Проверяем селекторы для column (простой поиск подстроки)
+        # Проверяем селекторы для column
         column_selector = f".layout.section-{section_name} .column"
-        column_found = column_selector in css_content
+        column_found = column_selector in index
         if column_found:
             found.append(column_selector)
         else:
             missing.append(column_selector)
         
-        # Проверяем селекторы для row (простой поиск подстроки)
+        # Проверяем селекторы для row
         row_selector = f".layout.section-{section_name} .row"
-        row_found = row_selector in css_content
+        row_found = row_selector in index
         if row_found:
             found.append(row_selector)
         else:
@@ -132,7 +153,7 @@ class StyleValidator:
         # Проверяем специфичные селекторы если есть вложенность
         if structure['has_nested_columns']:
             nested_column_selector = f".layout.section-{section_name} .row .column"
-            nested_column_found = nested_column_selector in css_content
+            nested_column_found = nested_column_selector in index
             if nested_column_found:
                 found.append(nested_column_selector)
             else:
@@ -142,7 +163,7 @@ class StyleValidator:
         
         if structure['has_nested_rows']:
             nested_row_selector = f".layout.section-{section_name} .column .row"
-            nested_row_found = nested_row_selector in css_content
+            nested_row_found = nested_row_selector in index
             if nested_row_found:
                 found.append(nested_row_selector)
             else:
@@ -156,9 +177,9 @@ class StyleValidator:
             'found_selectors': found
         }
     
-    def validate_all_sections(self, css_content: str) -> Dict[str, Dict[str, Any]]:
+    def validate_all_sections(self, css_content: Union[str, SelectorIndex]) -> Dict[str, Dict[str, Any]]:
         """
-        Валидирует все секции
+        Валидирует все секции (stylesheet разбирается один раз)
         
         Returns:
             {
@@ -169,10 +190,11 @@ class StyleValidator:
             }
         """
         results = {}
+        index = self.get_selector_index(css_content)
         
         for section_name in self.html_config.keys():
             structure = self.analyze_structure(section_name)
-            validation = self.validate_css_selectors(css_content, section_name)
+            validation = self.validate_css_selectors(index, section_name)
             
             results[section_name] = {
                 'structure': structure,
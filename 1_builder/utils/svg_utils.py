@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Утилиты SVG иконок (library/icon.json) и спрайт иконок
+
+Спрайт (config.json: "icon_sprite": true или {"file": true})
+
+Без спрайта SVG из library/icon.json вставляется целиком при каждом использовании.
+Со спрайтом содержимое иконки хранится один раз в <symbol id="i-<ключ>">, а в
+разметке остаётся только корневой <svg> с прежними атрибутами:
+
+    <svg viewBox="0 0 24 24" fill="none" stroke="currentColor"><use href="#i-cart"/></svg>
+
+Атрибуты корня остаются на месте, поэтому правила CSS "icon svg" и currentColor
+работают как раньше.
+
+- true: символы повторяющихся иконок страницы выводятся одним скрытым <svg>
+  в конце body (секции - в конце файла секции), иконка, которая встречается
+  на странице один раз, остаётся целиком в разметке;
+- {"file": true}: все иконки сборки сохраняются в icons.svg (кэшируется браузером
+  между страницами), <use href="../icons.svg#i-cart"/>. Внешний спрайт браузеры
+  не загружают с file://, режим работает только через HTTP.
+
+Иконки, которые не являются SVG (например, текстовый ☰), выводятся как есть.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from core.output_sink import OutputSink
+
+
+_SVG_RE = re.compile(r'^\s*<svg\b([^>]*)>(.*)</svg>\s*$', re.DOTALL | re.IGNORECASE)
+_PROLOG_RE = re.compile(r'<\?xml.*?\?>|<!DOCTYPE[^>]*>|<!--.*?-->|<metadata\b.*?</metadata\s*>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^<>]+>')
+_EMPTY_ELEMENT_RE = re.compile(r'<([a-zA-Z][\w:-]*)([^<>]*?)\s*>\s*</\1\s*>')
+_XMLNS_RE = re.compile(r'\s+xmlns(?::\w+)?\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+_SPACE_RE = re.compile(r'\s+')
+_TRAILING_ZEROS_RE = re.compile(r'(?<=\d)\.(\d*?)0+(?![\d.])')
+
+SPRITE_FILE_NAME = 'icons.svg'
+SYMBOL_ID_PREFIX = 'i-'
+
+_USE_RE = re.compile(rf'<use href="#{SYMBOL_ID_PREFIX}([\w-]+)"')
+_INLINE_USE_RE = re.compile(rf'<svg([^>]*)><use href="#{SYMBOL_ID_PREFIX}([\w-]+)"/></svg>')
+
+# Состояние режима (задаётся один раз до генерации, дальше только читается)
+_settings: Optional[Dict[str, bool]] = None
+# Символы сборки: ключ иконки -> (viewBox, содержимое)
+_symbols: Dict[str, Tuple[Optional[str], str]] = {}
+_lock = threading.Lock()
+
+
+def minify_svg(svg: str) -> str:
+    """
+    Сжимает SVG без изменения отрисовки
+
+    - удаляет пролог XML, DOCTYPE, комментарии и <metadata>;
+    - удаляет пробелы между тегами (при <text> - схлопывает) и внутри тегов;
+    - убирает незначащие нули дробных чисел в атрибутах;
+    - пустые элементы <line ...></line> записывает как <line .../>.
+
+    Args:
+        svg: Разметка SVG
+
+    Returns:
+        Сжатая разметка
+    """
+    svg = _PROLOG_RE.sub('', svg)
+    # Пробел между тегами внутри <text> отображается - там он схлопывается, а не удаляется
+    svg = re.sub(r'>\s+<', '> <' if re.search(r'<text\b', svg) else '><', svg.strip())
+
+    def minify_tag(match):
+        tag = _SPACE_RE.sub(' ', match.group(0)).replace(' >', '>').replace(' />', '/>')
+        # 130.000000 -> 130, 0.100000 -> 0.1
+        return _TRAILING_ZEROS_RE.sub(lambda m: f'.{m.group(1)}' if m.group(1) else '', tag)
+
+    svg = _TAG_RE.sub(minify_tag, svg)
+    return _EMPTY_ELEMENT_RE.sub(r'<\1\2/>', svg)
+
+
+def split_svg(svg: str) -> Optional[Tuple[str, str]]:
+    """
+    Разделяет SVG на атрибуты корневого <svg> и содержимое
+
+    Args:
+        svg: Разметка SVG (одна иконка)
+
+    Returns:
+        (атрибуты без xmlns, с ведущим пробелом; содержимое) или None, если это не SVG
+    """
+    match = _SVG_RE.match(svg)
+    if not match or re.search(r'<svg\b', match.group(2), re.IGNORECASE):
+        return None
+    return _XMLNS_RE.sub('', match.group(1)).rstrip(), match.group(2)
+
+
+def get_svg_attr(attrs: str, name: str) -> Optional[str]:
+    """Значение атрибута из строки атрибутов (None, если его нет)"""
+    match = re.search(rf'(?:^|\s){re.escape(name)}\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', attrs)
+    if not match:
+        return None
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def get_icon_sprite_settings(app_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, bool]]:
+    """
+    Читает настройки спрайта иконок из config.json
+
+    Returns:
+        {'file': bool} или None если режим выключен
+    """
+    value = (app_config or {}).get('icon_sprite')
+    if not value:
+        return None
+    settings = value if isinstance(value, dict) else {}
+    return {'file': bool(settings.get('file', False))}
+
+
+def init_icon_sprite(app_config: Optional[Dict[str, Any]]):
+    """
+    Инициализирует режим спрайта иконок
+
+    Args:
+        app_config: Настройки сборки из config.json
+    """
+    global _settings
+    _settings = get_icon_sprite_settings(app_config)
+
+
+def is_icon_sprite_enabled() -> bool:
+    """Выводятся ли иконки через спрайт"""
+    return _settings is not None
+
+
+def is_sprite_file_enabled() -> bool:
+    """Сохраняется ли спрайт отдельным файлом icons.svg"""
+    return bool(_settings and _settings['file'])
+
+
+def render_icon(icon_key: str, icon_content: str) -> str:
+    """
+    Разметка иконки для вставки в HTML
+
+    Args:
+        icon_key: Ключ из icon.json
+        icon_content: Содержимое из icon.json
+
+    Returns:
+        <svg ...><use href="#i-ключ"/></svg> в режиме спрайта, иначе icon_content без изменений
+    """
+    if not is_icon_sprite_enabled() or not re.fullmatch(r'[\w-]+', icon_key or ''):
+        return icon_content
+    parts = split_svg(minify_svg(icon_content))
+    if parts is None:
+        return icon_content
+    attrs, inner = parts
+    with _lock:
+        _symbols.setdefault(icon_key, (get_svg_attr(attrs, 'viewBox'), inner))
+    href = f"../{SPRITE_FILE_NAME}#{SYMBOL_ID_PREFIX}{icon_key}" if is_sprite_file_enabled() \
+        else f"#{SYMBOL_ID_PREFIX}{icon_key}"
+    return f'<svg{attrs}><use href="{href}"/></svg>'
+
+
+def _render_symbols(keys) -> str:
+    parts = []
+    for key in keys:
+        view_box, inner = _symbols[key]
+        view_box_attr = f' viewBox="{view_box}"' if view_box else ''
+        parts.append(f'<symbol id="{SYMBOL_ID_PREFIX}{key}"{view_box_attr}>{inner}</symbol>')
+    return ''.join(parts)
+
+
+def embed_icon_sprite(html: str, context_html: Optional[str] = None) -> str:
+    """
+    Встраивает спрайт в HTML страницы или секции (режим true)
+
+    Иконка, которая встречается один раз, возвращается в разметку целиком: символ
+    и ссылка на него заняли бы больше места. Для остальных в конец HTML добавляется
+    скрытый <svg> с их <symbol>.
+
+    Args:
+        html: HTML страницы или секции
+        context_html: HTML вместе с фрагментами модалок (их иконки остаются ссылками)
+
+    Returns:
+        HTML со спрайтом (в режиме {"file": true} и без спрайта - без изменений)
+    """
+    if not is_icon_sprite_enabled() or is_sprite_file_enabled():
+        return html
+    uses = Counter(key for key in _USE_RE.findall(context_html or html) if key in _symbols)
+    if not uses:
+        return html
+
+    def inline_single(match):
+        key = match.group(2)
+        if uses[key] != 1:
+            return match.group(0)
+        del uses[key]
+        return f'<svg{match.group(1)}>{_symbols[key][1]}</svg>'
+
+    html = _INLINE_USE_RE.sub(inline_single, html)
+    if not uses:
+        return html
+    return (f'{html}<svg aria-hidden="true" style="position:absolute;width:0;height:0;overflow:hidden">'
+            f'{_render_symbols(uses)}</svg>')
+
+
+def save_sprite(sink: OutputSink) -> Optional[str]:
+    """
+    Сохраняет спрайт icons.svg (режим {"file": true})
+
+    Args:
+        sink: Результат сборки
+
+    Returns:
+        Путь к файлу в результате или None, если файл не нужен
+    """
+    if not is_sprite_file_enabled() or not _symbols:
+        return None
+    return sink.write_text(SPRITE_FILE_NAME,
+                           f'<svg xmlns="http://www.w3.org/2000/svg">{_render_symbols(sorted(_symbols))}</svg>')
+
+
+def get_sprite_size() -> int:
+    """Количество иконок в спрайте сборки"""
+    return len(_symbols)
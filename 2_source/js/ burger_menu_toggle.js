@@ -1,5 +1,8 @@
 // Burger menu toggle
-document.addEventListener('DOMContentLoaded', () => {
+// Бургеры, у которых уже есть обработчик (шапка остаётся при переходе без перезагрузки)
+const boundBurgers = new WeakSet();
+
+function initBurgerMenu() {
     // Ищем burger внутри header_menu
     const menuContainer = document.querySelector('[data-path="header_menu"]');
     // Ищем icon с классом content-burger (ключ элемента - burger)
@@ -9,7 +12,11 @@ document.addEventListener('DOMContentLoaded', () => {
     
     console.log('Burger menu toggle:', { menuContainer, burger, menuNav });
     
+    if (burger && boundBurgers.has(burger)) {
+        return;
+    }
     if (burger && menuNav) {
+        boundBurgers.add(burger);
         burger.addEventListener('click', () => {
             console.log('Burger clicked, toggling opened class');
             menuNav.classList.toggle('opened');
@@ -18,5 +25,9 @@ document.addEventListener('DOMContentLoaded', () => {
     } else {
         console.error('Burger menu elements not found:', { burger, menuNav });
     }
-});
+}
+
+document.addEventListener('DOMContentLoaded', initBurgerMenu);
+// Переход без перезагрузки (page_nav.js): шапка могла смениться
+document.addEventListener('page:updated', initBurgerMenu);
 
@@ -1,15 +1,10 @@
 // api_loader.js
 // Загрузка данных через API для элементов с data-source="api"
 
-document.addEventListener('DOMContentLoaded', () => {
-    // Находим все элементы с атрибутом data-source="api"
-    const apiElements = document.querySelectorAll('[data-source="api"]');
-    
-    if (apiElements.length === 0) {
-        return;
-    }
-    
-    console.log(`Найдено ${apiElements.length} элементов для загрузки через API`);
+(function() {
+    // Элементы, для которых загрузка уже запущена (после перехода без перезагрузки
+    // оставшиеся на странице элементы не загружаются повторно)
+    const startedElements = new WeakSet();
     
     // Функция для загрузки данных одного элемента
     function loadApiData(element) {
@@ -54,23 +49,45 @@ document.addEventListener('DOMContentLoaded', () => {
             });
     }
     
-    // Загружаем данные сразу для всех элементов
-    apiElements.forEach(element => {
-        loadApiData(element);
-    });
-    
-    // Определяем, какие элементы нужно обновлять в реальном времени
-    // (например, время обновляется каждую секунду)
-    apiElements.forEach(element => {
-        const apiUrl = element.getAttribute('data-api-url');
+    function initApiElements() {
+        // Находим все элементы с атрибутом data-source="api"
+        const apiElements = Array.from(document.querySelectorAll('[data-source="api"]'))
+            .filter(element => !startedElements.has(element));
         
-        // Если это скрипт времени (real_time), обновляем каждую секунду
-        if (apiUrl && apiUrl.includes('real_time')) {
-            setInterval(() => {
-                loadApiData(element);
-            }, 1000); // Обновляем каждую секунду
+        if (apiElements.length === 0) {
+            return;
         }
-        // Для других элементов можно добавить другие интервалы или оставить без автообновления
-    });
-});
+        
+        console.log(`Найдено ${apiElements.length} элементов для загрузки через API`);
+        
+        // Загружаем данные сразу для всех элементов
+        apiElements.forEach(element => {
+            startedElements.add(element);
+            loadApiData(element);
+        });
+        
+        // Определяем, какие элементы нужно обновлять в реальном времени
+        // (например, время обновляется каждую секунду)
+        apiElements.forEach(element => {
+            const apiUrl = element.getAttribute('data-api-url');
+            
+            // Если это скрипт времени (real_time), обновляем каждую секунду
+            if (apiUrl && apiUrl.includes('real_time')) {
+                const timer = setInterval(() => {
+                    // Элемент убран со страницы (переход без перезагрузки)
+                    if (!element.isConnected) {
+                        clearInterval(timer);
+                        return;
+                    }
+                    loadApiData(element);
+                }, 1000); // Обновляем каждую секунду
+            }
+            // Для других элементов можно добавить другие интервалы или оставить без автообновления
+        });
+    }
+    
+    document.addEventListener('DOMContentLoaded', initApiElements);
+    // Переход без перезагрузки (page_nav.js): новые элементы страницы
+    document.addEventListener('page:updated', initApiElements);
+})();
 
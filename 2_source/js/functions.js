@@ -226,6 +226,7 @@ const functionsManager = new FunctionsManager();
 class DatabaseRenderer {
     constructor() {
         this.dataCache = {}; // Кэш загруженных данных
+        this.templateRegistry = null; // Шаблоны страницы (getTemplate)
         this.init();
     }
 
@@ -252,6 +253,17 @@ class DatabaseRenderer {
         }
     }
 
+    /**
+     * Шаблон по id из реестра страницы (script[data-template-registry], разбирается один раз)
+     */
+    getTemplate(templateId) {
+        if (!this.templateRegistry) {
+            const scriptTag = document.querySelector('script[type="application/json"][data-template-registry]');
+            this.templateRegistry = scriptTag ? JSON.parse(scriptTag.textContent) : {};
+        }
+        return this.templateRegistry[templateId] || null;
+    }
+
     /**
      * Рендерит все шаблоны с базами данных
      */
@@ -260,25 +272,22 @@ class DatabaseRenderer {
         console.log('DatabaseRenderer: renderAll started');
         console.log('===========================================');
         
-        // Находим все контейнеры с data-template
-        const containers = document.querySelectorAll('[data-template]');
-        console.log('DatabaseRenderer: Найдено контейнеров с data-template:', containers.length);
+        // Находим все контейнеры шаблонов (data-template-id)
+        const containers = document.querySelectorAll('[data-template-id]');
+        console.log('DatabaseRenderer: Найдено контейнеров с data-template-id:', containers.length);
         
         if (containers.length === 0) {
-            console.warn('⚠️ DatabaseRenderer: Контейнеры с data-template не найдены!');
+            console.warn('⚠️ DatabaseRenderer: Контейнеры с data-template-id не найдены!');
             return;
         }
         
         for (const container of containers) {
             console.log('DatabaseRenderer: Обрабатываю контейнер:', container);
-            let templateStr = container.getAttribute('data-template');
-            // Декодируем HTML entities если они есть
-            if (templateStr && templateStr.includes('&quot;')) {
-                const textarea = document.createElement('textarea');
-                textarea.innerHTML = templateStr;
-                templateStr = textarea.value;
+            const template = this.getTemplate(container.getAttribute('data-template-id'));
+            if (!template) {
+                console.warn('⚠️ DatabaseRenderer: Шаблон не найден в реестре:', container);
+                continue;
             }
-            const template = JSON.parse(templateStr);
             
             // Ищем источники данных (api1, api2, ...)
             // Ищем в родительском элементе и его родителях (для случая когда span в div.wr-fields, а container в div.gr)
@@ -650,6 +659,24 @@ class DatabaseRenderer {
         };
     }
 
+    /**
+     * Путь к картинке с учётом хэшированных имён сборки (window.IMAGE_MAP, режим image_pipeline)
+     */
+    mapImage(src) {
+        const map = window.IMAGE_MAP;
+        const match = map ? src.match(/^(\.\.\/img\/)([^/?#]+)$/) : null;
+        return match && map[match[2]] ? match[1] + map[match[2]] : src;
+    }
+
+    /**
+     * Имена классов с учётом сжатия сборкой (window.CLASS_MAP, режим mangle_classes)
+     */
+    mapClasses(classString) {
+        const map = window.CLASS_MAP;
+        if (!map) return classString;
+        return classString.split(' ').map(cls => map[cls] || cls).join(' ');
+    }
+
     /**
      * Создает элемент из шаблона
      */
@@ -689,9 +716,16 @@ class DatabaseRenderer {
             } else if (colInfo.type === 'percentage') {
                 classes.push(`_col-${Math.round(colInfo.percentage)}pct`);
             }
+            // Классовый режим селекторов сборки: маркеры _cols-N вместо [class*='_col-N']
+            const classString = classes.join(' ');
+            (window.COL_MARKER_KEYS || []).forEach(colKey => {
+                if (classString.includes('_' + colKey)) {
+                    classes.push('_cols-' + colKey.slice(4));
+                }
+            });
         }
         
-        element.className = classes.join(' ');
+        element.className = this.mapClasses(classes.join(' '));
         
         // Обрабатываем каждый элемент шаблона
         for (const [key, value] of Object.entries(template)) {
@@ -741,7 +775,7 @@ class DatabaseRenderer {
                 // Проверяем что fieldValue существует и не пустое
                 if (fieldValue && String(fieldValue).trim() !== '') {
                 const textEl = document.createElement(key === 'label' ? 'label' : 'span');
-                textEl.className = `content-${key}`;
+                textEl.className = this.mapClasses(`content-${key}`);
                     textEl.textContent = String(fieldValue).trim();
                 element.appendChild(textEl);
                 }
@@ -764,7 +798,7 @@ class DatabaseRenderer {
                 const inputEl = document.createElement('input');
                 if (inputSubtype === 'radio' || inputSubtype === 'checkbox') {
                     inputEl.type = inputSubtype;
-                    inputEl.className = `${key} input`;
+                    inputEl.className = this.mapClasses(`${key} input`);
                     const radioValue = (value.length >= idx + 2) ? this.resolveValue(value[idx + 1], record, bdSources) : fieldValue;
                     inputEl.value = (radioValue != null && radioValue !== '') ? String(radioValue) : '';
                     if (value.length > idx + 2 && typeof value[idx + 2] === 'string' && value[idx + 2].startsWith('name:')) {
@@ -787,7 +821,7 @@ class DatabaseRenderer {
                     } else {
                         inputEl.type = inputType;
                     }
-                    inputEl.className = `${key} input`;
+                    inputEl.className = this.mapClasses(`${key} input`);
                     if (placeholderText) {
                         inputEl.placeholder = placeholderText;
                     }
@@ -808,6 +842,7 @@ class DatabaseRenderer {
                 if (fieldValue && String(fieldValue).trim() !== '') {
                 const imgEl = document.createElement('img');
                     const imgValue = String(fieldValue).trim();
+                    let imgSrc;
                 // Путь к картинке может быть абсолютным или относительным
                     if (imgValue.startsWith('/')) {
                         // Если путь начинается с /, преобразуем в относительный
@@ -815,16 +850,17 @@ class DatabaseRenderer {
                         // /img/pm_kaspi.png -> ../img/pm_kaspi.png
                         // /logo_0.png -> ../img/logo_0.png (просто имя файла)
                         if (imgValue.includes('/pavel_sto')) {
-                            imgEl.src = imgValue.replace('/pavel_sto', '..');
+                            imgSrc = imgValue.replace('/pavel_sto', '..');
                         } else if (imgValue.startsWith('/img')) {
-                            imgEl.src = '..' + imgValue;
+                            imgSrc = '..' + imgValue;
                         } else {
                             const fileName = imgValue.replace(/^\//, '');
-                            imgEl.src = `../img/${fileName}`;
+                            imgSrc = `../img/${fileName}`;
                         }
                 } else {
-                        imgEl.src = `../${imgValue}`;
+                        imgSrc = `../${imgValue}`;
                 }
+                imgEl.src = this.mapImage(imgSrc);
                 imgEl.alt = '';
                 element.appendChild(imgEl);
                 }
@@ -832,7 +868,7 @@ class DatabaseRenderer {
             } else if (elementType === 'button') {
                 const btnEl = document.createElement('button');
                 btnEl.type = 'button';
-                btnEl.className = `${key} button`;
+                btnEl.className = this.mapClasses(`${key} button`);
                 btnEl.textContent = fieldValue != null ? String(fieldValue).trim() : '';
                 element.appendChild(btnEl);
             }
@@ -932,6 +968,14 @@ class DatabaseRenderer {
 // Делаем глобальным для доступа из других скриптов (например, при открытии модального окна)
 window.dbRenderer = new DatabaseRenderer();
 
+// Переход без перезагрузки (page_nav.js): новые секции, реестр шаблонов и переводы страницы
+document.addEventListener('page:updated', function() {
+    window.dbRenderer.templateRegistry = null;
+    window.ifLabels = null;
+    functionsManager.setup();
+    window.dbRenderer.renderAll();
+});
+
 // Спойлер в карточках списка заказов: по клику на «Детали» показываем/скрываем блок с текстом
 document.addEventListener('click', function(e) {
     var btn = e.target.closest('.btn_details');
@@ -945,7 +989,7 @@ document.addEventListener('click', function(e) {
 // Поиск клиента по номеру телефона: список скрыт по умолчанию, показывается и фильтруется при вводе
 function getClientSearchListContainer(wrap) {
     var el = wrap.nextElementSibling;
-    while (el && (!el.hasAttribute || !el.hasAttribute('data-template'))) {
+    while (el && (!el.hasAttribute || !el.hasAttribute('data-template-id'))) {
         el = el.nextElementSibling;
     }
     return el;
@@ -1,29 +1,63 @@
 // Универсальный скрипт для модальных окон
 document.addEventListener('DOMContentLoaded', function() {
     
+    function findModal(modalId) {
+        return document.getElementById(modalId) || document.querySelector('[id="' + modalId + '"]');
+    }
+    
+    function openModal(modal) {
+        modal.classList.add('active');
+        modal.scrollTop = 0; // Прокручиваем модалку к началу
+        document.body.style.overflow = 'hidden'; // Блокируем скролл
+        
+        // Рендерим данные из БД (если есть контейнеры с data-template-id внутри модального окна)
+        if (window.dbRenderer) {
+            setTimeout(async () => {
+                try {
+                    await window.dbRenderer.renderAll();
+                    if (window.hideClientSearchLists) window.hideClientSearchLists();
+                } catch (err) {
+                    console.error('Ошибка при рендере модалки:', err);
+                }
+            }, 50);
+        }
+    }
+    
+    // Ленивые модалки (сборка с lazy_modals): HTML модалки - во фрагменте data-modal-src,
+    // загружается при первом открытии (или заранее по <link rel="prefetch"> - тогда из кэша)
+    const modalFragments = {};
+    function loadModalFragment(src) {
+        if (!modalFragments[src]) {
+            modalFragments[src] = fetch(src).then(response => {
+                if (!response.ok) throw new Error(response.status + ' ' + src);
+                return response.text();
+            }).catch(err => {
+                delete modalFragments[src]; // Следующий клик попробует снова
+                throw err;
+            });
+        }
+        return modalFragments[src];
+    }
+    
     // Открытие модального окна
     document.addEventListener('click', function(e) {
         const trigger = e.target.closest('[data-modal]');
         if (trigger) {
             e.preventDefault();
             const modalId = trigger.getAttribute('data-modal');
-            const modal = document.getElementById(modalId) || document.querySelector('[id="' + modalId + '"]');
+            const modal = findModal(modalId);
             if (modal) {
-                modal.classList.add('active');
-                modal.scrollTop = 0; // Прокручиваем модалку к началу
-                document.body.style.overflow = 'hidden'; // Блокируем скролл
-                
-                // Рендерим данные из БД (если есть контейнеры с data-template внутри модального окна)
-                if (window.dbRenderer) {
-                    setTimeout(async () => {
-                        try {
-                            await window.dbRenderer.renderAll();
-                            if (window.hideClientSearchLists) window.hideClientSearchLists();
-                        } catch (err) {
-                            console.error('Ошибка при рендере модалки:', err);
-                        }
-                    }, 50);
-                }
+                openModal(modal);
+                return;
+            }
+            const src = trigger.getAttribute('data-modal-src');
+            if (src) {
+                loadModalFragment(src).then(html => {
+                    // Фрагмент встаёт сразу после кнопки - там, где модалка была бы в странице
+                    if (!findModal(modalId)) trigger.insertAdjacentHTML('afterend', html);
+                    const loaded = findModal(modalId);
+                    if (loaded) openModal(loaded);
+                }).catch(err => console.error('Ошибка загрузки модалки:', err));
             }
         }
     });
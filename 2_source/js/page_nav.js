@@ -0,0 +1,131 @@
+// Переходы между страницами без перезагрузки (сборка с page_fragments)
+// Фрагмент pages/<страница>.json: секции, блоки данных в конце body и JS страницы.
+// Секции и блоки с тем же data-fragment-hash остаются на месте (шапка, меню, данные bd),
+// остальные заменяются. Если фрагмент не загрузился, в нём нет общего элемента, которого
+// нет на экране, или странице нужен JS, которого нет на текущей, - обычный переход.
+// После замены отправляется событие page:updated (модули заново находят свои элементы).
+(function() {
+    if (!document.body || !document.body.hasAttribute('data-page-fragments')) return;
+    if (location.protocol !== 'http:' && location.protocol !== 'https:') return;
+
+    const HASH_ATTR = 'data-fragment-hash';
+    const fragments = {};
+    let currentPath = location.pathname;
+
+    function loadFragment(url) {
+        const src = url.origin + url.pathname.replace(/\.html$/, '.json');
+        if (!fragments[src]) {
+            fragments[src] = fetch(src).then(response => {
+                if (!response.ok) throw new Error(response.status + ' ' + src);
+                return response.json();
+            }).catch(err => {
+                delete fragments[src]; // Следующий переход попробует снова
+                throw err;
+            });
+        }
+        return fragments[src];
+    }
+
+    function createNode(html) {
+        const template = document.createElement('template');
+        template.innerHTML = html;
+        const node = template.content.firstElementChild;
+        // Скрипты из innerHTML не выполняются - исполняемый скрипт создаётся заново
+        if (node && node.tagName === 'SCRIPT' && (!node.type || node.type === 'text/javascript')) {
+            const script = document.createElement('script');
+            Array.from(node.attributes).forEach(attr => script.setAttribute(attr.name, attr.value));
+            script.textContent = node.textContent;
+            return script;
+        }
+        return node;
+    }
+
+    // Новые узлы по описанию фрагмента (null - нужен обычный переход)
+    function resolveNodes(items, oldNodes, keyOf) {
+        // Ключ -> узлы на экране (одинаковые блоки могут повторяться)
+        const current = new Map();
+        oldNodes.forEach(node => {
+            const key = keyOf(node);
+            if (!current.has(key)) current.set(key, []);
+            current.get(key).push(node);
+        });
+        const nodes = [];
+        for (const item of items) {
+            const candidates = current.get(item.key) || [];
+            const index = candidates.findIndex(node => node.getAttribute(HASH_ATTR) === item.hash);
+            if (index !== -1) {
+                nodes.push(candidates.splice(index, 1)[0]);
+            } else if (item.html) {
+                nodes.push(createNode(item.html));
+            } else {
+                return null;
+            }
+        }
+        return nodes;
+    }
+
+    // Ставит узлы на место старых (или перед anchor), старые удаляет
+    function replaceNodes(oldNodes, nodes, anchor) {
+        const body = document.body;
+        const marker = document.createComment('');
+        body.insertBefore(marker, oldNodes[0] || anchor);
+        nodes.forEach(node => body.insertBefore(node, marker));
+        const keep = new Set(nodes);
+        oldNodes.forEach(node => { if (!keep.has(node)) node.remove(); });
+        marker.remove();
+    }
+
+    function applyFragment(fragment, url) {
+        const body = document.body;
+        // JS страницы уже должен быть загружен: модули инициализируются только при загрузке
+        const loaded = new Set(Array.from(document.querySelectorAll('script[src]'),
+            script => new URL(script.src, location.href).pathname));
+        if (!fragment.scripts.every(src => loaded.has(new URL(src, url).pathname))) return false;
+
+        const children = Array.from(body.children);
+        const oldSections = children.filter(el => el.tagName === 'SECTION');
+        const oldBlocks = children.filter(el => el.tagName !== 'SECTION' && el.hasAttribute(HASH_ATTR));
+        const sections = resolveNodes(fragment.sections.map(item => Object.assign({ key: item.id }, item)),
+            oldSections, node => node.id);
+        const blocks = sections && resolveNodes(fragment.blocks.map(item => Object.assign({ key: item.hash }, item)),
+            oldBlocks, node => node.getAttribute(HASH_ATTR));
+        if (!blocks) return false;
+
+        replaceNodes(oldSections, sections, oldBlocks[0] || body.querySelector(':scope > script[src]'));
+        replaceNodes(oldBlocks, blocks, body.querySelector(':scope > script[src]'));
+        body.setAttribute('data-page', fragment.page);
+        body.style.overflow = '';
+        document.title = fragment.title;
+        return true;
+    }
+
+    function navigate(url, push) {
+        return loadFragment(url).then(fragment => {
+            if (!applyFragment(fragment, url)) throw new Error('Нужен обычный переход: ' + url.href);
+            if (push) history.pushState({ pageFragment: true }, '', url.href);
+            currentPath = url.pathname;
+            if (push) window.scrollTo(0, 0);
+            document.dispatchEvent(new CustomEvent('page:updated', { detail: { page: fragment.page } }));
+        }).catch(err => {
+            console.warn(err);
+            location.href = url.href;
+        });
+    }
+
+    document.addEventListener('click', function(e) {
+        if (e.defaultPrevented || e.button !== 0 || e.metaKey || e.ctrlKey || e.shiftKey || e.altKey) return;
+        const link = e.target.closest('a[href]');
+        if (!link || (link.target && link.target !== '_self') || link.hasAttribute('download')) return;
+        const url = new URL(link.href);
+        // Только страницы сборки: тот же сайт и та же папка pages/
+        if (url.origin !== location.origin || !/\.html$/.test(url.pathname)) return;
+        if (url.pathname.replace(/[^/]*$/, '') !== location.pathname.replace(/[^/]*$/, '')) return;
+        if (url.pathname === location.pathname) return;
+        e.preventDefault();
+        navigate(url, true);
+    });
+
+    window.addEventListener('popstate', function() {
+        if (location.pathname !== currentPath) navigate(new URL(location.href), false);
+    });
+})();